@@ -0,0 +1,82 @@
+"""
+Micro-benchmark: per-column dict comprehensions vs. the vectorized profiler.
+
+Builds wide synthetic tables, round-trips them through CSV so dtypes match what
+extract_csv_schemas sees, and times both ways of computing the sampled stats.
+
+Usage:
+    python benchmarks/bench_column_profiler.py [--rows 100] [--widths 100 500 1000]
+"""
+import argparse
+import io
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+
+from column_stats import profile_dataframe
+
+
+def make_wide_frame(rows: int, width: int, seed: int = 0) -> pd.DataFrame:
+    """Creates a sampled-CSV-like frame mixing int, float-with-nulls, string and bool columns."""
+    rng = np.random.default_rng(seed)
+    data = {}
+    for j in range(width):
+        kind = j % 4
+        if kind == 0:
+            data[f'int_{j}'] = rng.integers(0, 1000, rows)
+        elif kind == 1:
+            data[f'float_{j}'] = np.where(rng.random(rows) < 0.2, np.nan, rng.random(rows))
+        elif kind == 2:
+            data[f'str_{j}'] = rng.choice(['alpha', 'beta', 'gamma', None], rows)
+        else:
+            data[f'bool_{j}'] = rng.integers(0, 2, rows).astype(bool)
+    buffer = io.StringIO()
+    pd.DataFrame(data).to_csv(buffer, index=False)
+    buffer.seek(0)
+    return pd.read_csv(buffer)
+
+
+def legacy_profile(df: pd.DataFrame) -> dict:
+    """The original per-column implementation from extract_csv_schemas."""
+    return {
+        'dtypes': {col: str(df[col].dtype) for col in df.columns},
+        'null_counts': {col: int(df[col].isna().sum()) for col in df.columns},
+        'unique_counts': {col: int(df[col].nunique()) for col in df.columns},
+        'example_values': {col: df[col].dropna().head(3).tolist() if not df[col].empty else []
+                           for col in df.columns}
+    }
+
+
+def best_of(func, df: pd.DataFrame, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func(df)
+        timings.append(time.perf_counter() - start)
+    return min(timings)
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--rows', type=int, default=100, help='sampled rows per table (default: 100)')
+    parser.add_argument('--widths', type=int, nargs='+', default=[100, 500, 1000], help='column counts to test')
+    parser.add_argument('--repeat', type=int, default=5, help='runs per measurement, best is reported')
+    args = parser.parse_args()
+
+    print(f"{'columns':>8} {'legacy_ms':>10} {'vectorized_ms':>14} {'speedup':>8}")
+    for width in args.widths:
+        df = make_wide_frame(args.rows, width)
+        if legacy_profile(df) != profile_dataframe(df):
+            raise AssertionError(f"Profiles differ for width {width}")
+        legacy = best_of(legacy_profile, df, args.repeat)
+        vectorized = best_of(profile_dataframe, df, args.repeat)
+        print(f"{width:>8} {legacy * 1000:>10.1f} {vectorized * 1000:>14.1f} {legacy / vectorized:>7.1f}x")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,131 @@
+"""
+Import-time benchmark of the workflow modules.
+
+Each module is imported in a fresh interpreter, as in a notebook kernel restart
+or a CLI start, with -X importtime. The report has the best and mean import
+time, the slowest top-level imports, which heavy libraries were loaded and how
+many Bedrock model clients were built. With --agents it also times the first
+create_workflow_agents call, where model construction now happens.
+
+Usage:
+    python benchmarks/bench_imports.py [--modules workflow toolkit llms] [--repeat 5] [--agents]
+                                       [--output imports.json]
+"""
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+from typing import Any, Dict, List
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_workflow import git_commit
+
+SRC_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src')
+
+# Libraries whose import dominates start-up when loaded eagerly
+HEAVY_MODULES = ('pandas', 'numpy', 'pyarrow', 'botocore', 'boto3', 'yaml', 'strands', 'strands_tools')
+
+PROBE = """
+import json, sys, time
+started = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - started
+result = {{'seconds': seconds, 'loaded': [name for name in {heavy!r} if name in sys.modules]}}
+if 'llms' in sys.modules:
+    result['models_built'] = getattr(sys.modules['llms'], 'built_models', lambda: None)()
+if {agents!r}:
+    import workflow
+    started = time.perf_counter()
+    workflow.create_workflow_agents()
+    result['agents_seconds'] = time.perf_counter() - started
+    result['models_built_by_agents'] = getattr(sys.modules['llms'], 'built_models', lambda: None)()
+print(json.dumps(result))
+"""
+
+
+def parse_importtime(stderr: str, module: str, top: int) -> Dict[str, List[Dict[str, Any]]]:
+    """
+    Slowest top-level imports (cumulative) and slowest modules of their own (self) from -X importtime.
+
+    Only the interpreter start-up and the import of module are counted, not what the probe imports after it.
+    """
+    entries = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        depth = (len(name) - len(name.lstrip(' '))) // 2
+        entries.append({'module': name.strip(), 'depth': depth,
+                        'self_ms': int(self_us) / 1000, 'cumulative_ms': int(cumulative_us) / 1000})
+        if depth == 0 and name.strip() == module:
+            break
+    top_level = sorted((entry for entry in entries if entry['depth'] == 0), key=lambda entry: -entry['cumulative_ms'])
+    own = sorted(entries, key=lambda entry: -entry['self_ms'])
+    return {
+        'top_level': [{'module': entry['module'], 'ms': round(entry['cumulative_ms'], 1)} for entry in top_level[:top]],
+        'self': [{'module': entry['module'], 'ms': round(entry['self_ms'], 1)} for entry in own[:top]],
+    }
+
+
+def measure_import(module: str, repeat: int, top: int, agents: bool) -> Dict[str, Any]:
+    env = {**os.environ, 'PYTHONPATH': os.pathsep.join(filter(None, [SRC_DIR, os.environ.get('PYTHONPATH')]))}
+    env.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+    runs = []
+    for _ in range(repeat):
+        completed = subprocess.run(
+            [sys.executable, '-X', 'importtime', '-c', PROBE.format(module=module, heavy=HEAVY_MODULES, agents=agents)],
+            capture_output=True, text=True, env=env, cwd=SRC_DIR,
+        )
+        if completed.returncode != 0:
+            return {'error': completed.stderr.strip().splitlines()[-1:]}
+        result = json.loads(completed.stdout.strip().splitlines()[-1])
+        result['importtime'] = parse_importtime(completed.stderr, module, top)
+        runs.append(result)
+    seconds = [run['seconds'] for run in runs]
+    best = min(runs, key=lambda run: run['seconds'])
+    report = {
+        'best_seconds': round(min(seconds), 4),
+        'mean_seconds': round(sum(seconds) / len(seconds), 4),
+        'loaded': best['loaded'],
+        'models_built': best.get('models_built'),
+        'slowest_imports': best['importtime']['top_level'],
+        'slowest_modules': best['importtime']['self'],
+    }
+    if agents:
+        report['agents_seconds'] = round(min(run['agents_seconds'] for run in runs), 4)
+        report['models_built_by_agents'] = best['models_built_by_agents']
+    return report
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--modules', nargs='+', default=['workflow', 'toolkit', 'llms'],
+                        help='modules to import (default: workflow toolkit llms)')
+    parser.add_argument('--repeat', type=int, default=5, help='fresh interpreters per module (default: 5)')
+    parser.add_argument('--top', type=int, default=10, help='entries per ranking (default: 10)')
+    parser.add_argument('--agents', action='store_true',
+                        help='also time the first create_workflow_agents call after the import')
+    parser.add_argument('--output', help='write the JSON report to this file instead of stdout')
+    args = parser.parse_args()
+
+    report = {
+        'benchmark': 'imports',
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'parameters': {key: value for key, value in vars(args).items() if key != 'output'},
+        'imports': {module: measure_import(module, args.repeat, args.top, args.agents) for module in args.modules},
+    }
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    print(text)
+
+
+if __name__ == '__main__':
+    main()
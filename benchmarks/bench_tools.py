@@ -0,0 +1,124 @@
+"""
+Micro-benchmarks for every @tool in src/toolkit.py.
+
+Each tool is called directly (no agent, no model) on synthetic inputs and the
+best of several runs is reported as JSON, together with throughput where it
+applies. Tool banners are suppressed while timing.
+
+Usage:
+    python benchmarks/bench_tools.py [--files 20] [--rows 20000] [--columns 24] [--repeat 3]
+                                     [--output tools.json]
+"""
+import argparse
+import contextlib
+import io
+import json
+import os
+import platform
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from bench_workflow import git_commit
+from synthetic import data_model_text, etl_script, generate_source_data
+from toolkit import (check_and_execute_python_file, extract_csv_schemas, pipe_delimited_string_to_csv,
+                     save_generated_code, summarize_source_schemas)
+from venv_pool import configure_venv_pool
+
+
+def best_of(func: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """Times func repeat times with its output silenced and returns best and mean seconds."""
+    timings = []
+    for _ in range(repeat):
+        with contextlib.redirect_stdout(io.StringIO()):
+            start = time.perf_counter()
+            func()
+            timings.append(time.perf_counter() - start)
+    return {'best_seconds': round(min(timings), 5), 'mean_seconds': round(sum(timings) / len(timings), 5)}
+
+
+def with_rate(timing: Dict[str, float], amount: float, unit: str) -> Dict[str, float]:
+    timing[f'{unit}_per_second'] = round(amount / timing['best_seconds'], 1) if timing['best_seconds'] else None
+    return timing
+
+
+def run_benchmarks(args: argparse.Namespace, work_dir: str) -> Dict[str, Any]:
+    source = os.path.join(work_dir, 'source')
+    product = os.path.join(work_dir, 'data_product')
+    code_path = os.path.join(work_dir, 'generated_etl.py')
+    model_folder = os.path.join(work_dir, 'data_model')
+    dataset = generate_source_data(source, args.files, args.rows, args.columns, seed=args.seed)
+    megabytes = dataset['bytes'] / 1024 / 1024
+    configure_venv_pool(root_dir=args.venv_dir or os.path.join(work_dir, 'venvs'),
+                        system_site_packages=not args.isolated_venv)
+    repeat = args.repeat
+    tools = {}
+
+    tools['extract_csv_schemas'] = with_rate(
+        best_of(lambda: extract_csv_schemas(source), repeat), dataset['files'], 'files')
+    tools['extract_csv_schemas[serial]'] = with_rate(
+        best_of(lambda: extract_csv_schemas(source, max_workers=1), repeat), dataset['files'], 'files')
+    tools['extract_csv_schemas[full_scan]'] = with_rate(
+        best_of(lambda: extract_csv_schemas(source, full_scan=True), repeat), megabytes, 'mb')
+    tools['summarize_source_schemas'] = with_rate(
+        best_of(lambda: summarize_source_schemas(source), repeat), dataset['files'], 'files')
+
+    model_text = data_model_text(extra_tables=args.model_tables)
+    tools['pipe_delimited_string_to_csv'] = with_rate(
+        best_of(lambda: pipe_delimited_string_to_csv(model_text, model_folder), repeat),
+        len(model_text) / 1024 / 1024, 'mb')
+
+    fenced = f"```python\n{etl_script(source, product, model_folder)}\n```"
+    tools['save_generated_code'] = best_of(lambda: save_generated_code(fenced, code_path), repeat)
+
+    # The first call builds the environment; it is reported separately from the steady state
+    tools['check_and_execute_python_file[first_call]'] = best_of(
+        lambda: check_and_execute_python_file(code_path), 1)
+    tools['check_and_execute_python_file'] = with_rate(
+        best_of(lambda: check_and_execute_python_file(code_path), repeat), dataset['rows'], 'rows')
+    tools['check_and_execute_python_file[warm_worker]'] = with_rate(
+        best_of(lambda: check_and_execute_python_file(code_path, use_warm_worker=True), repeat),
+        dataset['rows'], 'rows')
+
+    return {
+        'benchmark': 'tools',
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'parameters': {key: value for key, value in vars(args).items() if key != 'output'},
+        'dataset': dataset,
+        'tools': tools,
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=20, help='sales partitions to generate (default: 20)')
+    parser.add_argument('--rows', type=int, default=20000, help='rows per partition (default: 20000)')
+    parser.add_argument('--columns', type=int, default=24, help='columns per partition (default: 24)')
+    parser.add_argument('--model-tables', type=int, default=50,
+                        help='extra dimension tables in the data model text (default: 50)')
+    parser.add_argument('--seed', type=int, default=0, help='random seed for the dataset')
+    parser.add_argument('--repeat', type=int, default=3, help='runs per measurement (default: 3)')
+    parser.add_argument('--venv-dir', help='reuse environments from this folder (default: a fresh temp folder)')
+    parser.add_argument('--isolated-venv', action='store_true',
+                        help='install pandas/numpy into the environment instead of using host packages')
+    parser.add_argument('--output', help='write the JSON report to this file instead of stdout')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='bench_tools_') as work_dir:
+        report = run_benchmarks(args, work_dir)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    print(text)
+
+
+if __name__ == '__main__':
+    main()
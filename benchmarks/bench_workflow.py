@@ -0,0 +1,250 @@
+"""
+End-to-end benchmark of the data product workflow without network access.
+
+Generates a synthetic source lake, runs run_data_workflow and the code runner
+with scripted stand-ins for the Bedrock models (the agents still call the real
+tools), and writes per-stage wall time, peak resident memory and throughput as
+JSON so runs can be compared across commits.
+
+Usage:
+    python benchmarks/bench_workflow.py [--files 20] [--rows 20000] [--columns 24]
+                                        [--llm-latency 0.5] [--output report.json]
+"""
+import argparse
+import ast
+import asyncio
+import json
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, Tuple
+
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', 'src'))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+from fake_models import ScriptedModel
+from synthetic import data_model_text, etl_script, generate_source_data
+from venv_pool import configure_venv_pool, get_venv_pool
+from workflow import create_workflow_agents, run_data_workflow, run_data_workflow_streaming
+
+
+def _maxrss_mb(who: int) -> float:
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere
+    return resource.getrusage(who).ru_maxrss / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+def _reset_peak_rss() -> bool:
+    """Resets this process's VmHWM to its current RSS (Linux), so the next reading covers one stage."""
+    try:
+        with open('/proc/self/clear_refs', 'w') as f:
+            f.write('5')
+        return True
+    except OSError:
+        return False
+
+
+def _peak_rss_mb() -> float:
+    """Peak RSS of this process from VmHWM, or the lifetime ru_maxrss where /proc is not available."""
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return int(line.split()[1]) / 1024
+    except (OSError, ValueError):
+        pass
+    return _maxrss_mb(resource.RUSAGE_SELF)
+
+
+def measure(func: Callable[[], Any]) -> Tuple[Any, float, Dict[str, float]]:
+    """
+    Runs func and returns its result, wall seconds and peak resident memory in MB.
+
+    Unlike tracemalloc, the resident set covers native allocations (pandas,
+    pyarrow) and adds no overhead to the timing. 'peak_rss_mb' is the high-water
+    mark of this process during the stage where VmHWM can be reset (Linux),
+    otherwise over its lifetime. 'children_peak_rss_mb' is the largest
+    high-water mark of a child process (pip, the generated script) waited for
+    during the stage, None if none exceeded the earlier stages' children. The
+    kernel counts a child's high-water mark from this process's RSS at fork,
+    so it is an upper bound; the script's own peak is script_peak_rss_mb.
+    """
+    children_before = _maxrss_mb(resource.RUSAGE_CHILDREN)
+    _reset_peak_rss()
+    start = time.perf_counter()
+    result = func()
+    elapsed = time.perf_counter() - start
+    children = _maxrss_mb(resource.RUSAGE_CHILDREN)
+    memory = {
+        'peak_rss_mb': round(_peak_rss_mb(), 1),
+        'children_peak_rss_mb': round(children, 1) if children > children_before else None,
+    }
+    return result, elapsed, memory
+
+
+def scripted_models(paths: Dict[str, str], latency: float, chunk_delay: float) -> Dict[str, ScriptedModel]:
+    """Scripts each agent to call its tools with the benchmark paths, then answer."""
+    code = etl_script(paths['source'], paths['product'], paths['model'])
+    options = dict(latency=latency, chunk_delay=chunk_delay)
+    return {
+        'data_modeler': ScriptedModel([
+            {'tool_calls': [{'name': 'summarize_source_schemas',
+                             'input': {'source_data_folder_path': paths['source']}}]},
+            {'tool_calls': [{'name': 'pipe_delimited_string_to_csv',
+                             'input': {'schema_content': data_model_text(),
+                                       'data_model_output_folder': paths['model']}}]},
+            "### 1. Data Model Overview\n" + data_model_text(),
+        ], model_id='fake-modeler', **options),
+        'data_engineer': ScriptedModel([
+            {'tool_calls': [{'name': 'save_generated_code',
+                             'input': {'content': f"```python\n{code}\n```", 'code_location': paths['code']}}]},
+            f"```python\n{code}\n```",
+        ], model_id='fake-engineer', **options),
+        'code_runner': ScriptedModel([
+            {'tool_calls': [{'name': 'check_and_execute_python_file', 'input': {'file_path': paths['code']}}]},
+            "The code ran successfully and the data product files were created.",
+        ], model_id='fake-runner', **options),
+    }
+
+
+def agent_breakdown(agent) -> Dict[str, Any]:
+    """Splits an agent's time into tool time and model (LLM) time from its event loop metrics."""
+    summary = agent.event_loop_metrics.get_summary()
+    tools = {name: round(usage['execution_stats']['total_time'], 4)
+             for name, usage in summary['tool_usage'].items()}
+    return {
+        'seconds': round(summary['total_duration'], 4),
+        'model_seconds': round(max(0.0, summary['total_duration'] - sum(tools.values())), 4),
+        'cycles': summary['total_cycles'],
+        'tokens': summary['accumulated_usage'].get('totalTokens', 0),
+        'tools': tools,
+    }
+
+
+def last_tool_result(agent) -> Dict[str, Any]:
+    """Returns the last tool result of an agent's conversation as a dictionary."""
+    for message in reversed(agent.messages):
+        for block in message.get('content', []):
+            if 'toolResult' in block:
+                text = block['toolResult']['content'][0].get('text', '{}')
+                try:
+                    return json.loads(text)
+                except ValueError:
+                    return ast.literal_eval(text)
+    return {}
+
+
+def git_commit() -> str:
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip()
+    except OSError:
+        return ''
+
+
+def run_benchmark(args: argparse.Namespace, work_dir: str) -> Dict[str, Any]:
+    paths = {
+        'source': os.path.join(work_dir, 'source'),
+        'model': os.path.join(work_dir, 'data_model'),
+        'code': os.path.join(work_dir, 'generated_etl.py'),
+        'product': os.path.join(work_dir, 'data_product'),
+    }
+    dataset = generate_source_data(paths['source'], args.files, args.rows, args.columns, seed=args.seed)
+    configure_venv_pool(root_dir=args.venv_dir or os.path.join(work_dir, 'venvs'),
+                        system_site_packages=not args.isolated_venv)
+
+    agents = create_workflow_agents(scripted_models(paths, args.llm_latency, args.chunk_delay),
+                                    callback_handler=None)
+    user_input = (f"Design a data product for benchmark sales. The source data folder is : {paths['source']} "
+                  f"The output data model should be saved in: {paths['model']} "
+                  f"The generated code should be saved as: {paths['code']} "
+                  f"The final data product should be saved in: {paths['product']}")
+    stages = {}
+
+    _, seconds, memory = measure(lambda: run_data_workflow(user_input, agents))
+    modeler, engineer = agent_breakdown(agents.data_modeler), agent_breakdown(agents.data_engineer)
+    extraction = modeler['tools'].get('summarize_source_schemas', 0.0)
+    stages['modeling_and_codegen'] = {
+        'seconds': round(seconds, 4), **memory,
+        'agents': {'data_modeler': modeler, 'data_engineer': engineer},
+        'schema_extraction': {
+            'seconds': extraction,
+            'files_per_second': round(dataset['files'] / extraction, 1) if extraction else None,
+            'mb_per_second': round(dataset['bytes'] / 1024 / 1024 / extraction, 1) if extraction else None,
+        },
+    }
+
+    for label in ('venv_setup_cold', 'venv_setup_warm'):
+        _, seconds, memory = measure(lambda: get_venv_pool().get_python(None))
+        stages[label] = {'seconds': round(seconds, 4), **memory}
+
+    _, seconds, memory = measure(lambda: agents.code_runner("Execute the generated code at " + paths['code']))
+    execution = last_tool_result(agents.code_runner)
+    script_seconds = execution.get('duration_seconds') or 0.0
+    stages['code_execution'] = {
+        'seconds': round(seconds, 4), **memory,
+        'agent': agent_breakdown(agents.code_runner),
+        'script_success': execution.get('success'),
+        'script_seconds': script_seconds,
+        'script_peak_rss_mb': execution.get('peak_rss_mb'),
+        'rows_per_second': round(dataset['rows'] / script_seconds) if script_seconds else None,
+        'errors': execution.get('errors', []),
+    }
+
+    if args.streaming:
+        # Same three stages with overlapping agents, on fresh scripted models and agents
+        agents = create_workflow_agents(scripted_models(paths, args.llm_latency, args.chunk_delay),
+                                        callback_handler=None)
+        result, seconds, memory = measure(lambda: asyncio.run(run_data_workflow_streaming(user_input, agents)))
+        stages['streaming_workflow'] = {
+            'seconds': round(seconds, 4), **memory,
+            'started_at': result['started_at'], 'early': result['early'],
+            'steps': {step: round(value, 4) for step, value in result['timings'].items()},
+        }
+
+    return {
+        'benchmark': 'workflow',
+        'commit': git_commit(),
+        'python': platform.python_version(),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'parameters': {key: value for key, value in vars(args).items() if key != 'output'},
+        'dataset': dataset,
+        'stages': stages,
+        # The streaming run repeats the other stages, so it is reported but not added up
+        'total_seconds': round(sum(stage['seconds'] for name, stage in stages.items()
+                                   if name != 'streaming_workflow'), 4),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--files', type=int, default=20, help='sales partitions to generate (default: 20)')
+    parser.add_argument('--rows', type=int, default=20000, help='rows per partition (default: 20000)')
+    parser.add_argument('--columns', type=int, default=24, help='columns per partition (default: 24)')
+    parser.add_argument('--seed', type=int, default=0, help='random seed for the dataset')
+    parser.add_argument('--llm-latency', type=float, default=0.0, help='simulated seconds per model call')
+    parser.add_argument('--chunk-delay', type=float, default=0.0, help='simulated seconds per streamed chunk')
+    parser.add_argument('--streaming', action='store_true',
+                        help='also run the streaming workflow, where stages start before the previous agent finishes')
+    parser.add_argument('--venv-dir', help='reuse environments from this folder (default: a fresh temp folder)')
+    parser.add_argument('--isolated-venv', action='store_true',
+                        help='install pandas/numpy into the environment instead of using host packages')
+    parser.add_argument('--output', help='write the JSON report to this file instead of stdout')
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix='bench_workflow_') as work_dir:
+        report = run_benchmark(args, work_dir)
+
+    text = json.dumps(report, indent=2)
+    if args.output:
+        with open(args.output, 'w') as f:
+            f.write(text + '\n')
+    print(text)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,126 @@
+"""
+Synthetic inputs shared by the benchmarks: a sales source lake, the matching
+pipe-delimited data model and a small ETL script for it.
+"""
+import os
+from typing import Dict
+
+import numpy as np
+import pandas as pd
+
+
+SALES_COLUMNS = ['order_id', 'customer_id', 'product_id', 'order_date', 'quantity', 'amount']
+
+
+def generate_source_data(folder: str, files: int = 10, rows: int = 10000, columns: int = 12,
+                         customers: int = 1000, seed: int = 0) -> Dict[str, int]:
+    """
+    Writes partitioned sales files plus a customer file to folder.
+
+    Every sales partition has the same structure: the six sales columns followed
+    by filler attributes cycling through int, float with nulls, string and bool
+    until the requested width is reached.
+
+    Args:
+        folder: Source data folder to create
+        files: Number of sales partitions
+        rows: Rows per partition
+        columns: Columns per partition (at least the six sales columns)
+        customers: Number of customers
+        seed: Random seed
+
+    Returns:
+        Dictionary with files, rows and bytes written
+    """
+    rng = np.random.default_rng(seed)
+    os.makedirs(os.path.join(folder, 'sales'), exist_ok=True)
+    pd.DataFrame({
+        'customer_id': np.arange(customers),
+        'name': [f'customer {i}' for i in range(customers)],
+        'segment': rng.choice(['retail', 'wholesale', 'online'], customers),
+    }).to_csv(os.path.join(folder, 'customers.csv'), index=False)
+
+    for part in range(files):
+        data = {
+            'order_id': np.arange(part * rows, (part + 1) * rows),
+            'customer_id': rng.integers(0, customers, rows),
+            'product_id': rng.integers(0, 500, rows),
+            'order_date': pd.Timestamp('2024-01-01') + pd.to_timedelta(rng.integers(0, 365, rows), unit='D'),
+            'quantity': rng.integers(1, 20, rows),
+            'amount': rng.random(rows).round(2) * 100,
+        }
+        for j in range(max(0, columns - len(SALES_COLUMNS))):
+            kind = j % 4
+            if kind == 0:
+                data[f'attr_int_{j}'] = rng.integers(0, 1000, rows)
+            elif kind == 1:
+                data[f'attr_float_{j}'] = np.where(rng.random(rows) < 0.1, np.nan, rng.random(rows))
+            elif kind == 2:
+                data[f'attr_str_{j}'] = rng.choice(['alpha', 'beta', 'gamma'], rows)
+            else:
+                data[f'attr_bool_{j}'] = rng.integers(0, 2, rows).astype(bool)
+        pd.DataFrame(data).to_csv(os.path.join(folder, 'sales', f'part-{part:04d}.csv'), index=False)
+
+    total_bytes = sum(os.path.getsize(os.path.join(root, name))
+                      for root, _, names in os.walk(folder) for name in names)
+    return {'files': files + 1, 'rows': files * rows + customers, 'bytes': total_bytes}
+
+
+def data_model_text(extra_tables: int = 0) -> str:
+    """Markdown data model tables as the modeler writes them, optionally padded with extra dimensions."""
+    header = ["|Table Name|Column Name|Data Type|Description|Source|PK/FK|",
+              "|----------|-----------|---------|-----------|------|-----|"]
+    lines = ["### Fact Table Columns"] + header + [
+        "| fact_sales | sales_key | string | Surrogate key | generated | Primary Key |",
+        "| fact_sales | order_id | integer | Order number | sales.order_id | Degenerate dimension |",
+        "| fact_sales | customer_key | string | Customer | customers.customer_id | Foreign Key to dim_customer |",
+        "| fact_sales | order_date | date | Order date | sales.order_date | Attribute |",
+        "| fact_sales | quantity | integer | Units sold | sales.quantity | Measure |",
+        "| fact_sales | amount | decimal(10,2) | Sales amount | sales.amount | Measure |",
+        "",
+        "### Dimension Table Columns",
+    ] + header + [
+        "| dim_customer | customer_key | string | Surrogate key | generated | Primary Key |",
+        "| dim_customer | customer_id | integer | Business key | customers.customer_id | Attribute |",
+        "| dim_customer | name | string | Customer name | customers.name | Attribute |",
+        "| dim_customer | segment | string | Segment | customers.segment | Attribute |",
+        "| dim_customer | effective_date | date | Version start | generated | Attribute |",
+        "| dim_customer | expiration_date | date | Version end | generated | Attribute |",
+        "| dim_customer | is_current | boolean | Current version flag | generated | Attribute |",
+    ]
+    for t in range(extra_tables):
+        lines += ["", f"### Extra Dimension {t}"] + header
+        lines += [f"| dim_extra_{t} | col_{c} | string | Attribute {c} | generated | Attribute |" for c in range(20)]
+    return "\n".join(lines)
+
+
+def etl_script(source_folder: str, product_folder: str, data_model_folder: str) -> str:
+    """Small star-schema ETL over the synthetic sources on etl_runtime, standing in for generated code."""
+    return f'''import os
+
+from etl_runtime import (HashJoinLookup, PartitionedWriter, Scd2Dimension, SurrogateKeyAssigner,
+                         read_chunks, source_files, target_schema)
+
+source = {source_folder!r}
+product = {product_folder!r}
+model = {data_model_folder!r}
+state = os.path.join(product, ".etl_state")
+
+with Scd2Dimension(state, "dim_customer", ["customer_id"], ["name", "segment"],
+                   surrogate_key="customer_key") as customers:
+    for chunk in read_chunks(source_files(source, "customers.csv")):
+        customers.merge(chunk)
+    customers.write(product, schema=target_schema(model, "dim_customer"))
+
+    with HashJoinLookup(["customer_id"], "customer_key") as lookup, \\
+            SurrogateKeyAssigner(state, "fact_sales", ["order_id"]) as sales_keys, \\
+            PartitionedWriter(product, "fact_sales", schema=target_schema(model, "fact_sales")) as writer:
+        for keys in customers.current_keys():
+            lookup.add(keys)
+        columns = ["order_id", "customer_id", "order_date", "quantity", "amount"]
+        for chunk in read_chunks(source_files(source, "sales/*.csv"), columns=columns):
+            chunk = lookup.lookup(chunk, ["customer_id"], "customer_key")
+            chunk = sales_keys.assign(chunk, "sales_key")
+            writer.write(chunk[["sales_key", "order_id", "customer_key", "order_date", "quantity", "amount"]])
+        print(f"fact_sales rows: {{writer.rows_written}}")
+'''
@@ -0,0 +1,157 @@
+import asyncio
+import os
+import re
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Union
+
+from rate_limits import ModelConcurrencyLimits
+from schema_digest import digest_schemas
+from toolkit import extract_csv_schemas
+
+
+@dataclass
+class BatchCase:
+    """One business case of a batch. Output locations default to a folder per case."""
+    business_case: str
+    name: Optional[str] = None
+    data_model_output_folder: Optional[str] = None
+    generated_code_location: Optional[str] = None
+    data_product_folder: Optional[str] = None
+
+
+def _slug(text: str, max_length: int = 40) -> str:
+    return re.sub(r'[^a-z0-9]+', '_', text.lower()).strip('_')[:max_length].rstrip('_') or 'case'
+
+
+def resolve_case(case: Union[str, Dict, BatchCase], index: int, output_folder: str) -> BatchCase:
+    """Fills in the name and output locations of a case given as text, dictionary or BatchCase."""
+    if isinstance(case, str):
+        case = BatchCase(business_case=case)
+    elif isinstance(case, dict):
+        case = BatchCase(**case)
+    name = case.name or f"{index:03d}_{_slug(case.business_case)}"
+    case_folder = os.path.join(output_folder, name)
+    return BatchCase(
+        business_case=case.business_case,
+        name=name,
+        data_model_output_folder=case.data_model_output_folder or os.path.join(case_folder, 'data_model'),
+        generated_code_location=case.generated_code_location or os.path.join(case_folder, f"{name}_etl.py"),
+        data_product_folder=case.data_product_folder or os.path.join(case_folder, 'data_product'),
+    )
+
+
+def case_user_input(case: BatchCase, source_data_folder: str) -> str:
+    """Workflow request for a case, in the same form as the notebook's user_input."""
+    return f"""
+Design a data product for {case.business_case}
+
+The source data folder is : {source_data_folder}
+The output data model should be saved in: {case.data_model_output_folder}
+The generated code should be saved as: {case.generated_code_location}
+The final data product should be saved in: {case.data_product_folder}
+
+Once the data model is designed, generate the ETL code and execute it to create the data product.
+"""
+
+
+def profile_source_folder(
+    source_data_folder: str,
+    token_budget: int = 4000,
+    sample_rows: int = 100,
+    cache_path: Optional[str] = None
+) -> Dict:
+    """
+    Profiles a source folder once for all cases of a batch.
+
+    Returns:
+        Dictionary with the schema 'digest', its 'report' and the profiling time in 'seconds'
+    """
+    started = time.perf_counter()
+    schemas = extract_csv_schemas(source_data_folder, sample_rows=sample_rows, cache_path=cache_path)
+    result = digest_schemas(schemas, token_budget=token_budget)
+    return {'digest': result['digest'], 'report': result['report'], 'seconds': time.perf_counter() - started}
+
+
+async def run_batch_async(
+    business_cases: List[Union[str, Dict, BatchCase]],
+    source_data_folder: str,
+    output_folder: str,
+    max_concurrency: int = 4,
+    model_concurrency: Optional[Dict[str, int]] = None,
+    models: Optional[Dict] = None,
+    execute_code: bool = True,
+    profile_token_budget: int = 4000,
+    **agent_kwargs
+) -> Dict:
+    """
+    Runs many business cases against one source folder.
+
+    The source folder is profiled once and the schema digest is handed to every
+    case's modeler. Cases then run concurrently with run_data_workflows_async, each
+    with its own agents; model_concurrency caps how many of them use the same model
+    at a time, on top of the per-model quotas set with configure_rate_limits.
+
+    Args:
+        business_cases: Business case texts, or BatchCase objects / dictionaries with
+            explicit names and output locations
+        source_data_folder: Source folder shared by all cases
+        output_folder: Folder holding a sub folder per case for its default output locations
+        max_concurrency: Maximum number of cases in flight (default: 4)
+        model_concurrency: Mapping of model id to its maximum concurrent agent invocations,
+            typically the "batch" entry of config.json (default: no caps)
+        models: Optional model overrides passed to create_workflow_agents
+        execute_code: Whether to run the code runner step (default: True)
+        profile_token_budget: Token budget of the shared schema digest (default: 4000)
+        **agent_kwargs: Extra Agent arguments (default: callback_handler=None to avoid interleaved output)
+
+    Returns:
+        Dictionary with the shared 'profile', one entry per case in input order under 'cases'
+        (status, output locations, results, per-step timings and tokens), the 'wall_seconds'
+        of the batch, the summed 'case_seconds' and per-model 'concurrency' waits
+    """
+    import workflow
+    started = time.perf_counter()
+    cases = [resolve_case(case, index, output_folder) for index, case in enumerate(business_cases)]
+
+    print(f"**** Profiling {source_data_folder} once for {len(cases)} cases ****")
+    profile = await asyncio.to_thread(profile_source_folder, source_data_folder, profile_token_budget)
+
+    limits = ModelConcurrencyLimits(model_concurrency)
+    outputs = await workflow.run_data_workflows_async(
+        [case_user_input(case, source_data_folder) for case in cases], max_concurrency, models, execute_code,
+        source_profile=profile['digest'], concurrency_limits=limits, **agent_kwargs
+    )
+
+    results = []
+    for case, output in zip(cases, outputs):
+        result = {
+            'name': case.name,
+            'business_case': case.business_case,
+            'data_model_output_folder': case.data_model_output_folder,
+            'generated_code_location': case.generated_code_location,
+            'data_product_folder': case.data_product_folder,
+            'status': 'failed' if 'error' in output else 'success',
+            'timings': {},
+            'tokens': {},
+            **output,
+        }
+        print(f"Case {case.name}: {result['status']} in {result['seconds']}s")
+        results.append(result)
+    wall_seconds = time.perf_counter() - started
+    return {
+        'profile': {'seconds': round(profile['seconds'], 4), **{
+            key: profile['report'][key] for key in ('files', 'groups', 'digest_tokens', 'tokens_saved')
+        }},
+        'cases': results,
+        'failed': sum(result['status'] == 'failed' for result in results),
+        'wall_seconds': round(wall_seconds, 4),
+        'case_seconds': round(sum(result['seconds'] for result in results), 4),
+        'concurrency': limits.stats(),
+    }
+
+
+def run_batch(business_cases: List[Union[str, Dict, BatchCase]], source_data_folder: str, output_folder: str,
+              **kwargs) -> Dict:
+    """Blocking wrapper of run_batch_async for scripts; in a notebook, await run_batch_async instead."""
+    return asyncio.run(run_batch_async(business_cases, source_data_folder, output_folder, **kwargs))
@@ -0,0 +1,369 @@
+import math
+from typing import List, Dict, Any, Optional, Callable, Iterable, Sequence
+
+import numpy as np
+import pandas as pd
+
+
+NUMERIC_DTYPE_ORDER = ['bool', 'int64', 'float64']
+
+
+def promote_dtype(current: Optional[str], new: str) -> str:
+    """
+    Returns the dtype that can hold values of both dtypes.
+
+    Mirrors what pandas would infer if both chunks were read together:
+    bool -> int64 -> float64 for numeric columns, and object for anything mixed.
+
+    Args:
+        current: Dtype tracked so far, or None if nothing has been seen yet
+        new: Dtype inferred for the latest chunk
+
+    Returns:
+        The promoted dtype string
+    """
+    if current is None or current == new:
+        return new
+    if current in NUMERIC_DTYPE_ORDER and new in NUMERIC_DTYPE_ORDER:
+        return max(current, new, key=NUMERIC_DTYPE_ORDER.index)
+    return 'object'
+
+
+def _to_builtin(value: Any) -> Any:
+    """Converts numpy/pandas scalars to plain Python values for JSON output."""
+    if hasattr(value, 'item'):
+        return value.item()
+    if isinstance(value, pd.Timestamp):
+        return value.isoformat()
+    return value
+
+
+def _dtypes(df: pd.DataFrame) -> Dict:
+    return dict(zip(df.columns, df.dtypes.astype(str).tolist()))
+
+
+def _null_counts(df: pd.DataFrame) -> Dict:
+    return dict(zip(df.columns, df.isna().to_numpy().sum(axis=0).tolist()))
+
+
+def _unique_counts(df: pd.DataFrame) -> Dict:
+    counts = {}
+    # Numeric columns of one dtype are sorted as a single 2-D block and distinct
+    # values counted from the row-to-row differences; the rest use nunique().
+    # Extension dtypes (Int64, boolean, Float64) share the kind but hold pd.NA,
+    # which np.sort and np.isnan cannot handle
+    for dtype, cols in df.columns.groupby(df.dtypes).items():
+        if isinstance(dtype, np.dtype) and dtype.kind in 'biuf':
+            block = np.sort(df[cols].to_numpy(), axis=0)
+            valid = ~np.isnan(block) if dtype.kind == 'f' else np.ones(block.shape, dtype=bool)
+            changed = (block[1:] != block[:-1]) & valid[1:]
+            distinct = valid[:1].sum(axis=0) + changed.sum(axis=0)
+            counts.update(zip(cols, distinct.tolist()))
+        else:
+            counts.update(zip(cols, df[cols].nunique().tolist()))
+    return {col: counts[col] for col in df.columns}
+
+
+def _example_values(df: pd.DataFrame, count: int = 3) -> Dict:
+    # Mark the first `count` non-null cells of every column in one pass, then
+    # gather them column-major with a single fancy-index over the rows that hold them
+    not_null = df.notna().to_numpy()
+    wanted = not_null & (np.cumsum(not_null, axis=0) <= count)
+    rows = np.flatnonzero(wanted.any(axis=1))
+    wanted = wanted[rows]
+    col_idx, row_idx = np.nonzero(wanted.T)
+    gathered = iter(df.iloc[rows].to_numpy(dtype=object)[row_idx, col_idx].tolist())
+    per_column = wanted.sum(axis=0).tolist()
+    return {col: [next(gathered) for _ in range(n)] for col, n in zip(df.columns, per_column)}
+
+
+# Per-column statistics computed on a sampled DataFrame. Each entry maps a
+# file_schema key to a function returning {column: value} for the whole frame.
+SAMPLE_STATS: Dict[str, Callable[[pd.DataFrame], Dict]] = {
+    'dtypes': _dtypes,
+    'null_counts': _null_counts,
+    'unique_counts': _unique_counts,
+    'example_values': _example_values,
+}
+
+
+def register_sample_stat(name: str, func: Callable[[pd.DataFrame], Dict]) -> None:
+    """
+    Registers an additional per-column statistic for sampled profiles.
+
+    Args:
+        name: Key the statistic is stored under in file_schema
+        func: Function taking the sampled DataFrame and returning {column: value};
+            it should operate on the whole frame rather than column by column
+    """
+    SAMPLE_STATS[name] = func
+
+
+def profile_dataframe(df: pd.DataFrame, stats: Optional[Sequence[str]] = None) -> Dict[str, Dict]:
+    """
+    Computes per-column statistics for a DataFrame with whole-frame operations.
+
+    Args:
+        df: Sampled DataFrame
+        stats: Names of statistics from SAMPLE_STATS to compute (default: all registered)
+
+    Returns:
+        Dictionary mapping each statistic name to {column: value}
+    """
+    if stats is None:
+        stats = list(SAMPLE_STATS)
+    unknown = [name for name in stats if name not in SAMPLE_STATS]
+    if unknown:
+        raise ValueError(f"Unknown column statistics: {unknown}")
+    return {name: SAMPLE_STATS[name](df) for name in stats}
+
+
+class HyperLogLog:
+    """
+    Approximate distinct counter with mergeable registers.
+
+    Uses 2**precision registers; the standard error is about
+    1.04 / sqrt(2**precision), i.e. ~1.6% with the default precision of 12.
+    """
+
+    def __init__(self, precision: int = 12):
+        self.precision = precision
+        self.num_registers = 1 << precision
+        self.registers = np.zeros(self.num_registers, dtype=np.uint8)
+
+    def add_series(self, series: pd.Series) -> None:
+        """Adds all non-null values of a Series to the sketch."""
+        values = series.dropna()
+        if values.empty:
+            return
+        hashes = pd.util.hash_pandas_object(values, index=False).to_numpy(dtype=np.uint64)
+        value_bits = 64 - self.precision
+        index = (hashes >> np.uint64(value_bits)).astype(np.int64)
+        remainder = hashes & np.uint64((1 << value_bits) - 1)
+        # frexp gives the bit length of the remainder; rank is the position of the first 1 bit
+        _, bit_length = np.frexp(remainder.astype(np.float64))
+        rank = (value_bits - bit_length + 1).astype(np.uint8)
+        np.maximum.at(self.registers, index, rank)
+
+    def merge(self, other: "HyperLogLog") -> None:
+        """Merges another sketch with the same precision into this one."""
+        if other.precision != self.precision:
+            raise ValueError("Cannot merge HyperLogLog sketches with different precision")
+        np.maximum(self.registers, other.registers, out=self.registers)
+
+    def count(self) -> int:
+        """Returns the estimated number of distinct values."""
+        m = self.num_registers
+        alpha = 0.7213 / (1 + 1.079 / m)
+        estimate = alpha * m * m / np.sum(np.power(2.0, -self.registers.astype(np.float64)))
+        zeros = int(np.count_nonzero(self.registers == 0))
+        # Linear counting is more accurate for small cardinalities
+        if estimate <= 2.5 * m and zeros:
+            estimate = m * math.log(m / zeros)
+        return int(round(estimate))
+
+
+class ReservoirSample:
+    """Uniform fixed-size sample over a stream of values (Algorithm R)."""
+
+    def __init__(self, size: int = 3, seed: Optional[int] = 0):
+        self.size = size
+        self.seen = 0
+        self.values: List[Any] = []
+        self.rng = np.random.default_rng(seed)
+
+    def add_series(self, series: pd.Series) -> None:
+        """Offers all non-null values of a Series to the reservoir."""
+        values = series.dropna().tolist()
+        if not values:
+            return
+
+        # Fill the reservoir first
+        fill = min(self.size - len(self.values), len(values))
+        if fill > 0:
+            self.values.extend(values[:fill])
+        self.seen += fill
+        rest = values[fill:]
+        if not rest:
+            return
+
+        # Item at stream position n (1-based) is kept with probability size / n;
+        # draw all acceptance tests for the chunk at once and only loop over hits
+        positions = self.seen + np.arange(1, len(rest) + 1)
+        accepted = np.flatnonzero(self.rng.random(len(rest)) < self.size / positions)
+        for i in accepted:
+            self.values[self.rng.integers(self.size)] = rest[i]
+        self.seen += len(rest)
+
+    def merge(self, other: "ReservoirSample") -> None:
+        """Merges another reservoir, weighting each side by how many values it saw."""
+        total = self.seen + other.seen
+        if total == 0:
+            return
+        pool = [(v, self.seen) for v in self.values] + [(v, other.seen) for v in other.values]
+        weights = np.array([w for _, w in pool], dtype=np.float64)
+        take = min(self.size, len(pool))
+        chosen = self.rng.choice(len(pool), size=take, replace=False, p=weights / weights.sum())
+        self.values = [pool[i][0] for i in sorted(chosen)]
+        self.seen = total
+
+
+class ColumnAccumulator:
+    """
+    Mergeable statistics for one column, updated chunk by chunk.
+
+    Chunks of one column can be read with different dtypes, e.g. int64 and then
+    float64 once a chunk holds a fraction. Values are hashed and compared as the
+    whole file would be read: numbers as float64 for the distinct count, so 1
+    and 1.0 are one value, and the range in the promoted dtype, with text once
+    the column is mixed.
+    """
+
+    def __init__(self, hll_precision: int = 12, sample_size: int = 3, seed: Optional[int] = 0):
+        self.dtype: Optional[str] = None
+        self.null_count = 0
+        self.min_value: Any = None
+        self.max_value: Any = None
+        # False once values turned out not to be orderable, e.g. an unordered categorical from Parquet
+        self.comparable = True
+        self.distinct = HyperLogLog(hll_precision)
+        self.examples = ReservoirSample(sample_size, seed)
+
+    def update(self, series: pd.Series) -> None:
+        """Folds one chunk of the column into the accumulator."""
+        nulls = int(series.isna().sum())
+        self.null_count += nulls
+        # An all-null chunk says nothing about the real type of the column
+        if nulls == len(series):
+            return
+
+        self.dtype = promote_dtype(self.dtype, str(series.dtype))
+        values = series.dropna()
+        if values.dtype == object and pd.api.types.infer_dtype(values, skipna=False) != 'string':
+            # Mixed Python types, e.g. from JSON lines; a CSV column like that is read as text
+            values = values.astype(str)
+        self.distinct.add_series(values.astype(np.float64) if values.dtype.kind in 'biuf' else values)
+        self.examples.add_series(series)
+        try:
+            self._update_range(values.min(), values.max())
+        except TypeError:
+            self._update_range(None, None)
+
+    def _as_dtype(self, value: Any) -> Any:
+        """A min or max value as the promoted column dtype holds it."""
+        if value is None:
+            return None
+        if self.dtype == 'object':
+            return value if isinstance(value, str) else str(value)
+        if self.dtype in NUMERIC_DTYPE_ORDER:
+            return {'bool': bool, 'int64': int, 'float64': float}[self.dtype](value)
+        return value
+
+    def _update_range(self, chunk_min: Any, chunk_max: Any) -> None:
+        """Widens the range by a chunk range; None for values that cannot be ordered."""
+        if not self.comparable:
+            return
+        if chunk_min is None:
+            self.comparable = False
+            self.min_value = self.max_value = None
+            return
+        chunk_min, chunk_max = self._as_dtype(chunk_min), self._as_dtype(chunk_max)
+        current_min, current_max = self._as_dtype(self.min_value), self._as_dtype(self.max_value)
+        try:
+            self.min_value = chunk_min if current_min is None or chunk_min < current_min else current_min
+            self.max_value = chunk_max if current_max is None or chunk_max > current_max else current_max
+        except TypeError:
+            self.comparable = False
+            self.min_value = self.max_value = None
+
+    def merge(self, other: "ColumnAccumulator") -> None:
+        """Merges the accumulator of another chunk range of the same column."""
+        self.null_count += other.null_count
+        if other.dtype is None:
+            return
+        self.dtype = promote_dtype(self.dtype, other.dtype)
+        self.distinct.merge(other.distinct)
+        self.examples.merge(other.examples)
+        if other.comparable:
+            self._update_range(other.min_value, other.max_value)
+        else:
+            self._update_range(None, None)
+
+
+class FileProfileAccumulator:
+    """Mergeable whole-file profile built from a stream of DataFrame chunks."""
+
+    def __init__(self, hll_precision: int = 12, sample_size: int = 3, seed: Optional[int] = 0):
+        self.hll_precision = hll_precision
+        self.sample_size = sample_size
+        self.seed = seed
+        self.row_count = 0
+        self.columns: Dict[Any, ColumnAccumulator] = {}
+
+    def _column(self, name: Any) -> ColumnAccumulator:
+        if name not in self.columns:
+            self.columns[name] = ColumnAccumulator(self.hll_precision, self.sample_size, self.seed)
+        return self.columns[name]
+
+    def update(self, chunk: pd.DataFrame) -> None:
+        """Folds one DataFrame chunk into the profile."""
+        self.row_count += len(chunk)
+        for col in chunk.columns:
+            self._column(col).update(chunk[col])
+
+    def merge(self, other: "FileProfileAccumulator") -> None:
+        """Merges a profile built over another part of the same file."""
+        self.row_count += other.row_count
+        for name, acc in other.columns.items():
+            self._column(name).merge(acc)
+
+    def to_file_schema(self, file_path: str) -> Dict:
+        """
+        Builds a file_schema dictionary compatible with extract_csv_schemas.
+
+        Args:
+            file_path: Full path of the profiled file
+
+        Returns:
+            Schema information dictionary with whole-file statistics
+        """
+        columns = list(self.columns)
+        return {
+            'file_path': file_path,
+            'columns': columns,
+            'num_columns': len(columns),
+            # Columns that were null in every chunk are reported as pandas would read them
+            'dtypes': {col: acc.dtype or 'float64' for col, acc in self.columns.items()},
+            'sample_size': self.row_count,
+            'has_header': True,  # Assuming all CSVs have headers
+            'null_counts': {col: acc.null_count for col, acc in self.columns.items()},
+            'unique_counts': {col: min(acc.distinct.count(), self.row_count - acc.null_count)
+                              for col, acc in self.columns.items()},
+            'example_values': {col: [_to_builtin(v) for v in acc.examples.values]
+                               for col, acc in self.columns.items()},
+            'min_values': {col: _to_builtin(acc.min_value) for col, acc in self.columns.items()},
+            'max_values': {col: _to_builtin(acc.max_value) for col, acc in self.columns.items()},
+            'row_count': self.row_count,
+            'profile_mode': 'full_scan',
+            'unique_counts_approximate': True
+        }
+
+
+def profile_chunks(file_path: str, chunks: Iterable[pd.DataFrame]) -> Dict:
+    """
+    Folds a stream of DataFrame chunks into whole-file column statistics.
+
+    Memory use is bounded by the chunk size plus a fixed-size sketch per column,
+    so multi-GB files can be profiled without loading them whole.
+
+    Args:
+        file_path: Full path of the profiled file
+        chunks: DataFrame chunks covering the whole file, e.g. from readers.iter_chunks
+
+    Returns:
+        Schema information dictionary with whole-file statistics
+    """
+    profile = FileProfileAccumulator()
+    for chunk in chunks:
+        profile.update(chunk)
+    return profile.to_file_schema(file_path)
@@ -0,0 +1,404 @@
+"""
+Validation of a written data product against its data model.
+
+inspect_data_product compares tables, columns and types using footers and
+headers only. This module adds the checks that need the data itself:
+
+- primary key uniqueness and completeness
+- referential integrity of foreign keys, e.g. fact rows pointing to dimension keys
+- Type 2 slowly changing dimension consistency: one current version per business
+  key, open expiration dates only on current versions, effective <= expiration
+
+Only the key, flag and date columns are read. Tables are streamed in record
+batches with pyarrow datasets, several tables at a time, and key values are
+kept as sorted 64-bit hashes (pandas' SipHash of the values as text), so the
+memory needed is 8 bytes per key and not the size of the values. Two distinct
+keys share a hash with probability 2**-64, so among n keys a false match,
+which would hide a duplicate or a missing reference, has a chance of about
+n**2 / 2**65: around 3e-8 for a million keys and 3e-4 for 100 million.
+Requires pyarrow; without it only the inspect_data_product checks run.
+"""
+import os
+import re
+import time
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass, field
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+from lazy_imports import lazy_module
+from output_formats import _table_files, inspect_data_product, parse_data_model_columns
+
+try:
+    import pyarrow as pa
+    import pyarrow.compute as pc
+    import pyarrow.csv as pacsv
+    import pyarrow.dataset as ds
+except ImportError:  # pragma: no cover - exercised only without the arrow extra
+    pa = None
+
+
+pd = lazy_module('pandas')
+
+BATCH_ROWS = 256 * 1024
+
+PRIMARY_KEY = re.compile(r'\b(primary key|pk)\b', re.IGNORECASE)
+FOREIGN_KEY = re.compile(r'\b(?:foreign key|fk)\b', re.IGNORECASE)
+FOREIGN_KEY_TARGET = re.compile(
+    r'\b(?:foreign key|fk)\b\s*(?:to|references?|->|:)?\s*(?:the\s+)?[`"\']?([A-Za-z_][\w.]*)', re.IGNORECASE)
+BUSINESS_KEY = re.compile(r'\b(business|natural)\s+key\b', re.IGNORECASE)
+CURRENT_FLAG = re.compile(r'^(is_)?(current|active)(_(flag|record|ind|indicator|version))?$', re.IGNORECASE)
+EFFECTIVE_DATE = re.compile(r'effective|valid_from|start_date|begin_date', re.IGNORECASE)
+EXPIRATION_DATE = re.compile(r'expir|valid_to|end_date', re.IGNORECASE)
+
+TRUE_VALUES = {'true', '1', 'y', 'yes', 't'}
+FALSE_VALUES = {'false', '0', 'n', 'no', 'f'}
+# Open-ended versions expire on 9999-12-31 (etl_runtime.OPEN_END_DATE) or have no expiration date
+OPEN_END_PREFIX = '9999'
+
+
+@dataclass
+class ScdRule:
+    """Columns of a Type 2 dimension, found by name in the data model."""
+    current_flag: str
+    business_key: List[str] = field(default_factory=list)
+    effective_date: Optional[str] = None
+    expiration_date: Optional[str] = None
+
+
+@dataclass
+class TableRules:
+    """Key constraints of one data model table."""
+    primary_key: List[str] = field(default_factory=list)
+    # Foreign key column -> (referenced table, referenced column)
+    foreign_keys: Dict[str, Tuple[str, str]] = field(default_factory=dict)
+    scd: Optional[ScdRule] = None
+    # Columns other tables reference, whose distinct values are collected
+    referenced: List[str] = field(default_factory=list)
+
+    def columns(self) -> List[str]:
+        names = self.primary_key + list(self.foreign_keys) + self.referenced
+        if self.scd:
+            names += [self.scd.current_flag, *self.scd.business_key]
+            names += [name for name in (self.scd.effective_date, self.scd.expiration_date) if name]
+        return list(dict.fromkeys(names))
+
+
+def table_rules(data_model_folder: str) -> Tuple[Dict[str, TableRules], List[str]]:
+    """
+    Derives key constraints from the PK/FK and Description columns of the data model.
+
+    Foreign keys are resolved from text such as "Foreign Key to dim_customer" to the
+    primary key of the referenced table. A table with a current flag column
+    (is_current, current_flag, ...) is checked as a Type 2 dimension; its business
+    key is the column described as business or natural key.
+
+    Returns:
+        The rules per table and notes on constraints that could not be resolved
+    """
+    specs = parse_data_model_columns(data_model_folder)
+    tables = {name.lower(): name for name in specs}
+    rules: Dict[str, TableRules] = {}
+    for table, columns in specs.items():
+        rule = rules[table] = TableRules()
+        for spec in columns:
+            if PRIMARY_KEY.search(spec['key']) and not FOREIGN_KEY.search(spec['key']):
+                rule.primary_key.append(spec['column'])
+        flags = [spec['column'] for spec in columns if CURRENT_FLAG.match(spec['column'])]
+        if flags:
+            names = [spec['column'] for spec in columns]
+            rule.scd = ScdRule(
+                current_flag=flags[0],
+                business_key=[spec['column'] for spec in columns
+                              if BUSINESS_KEY.search(spec['description']) or BUSINESS_KEY.search(spec['key'])],
+                effective_date=next((name for name in names if EFFECTIVE_DATE.search(name)), None),
+                expiration_date=next((name for name in names if EXPIRATION_DATE.search(name)), None),
+            )
+
+    notes = []
+    for table, columns in specs.items():
+        for spec in columns:
+            if not FOREIGN_KEY.search(spec['key']):
+                continue
+            match = FOREIGN_KEY_TARGET.search(spec['key'])
+            target, _, target_column = (match.group(1) if match else '').partition('.')
+            target = tables.get(target.lower())
+            if target is None:
+                # "FK" without a usable table name: the table whose primary key has the same name
+                target = next((name for name, rule in rules.items()
+                               if name != table and rule.primary_key == [spec['column']]), None)
+            if target is None:
+                notes.append(f"{table}.{spec['column']}: referenced table of '{spec['key']}' not in the data model")
+                continue
+            if not target_column:
+                target_pk = rules[target].primary_key
+                target_names = [other['column'] for other in specs[target]]
+                target_column = target_pk[0] if len(target_pk) == 1 else (
+                    spec['column'] if spec['column'] in target_names else '')
+            if not target_column:
+                notes.append(f"{table}.{spec['column']}: no single key column to check in {target}")
+                continue
+            rules[table].foreign_keys[spec['column']] = (target, target_column)
+            if target_column not in rules[target].referenced:
+                rules[target].referenced.append(target_column)
+    return rules, notes
+
+
+# Integral values written as floats, e.g. "3.0" by pandas for an integer column with nulls
+_INTEGRAL_FLOAT = r'^(-?[0-9]+)\.0+$'
+
+
+def _as_string(column: "pa.Array") -> "pa.Array":
+    """
+    Key values as text, so an integer key in Parquet matches the same key in a CSV table.
+
+    Integral floats lose their fraction, so 3.0 and "3.0" match the integer key 3.
+    """
+    if pa.types.is_dictionary(column.type):
+        column = column.dictionary_decode()
+    if pa.types.is_floating(column.type):
+        integral = pc.and_(pc.equal(pc.floor(column), column), pc.less(pc.abs(column), 2.0 ** 63))
+        as_integer = pc.cast(pc.cast(pc.if_else(integral, column, 0.0), pa.int64()), pa.large_string())
+        return pc.if_else(integral, as_integer, pc.cast(column, pa.large_string()))
+    return pc.replace_substring_regex(pc.cast(column, pa.large_string()), _INTEGRAL_FLOAT, r'\1')
+
+
+def _hash_strings(column: "pa.Array") -> np.ndarray:
+    """64-bit hash of each value of a string array; callers drop null values first."""
+    return pd.util.hash_array(column.to_numpy(zero_copy_only=False))
+
+
+def _hash_columns(columns: List["pa.Array"]) -> np.ndarray:
+    """64-bit hash of each row of several string arrays, e.g. a composite key."""
+    frame = pd.DataFrame({i: column.to_numpy(zero_copy_only=False) for i, column in enumerate(columns)})
+    return pd.util.hash_pandas_object(frame, index=False).to_numpy()
+
+
+def _sorted_unique(hashes: np.ndarray) -> np.ndarray:
+    hashes = np.sort(hashes)
+    return hashes[np.concatenate([[True], hashes[1:] != hashes[:-1]])] if len(hashes) else hashes
+
+
+def _unique(chunks: List[np.ndarray]) -> np.ndarray:
+    return _sorted_unique(np.concatenate(chunks)) if chunks else np.empty(0, dtype=np.uint64)
+
+
+def _missing(values: np.ndarray, keys: np.ndarray) -> int:
+    """Number of values (sorted unique hashes) not in keys (sorted unique hashes)."""
+    if not len(keys):
+        return int(len(values))
+    positions = np.minimum(np.searchsorted(keys, values), len(keys) - 1)
+    return int((keys[positions] != values).sum())
+
+
+def _duplicates(chunks: List[np.ndarray]) -> Tuple[int, int]:
+    """Number of key values occurring more than once and the extra rows they account for."""
+    if not chunks:
+        return 0, 0
+    hashes = np.sort(np.concatenate(chunks))
+    repeated = hashes[1:] == hashes[:-1]
+    first_repeats = repeated & ~np.concatenate([[False], repeated[:-1]])
+    return int(first_repeats.sum()), int(repeated.sum())
+
+
+def _count(mask: "pa.Array") -> int:
+    return int(pc.sum(pc.fill_null(mask, False)).as_py() or 0)
+
+
+def _dataset(files: List[str], table_dir: Optional[str], columns: List[str]) -> "ds.Dataset":
+    parquet = [path for path in files if path.endswith('.parquet')]
+    if parquet:
+        files, file_format = parquet, 'parquet'
+    else:
+        file_format = ds.CsvFileFormat(convert_options=pacsv.ConvertOptions(
+            column_types={column: pa.string() for column in columns}, strings_can_be_null=True))
+    if table_dir:
+        return ds.dataset(files, format=file_format, partition_base_dir=table_dir,
+                          partitioning=ds.HivePartitioning.discover(infer_dictionary=False))
+    return ds.dataset(files, format=file_format)
+
+
+def scan_table(files: List[str], table_dir: Optional[str], rule: TableRules) -> Dict[str, Any]:
+    """
+    Streams the key columns of one table and collects hashed key sets and SCD counts.
+
+    Returns:
+        Dictionary with the row count, the columns missing from the files and the raw
+        hash chunks and counters used by validate_data_product
+    """
+    started = time.perf_counter()
+    wanted = rule.columns()
+    dataset = _dataset(files, table_dir, wanted)
+    present = [column for column in wanted if column in dataset.schema.names]
+    primary_key = rule.primary_key if all(column in present for column in rule.primary_key) else []
+    scd = rule.scd if rule.scd and rule.scd.current_flag in present else None
+    business_key = [column for column in scd.business_key if column in present] if scd else []
+    stats = {
+        'rows': 0, 'missing_columns': [column for column in wanted if column not in present],
+        'pk_hashes': [], 'pk_null_rows': 0,
+        'fk_hashes': {column: [] for column in rule.foreign_keys if column in present},
+        'fk_null_rows': {column: 0 for column in rule.foreign_keys if column in present},
+        'referenced': {column: [] for column in rule.referenced if column in present},
+        'scd': None,
+    }
+    if scd:
+        stats['scd'] = {'current_keys': [], 'keys': [], 'invalid_flags': 0, 'current_rows': 0,
+                        'current_closed': 0, 'history_open': 0, 'effective_after_expiration': 0}
+        true_values, false_values = pa.array(sorted(TRUE_VALUES)), pa.array(sorted(FALSE_VALUES))
+
+    for batch in dataset.to_batches(columns=present, batch_size=BATCH_ROWS):
+        if not batch.num_rows:
+            continue
+        columns = {column: _as_string(batch.column(column)) for column in present}
+        stats['rows'] += batch.num_rows
+        if primary_key:
+            valid = columns[primary_key[0]].is_valid()
+            for column in primary_key[1:]:
+                valid = pc.and_(valid, columns[column].is_valid())
+            stats['pk_null_rows'] += batch.num_rows - _count(valid)
+            stats['pk_hashes'].append(_hash_columns([columns[column].filter(valid) for column in primary_key]))
+        for column in stats['fk_hashes']:
+            stats['fk_null_rows'][column] += columns[column].null_count
+            stats['fk_hashes'][column].append(_sorted_unique(_hash_strings(columns[column].drop_null())))
+        for column in stats['referenced']:
+            stats['referenced'][column].append(_sorted_unique(_hash_strings(columns[column].drop_null())))
+        if scd:
+            counts = stats['scd']
+            flags = pc.utf8_lower(pc.utf8_trim_whitespace(columns[scd.current_flag]))
+            current = pc.fill_null(pc.is_in(flags, value_set=true_values), False)
+            history = pc.fill_null(pc.is_in(flags, value_set=false_values), False)
+            counts['current_rows'] += _count(current)
+            counts['invalid_flags'] += batch.num_rows - _count(current) - _count(history)
+            if business_key:
+                keys = [columns[column] for column in business_key]
+                counts['keys'].append(_sorted_unique(_hash_columns(keys)))
+                counts['current_keys'].append(_hash_columns([key.filter(current) for key in keys]))
+            if scd.expiration_date in present:
+                expiration = columns[scd.expiration_date]
+                open_end = pc.or_kleene(expiration.is_null(), pc.starts_with(expiration, OPEN_END_PREFIX))
+                counts['current_closed'] += _count(pc.and_(current, pc.invert(open_end)))
+                counts['history_open'] += _count(pc.and_(history, open_end))
+                if scd.effective_date in present:
+                    counts['effective_after_expiration'] += _count(
+                        pc.greater(columns[scd.effective_date], expiration))
+    stats['seconds'] = time.perf_counter() - started
+    return stats
+
+
+def validate_data_product(
+    data_product_folder: str,
+    data_model_output_folder: str,
+    max_workers: Optional[int] = None
+) -> Dict[str, Any]:
+    """
+    Checks a data product against its data model: structure, keys and SCD history.
+
+    The structural checks of inspect_data_product run first. The tables are then
+    streamed in parallel, one table per worker, and checked for primary key
+    uniqueness, foreign keys that have no matching key in the referenced table and
+    Type 2 dimension consistency.
+
+    Args:
+        data_product_folder: Folder the generated code wrote the tables to
+        data_model_output_folder: Folder with the data model CSVs
+        max_workers: Tables scanned at the same time (default: one per table, up to the CPU count)
+
+    Returns:
+        The inspect_data_product result, with the key checks of each table under 'checks',
+        constraints that could not be checked under 'skipped', the key check problems
+        added to 'problems', and the validation time in 'seconds'
+    """
+    started = time.perf_counter()
+    result = inspect_data_product(data_product_folder, data_model_output_folder)
+    result['skipped'] = []
+    if not os.path.isdir(data_product_folder):
+        result['seconds'] = round(time.perf_counter() - started, 4)
+        return result
+    if pa is None:
+        result['skipped'].append("pyarrow is not installed: key and SCD checks skipped")
+        result['seconds'] = round(time.perf_counter() - started, 4)
+        return result
+
+    rules, notes = table_rules(data_model_output_folder)
+    result['skipped'] += notes
+    files = _table_files(data_product_folder)
+    tables = [table for table in rules if table in files and rules[table].columns()]
+
+    def scan(table: str) -> Dict[str, Any]:
+        table_dir = os.path.join(data_product_folder, table)
+        return scan_table(files[table], table_dir if os.path.isdir(table_dir) else None, rules[table])
+
+    workers = max_workers or min(len(tables), os.cpu_count() or 1) or 1
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        scans = dict(zip(tables, executor.map(scan, tables)))
+
+    problems = result['problems']
+    for table, stats in scans.items():
+        rule = rules[table]
+        checks = {'rows': stats['rows'], 'seconds': round(stats['seconds'], 4)}
+        if rule.primary_key and not any(column in stats['missing_columns'] for column in rule.primary_key):
+            duplicate_keys, duplicate_rows = _duplicates(stats['pk_hashes'])
+            checks['primary_key'] = {'columns': rule.primary_key, 'duplicate_keys': duplicate_keys,
+                                     'duplicate_rows': duplicate_rows, 'null_rows': stats['pk_null_rows']}
+            if duplicate_keys:
+                problems.append(f"{table}: {duplicate_keys} primary key values {rule.primary_key} occur more "
+                                f"than once ({duplicate_rows} extra rows)")
+            if stats['pk_null_rows']:
+                problems.append(f"{table}: {stats['pk_null_rows']} rows with an empty primary key {rule.primary_key}")
+        elif not rule.primary_key:
+            result['skipped'].append(f"{table}: no primary key in the data model")
+
+        foreign_keys = {}
+        for column, (target, target_column) in rule.foreign_keys.items():
+            if column not in stats['fk_hashes']:
+                continue
+            if target not in scans or target_column not in scans[target]['referenced']:
+                result['skipped'].append(f"{table}.{column}: {target}.{target_column} not written, "
+                                         f"foreign key not checked")
+                continue
+            values = _unique(stats['fk_hashes'][column])
+            missing = _missing(values, _unique(scans[target]['referenced'][target_column]))
+            null_rows = stats['fk_null_rows'][column]
+            foreign_keys[column] = {'references': f"{target}.{target_column}", 'distinct_values': int(len(values)),
+                                    'missing_keys': missing, 'null_rows': null_rows}
+            if missing:
+                problems.append(f"{table}.{column}: {missing} distinct values have no matching "
+                                f"{target}.{target_column}")
+            if null_rows:
+                problems.append(f"{table}.{column}: {null_rows} rows without a {target} reference")
+        if foreign_keys:
+            checks['foreign_keys'] = foreign_keys
+
+        if rule.scd and stats['scd'] is None:
+            result['skipped'].append(f"{table}: current flag {rule.scd.current_flag} not written, SCD not checked")
+        elif stats['scd'] is not None:
+            counts = stats['scd']
+            scd = {'current_flag': rule.scd.current_flag, 'business_key': rule.scd.business_key,
+                   'current_rows': counts['current_rows'], 'invalid_flags': counts['invalid_flags'],
+                   'current_closed': counts['current_closed'], 'history_open': counts['history_open'],
+                   'effective_after_expiration': counts['effective_after_expiration']}
+            if counts['keys']:
+                keys = _unique(counts['keys'])
+                scd['business_keys'] = int(len(keys))
+                scd['keys_with_several_current'] = _duplicates(counts['current_keys'])[0]
+                scd['keys_without_current'] = _missing(keys, _unique(counts['current_keys']))
+            else:
+                result['skipped'].append(f"{table}: no business key column found (describe it as 'Business key'), "
+                                         f"current versions per key not checked")
+            checks['scd'] = scd
+            messages = {
+                'invalid_flags': f"rows with a {rule.scd.current_flag} value that is not a boolean",
+                'keys_with_several_current': f"business keys {rule.scd.business_key} with several current versions",
+                'keys_without_current': f"business keys {rule.scd.business_key} without a current version",
+                'current_closed': f"current versions with a closed {rule.scd.expiration_date}",
+                'history_open': f"historical versions with an open {rule.scd.expiration_date}",
+                'effective_after_expiration': f"versions with {rule.scd.effective_date} after "
+                                              f"{rule.scd.expiration_date}",
+            }
+            problems += [f"{table}: {scd[key]} {message}" for key, message in messages.items() if scd.get(key)]
+        result['tables'][table]['checks'] = checks
+
+    result['status'] = 'failed' if problems else 'ok'
+    result['seconds'] = round(time.perf_counter() - started, 4)
+    return result
@@ -0,0 +1,598 @@
+"""
+Out-of-core building blocks for generated star-schema ETL code.
+
+Generated scripts import this module (the code runner puts this folder on
+PYTHONPATH) so that they process sources chunk by chunk instead of loading
+whole files into memory:
+
+    from etl_runtime import (source_files, read_chunks, SurrogateKeyAssigner,
+                             Scd2Dimension, HashJoinLookup, PartitionedWriter)
+
+    with SurrogateKeyAssigner(state_dir, "dim_product", ["product_id"]) as product_keys, \\
+         PartitionedWriter(product_folder, "fact_sales", partition_cols=["order_year"]) as fact_writer:
+        for chunk in read_chunks(source_files(source_folder, "sales/*.csv"), chunksize=200000):
+            chunk = product_keys.assign(chunk, "product_key")
+            fact_writer.write(chunk)
+
+Only pandas and the standard library are needed (pyarrow for Parquet output);
+state that must outlive a chunk (surrogate keys, dimension versions, spilled
+join partitions) is kept on disk.
+"""
+import fnmatch
+import hashlib
+import json
+import os
+import pickle
+import shutil
+import sqlite3
+import tempfile
+import uuid
+from datetime import date
+from typing import Dict, Iterable, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from output_formats import (OUTPUT_FORMAT_ENV, OUTPUT_FORMATS, PARQUET_COMPRESSION_ENV, cast_to_schema,
+                            load_target_schemas, pa, pq)
+from readers import detect_format, iter_chunks, list_source_files
+
+
+# Set by incremental runs to the JSON list of new source files
+SOURCE_FILES_ENV = "DATA_PRODUCT_SOURCE_FILES"
+
+OPEN_END_DATE = '9999-12-31'
+
+# Text of an integral float such as "3.0", normalized to "3" in business keys
+_INTEGRAL_FLOAT = r'^(-?[0-9]+)\.0+$'
+
+
+def is_incremental() -> bool:
+    """True when the run should only process the files listed in DATA_PRODUCT_SOURCE_FILES."""
+    return bool(os.environ.get(SOURCE_FILES_ENV))
+
+
+def source_files(source_folder: str, pattern: Optional[str] = None) -> List[str]:
+    """
+    Lists the source files this run has to process.
+
+    Args:
+        source_folder: Source data folder
+        pattern: Optional glob on the path relative to source_folder, e.g. "sales/*.csv"
+
+    Returns:
+        The files from DATA_PRODUCT_SOURCE_FILES in incremental runs, otherwise
+        every supported file under source_folder, sorted
+    """
+    if is_incremental():
+        # A path prefix would also match sibling folders such as "data-old" for "data"
+        folder = os.path.join(os.path.abspath(source_folder), '')
+        paths = [path for path in json.loads(os.environ[SOURCE_FILES_ENV])
+                 if os.path.abspath(path).startswith(folder)]
+    else:
+        paths = list_source_files(source_folder)
+    if pattern:
+        paths = [path for path in paths if fnmatch.fnmatch(os.path.relpath(path, source_folder), pattern)]
+    return paths
+
+
+def read_chunks(
+    paths: Union[str, Sequence[str]],
+    chunksize: int = 100000,
+    columns: Optional[List[str]] = None,
+    encoding: str = 'utf-8',
+    csv_kwargs: Optional[Dict] = None
+) -> Iterator[pd.DataFrame]:
+    """
+    Streams CSV (plain or compressed), JSONL or Parquet files as DataFrame chunks.
+
+    Args:
+        paths: A file, a folder (all of its source files) or a list of files
+        chunksize: Rows per chunk (default: 100000)
+        columns: Only keep these columns; CSV files skip parsing the others
+        encoding: Character encoding of text files (default: 'utf-8')
+        csv_kwargs: Additional keyword arguments to pass to pd.read_csv, e.g. dtype
+
+    Yields:
+        DataFrame chunks, file by file
+    """
+    if isinstance(paths, str):
+        paths = source_files(paths) if os.path.isdir(paths) else [paths]
+    for path in paths:
+        kwargs = dict(csv_kwargs or {})
+        if columns and detect_format(path) and detect_format(path)[0] == 'csv':
+            kwargs.setdefault('usecols', columns)
+        for chunk in iter_chunks(path, chunksize, encoding, kwargs):
+            yield chunk[columns] if columns else chunk
+
+
+def _key_text(values: pd.Series) -> pd.Series:
+    """
+    One key column as text, null where the value is missing.
+
+    Integral floats lose their fraction, so the key 3 reads the same from an
+    int64 chunk and from a float64 chunk that also holds missing values.
+    """
+    if pd.api.types.is_float_dtype(values):
+        integral = values.notna() & (np.floor(values) == values) & (values.abs() < 2.0 ** 63)
+        text = values.astype(object).astype(str)
+        text[integral] = values[integral].astype('int64').astype(str)
+    else:
+        text = values.astype(str).str.replace(_INTEGRAL_FLOAT, r'\1', regex=True)
+    return text.where(values.notna())
+
+
+def _key_strings(df: pd.DataFrame, key_columns: Sequence[str]) -> pd.Series:
+    """
+    Business keys as single strings, so composite keys can be stored and joined.
+
+    Rows with a missing key value get a null key, which is never assigned or matched.
+    """
+    if len(key_columns) == 1:
+        return _key_text(df[key_columns[0]])
+    parts = [_key_text(df[column]) for column in key_columns]
+    missing = pd.concat([part.isna() for part in parts], axis=1).any(axis=1)
+    keys = parts[0].fillna('')
+    for part in parts[1:]:
+        keys = keys + '\x1f' + part.fillna('')
+    return keys.where(~missing)
+
+
+class SurrogateKeyAssigner:
+    """
+    Assigns stable surrogate keys to business keys across chunks and runs.
+
+    The business key -> surrogate key map lives in SQLite under state_dir, so a
+    key handed out in one chunk (or an earlier incremental run) is reused for
+    the same business key later. Keys are uuid4 strings by default or an
+    increasing integer sequence.
+    """
+
+    def __init__(self, state_dir: str, table: str, key_columns: Sequence[str], key_type: str = 'uuid4'):
+        if key_type not in ('uuid4', 'sequence'):
+            raise ValueError(f"Unknown key_type '{key_type}', expected 'uuid4' or 'sequence'")
+        os.makedirs(state_dir, exist_ok=True)
+        self.key_columns = list(key_columns)
+        self.key_type = key_type
+        self.conn = sqlite3.connect(os.path.join(state_dir, f"{table}_keys.db"))
+        self.conn.execute(
+            "CREATE TABLE IF NOT EXISTS surrogate_keys (business_key TEXT PRIMARY KEY, surrogate_key TEXT NOT NULL)"
+        )
+
+    def _new_keys(self, count: int) -> List[str]:
+        if self.key_type == 'uuid4':
+            return [str(uuid.uuid4()) for _ in range(count)]
+        start = self.conn.execute("SELECT COUNT(*) FROM surrogate_keys").fetchone()[0] + 1
+        return [str(i) for i in range(start, start + count)]
+
+    def assign(self, df: pd.DataFrame, key_column: str) -> pd.DataFrame:
+        """
+        Adds key_column with the surrogate key of each row's business key.
+
+        Rows with a missing business key value get a null surrogate key.
+
+        Args:
+            df: Chunk containing the business key columns
+            key_column: Name of the surrogate key column to add
+
+        Returns:
+            The chunk with the surrogate key column
+        """
+        business_keys = _key_strings(df, self.key_columns)
+        unique_keys = business_keys.dropna().unique().tolist()
+        mapping = self.lookup(unique_keys)
+        missing = [key for key in unique_keys if key not in mapping]
+        if missing:
+            new_keys = self._new_keys(len(missing))
+            self.conn.executemany("INSERT INTO surrogate_keys VALUES (?, ?)", zip(missing, new_keys))
+            self.conn.commit()
+            mapping.update(zip(missing, new_keys))
+        df = df.copy()
+        df[key_column] = business_keys.map(mapping).to_numpy()
+        if self.key_type == 'sequence':
+            df[key_column] = df[key_column].astype('int64' if business_keys.notna().all() else 'Int64')
+        return df
+
+    def lookup(self, business_keys: Iterable[str]) -> Dict[str, str]:
+        """Returns the known surrogate keys of the given business key strings."""
+        mapping = {}
+        keys = list(business_keys)
+        # Stay below SQLite's bound-parameter limit
+        for start in range(0, len(keys), 900):
+            batch = keys[start:start + 900]
+            placeholders = ",".join("?" * len(batch))
+            mapping.update(self.conn.execute(
+                f"SELECT business_key, surrogate_key FROM surrogate_keys WHERE business_key IN ({placeholders})",
+                batch
+            ).fetchall())
+        return mapping
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "SurrogateKeyAssigner":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class Scd2Dimension:
+    """
+    Type 2 slowly changing dimension maintained incrementally in SQLite.
+
+    merge() compares each incoming row with the current version of its business
+    key using a hash of the tracked columns: new keys get a first version,
+    changed rows expire the current version and get a new one with a fresh
+    uuid4 surrogate key, unchanged rows are skipped. Chunks of any size can be
+    merged; write() streams all versions out at the end.
+    """
+
+    def __init__(
+        self,
+        state_dir: str,
+        table: str,
+        key_columns: Sequence[str],
+        tracked_columns: Sequence[str],
+        surrogate_key: str = 'surrogate_key',
+        effective_date_column: str = 'effective_date',
+        expiration_date_column: str = 'expiration_date',
+        current_flag_column: str = 'is_current'
+    ):
+        os.makedirs(state_dir, exist_ok=True)
+        self.table = table
+        self.key_columns = list(key_columns)
+        self.tracked_columns = list(tracked_columns)
+        self.surrogate_key = surrogate_key
+        self.effective_date_column = effective_date_column
+        self.expiration_date_column = expiration_date_column
+        self.current_flag_column = current_flag_column
+        self.conn = sqlite3.connect(os.path.join(state_dir, f"{table}_scd2.db"))
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS versions (
+                surrogate_key TEXT PRIMARY KEY,
+                business_key TEXT NOT NULL,
+                row_hash TEXT NOT NULL,
+                attributes TEXT NOT NULL,
+                effective_date TEXT NOT NULL,
+                expiration_date TEXT NOT NULL,
+                is_current INTEGER NOT NULL
+            )
+            """
+        )
+        self.conn.execute("CREATE INDEX IF NOT EXISTS current_versions ON versions (business_key, is_current)")
+
+    def _current(self, business_keys: List[str]) -> Dict[str, tuple]:
+        current = {}
+        for start in range(0, len(business_keys), 900):
+            batch = business_keys[start:start + 900]
+            placeholders = ",".join("?" * len(batch))
+            for business_key, surrogate_key, row_hash in self.conn.execute(
+                f"SELECT business_key, surrogate_key, row_hash FROM versions "
+                f"WHERE is_current = 1 AND business_key IN ({placeholders})", batch
+            ):
+                current[business_key] = (surrogate_key, row_hash)
+        return current
+
+    def merge(self, df: pd.DataFrame, effective_date: Optional[str] = None) -> Dict[str, int]:
+        """
+        Applies a chunk of source rows to the dimension.
+
+        Args:
+            df: Rows with the key and tracked columns; the last row per business key wins,
+                rows with a missing key value are skipped
+            effective_date: Date new versions become effective (default: today)
+
+        Returns:
+            Counts of 'inserted', 'updated' and 'unchanged' business keys
+        """
+        effective_date = effective_date or date.today().isoformat()
+        columns = self.key_columns + [c for c in self.tracked_columns if c not in self.key_columns]
+        keys = _key_strings(df, self.key_columns)
+        rows = df.loc[keys.notna(), columns].assign(_business_key=keys[keys.notna()])
+        rows = rows.drop_duplicates(subset='_business_key', keep='last')
+        business_keys = rows.pop('_business_key').tolist()
+        attributes = [json.dumps(record, default=str) for record in rows.to_dict(orient='records')]
+        tracked = rows[self.tracked_columns].astype(str).agg('\x1f'.join, axis=1).tolist()
+        row_hashes = [hashlib.sha1(value.encode('utf-8')).hexdigest() for value in tracked]
+
+        current = self._current(business_keys)
+        inserts, expired = [], []
+        counts = {'inserted': 0, 'updated': 0, 'unchanged': 0}
+        for business_key, row_hash, attrs in zip(business_keys, row_hashes, attributes):
+            existing = current.get(business_key)
+            if existing and existing[1] == row_hash:
+                counts['unchanged'] += 1
+                continue
+            if existing:
+                expired.append((effective_date, existing[0]))
+                counts['updated'] += 1
+            else:
+                counts['inserted'] += 1
+            inserts.append((str(uuid.uuid4()), business_key, row_hash, attrs, effective_date, OPEN_END_DATE, 1))
+
+        self.conn.executemany(
+            "UPDATE versions SET expiration_date = ?, is_current = 0 WHERE surrogate_key = ?", expired
+        )
+        self.conn.executemany("INSERT INTO versions VALUES (?, ?, ?, ?, ?, ?, ?)", inserts)
+        self.conn.commit()
+        return counts
+
+    def current_keys(self) -> Iterator[pd.DataFrame]:
+        """Yields (business key columns..., surrogate key) frames of the current versions, for fact lookups."""
+        cursor = self.conn.execute("SELECT attributes, surrogate_key FROM versions WHERE is_current = 1")
+        while True:
+            batch = cursor.fetchmany(100000)
+            if not batch:
+                break
+            frame = pd.DataFrame([json.loads(attrs) for attrs, _ in batch])[self.key_columns]
+            frame[self.surrogate_key] = [key for _, key in batch]
+            yield frame
+
+    def iter_versions(self, chunksize: int = 100000) -> Iterator[pd.DataFrame]:
+        """Yields all versions as DataFrame chunks with the SCD columns added."""
+        cursor = self.conn.execute(
+            "SELECT surrogate_key, attributes, effective_date, expiration_date, is_current "
+            "FROM versions ORDER BY business_key, effective_date"
+        )
+        while True:
+            batch = cursor.fetchmany(chunksize)
+            if not batch:
+                break
+            frame = pd.DataFrame([json.loads(row[1]) for row in batch])
+            frame.insert(0, self.surrogate_key, [row[0] for row in batch])
+            frame[self.effective_date_column] = [row[2] for row in batch]
+            frame[self.expiration_date_column] = [row[3] for row in batch]
+            frame[self.current_flag_column] = [bool(row[4]) for row in batch]
+            yield frame
+
+    def write(self, folder: str, chunksize: int = 100000, schema: Optional["pa.Schema"] = None) -> int:
+        """
+        Rewrites the dimension table with every version and returns the number of rows.
+
+        The output is always replaced, also in incremental runs, because merges
+        change the expiration date and current flag of earlier versions. It is
+        written in the configured output format, typed by schema if given.
+        """
+        with PartitionedWriter(folder, self.table, append=False, schema=schema) as writer:
+            return sum(writer.write(frame) for frame in self.iter_versions(chunksize))
+
+    def close(self) -> None:
+        self.conn.close()
+
+    def __enter__(self) -> "Scd2Dimension":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+class HashJoinLookup:
+    """
+    Fact-to-dimension key lookup that spills to disk when the dimension is large.
+
+    The build side (business key -> surrogate key) is added in chunks. While it
+    fits in max_memory_rows it is a single in-memory dict; beyond that all
+    entries are hash-partitioned into files under spill_dir and each probe
+    chunk is joined partition by partition, holding one partition in memory
+    at a time.
+    """
+
+    def __init__(
+        self,
+        key_columns: Sequence[str],
+        value_column: str,
+        max_memory_rows: int = 2000000,
+        partitions: int = 64,
+        spill_dir: Optional[str] = None
+    ):
+        self.key_columns = list(key_columns)
+        self.value_column = value_column
+        self.max_memory_rows = max_memory_rows
+        self.partitions = partitions
+        self.spill_dir = spill_dir
+        self._memory: Dict[str, object] = {}
+        self._spilled = False
+        self._own_spill_dir = False
+
+    @property
+    def spilled(self) -> bool:
+        return self._spilled
+
+    def _partition_of(self, keys: pd.Series) -> pd.Series:
+        return pd.util.hash_pandas_object(keys, index=False) % self.partitions
+
+    def _partition_path(self, partition: int) -> str:
+        return os.path.join(self.spill_dir, f"partition-{partition:04d}.pkl")
+
+    def _spill(self, keys: pd.Series, values: pd.Series) -> None:
+        frame = pd.DataFrame({'key': keys.to_numpy(), 'value': values.to_numpy()})
+        for partition, group in frame.groupby(self._partition_of(frame['key']).to_numpy()):
+            with open(self._partition_path(int(partition)), 'ab') as f:
+                pickle.dump(dict(zip(group['key'], group['value'])), f)
+
+    def add(self, df: pd.DataFrame) -> None:
+        """Adds build-side rows containing the key columns and value_column; rows with a missing key are skipped."""
+        keys = _key_strings(df, self.key_columns)
+        valid = keys.notna()
+        keys, values = keys[valid], df.loc[valid, self.value_column]
+        if self._spilled:
+            self._spill(keys, values)
+            return
+        self._memory.update(zip(keys, values))
+        if len(self._memory) > self.max_memory_rows:
+            if self.spill_dir is None:
+                self.spill_dir = tempfile.mkdtemp(prefix="hash-join-")
+                self._own_spill_dir = True
+            os.makedirs(self.spill_dir, exist_ok=True)
+            memory, self._memory = self._memory, {}
+            self._spilled = True
+            self._spill(pd.Series(list(memory.keys())), pd.Series(list(memory.values())))
+
+    def _load_partition(self, partition: int) -> Dict[str, object]:
+        mapping = {}
+        path = self._partition_path(partition)
+        if os.path.exists(path):
+            with open(path, 'rb') as f:
+                while True:
+                    try:
+                        mapping.update(pickle.load(f))
+                    except EOFError:
+                        break
+        return mapping
+
+    def lookup(self, df: pd.DataFrame, left_on: Sequence[str], output_column: str) -> pd.DataFrame:
+        """
+        Adds output_column with the value for each row's key; unmatched rows and missing keys get NaN.
+
+        Args:
+            df: Probe chunk, e.g. fact rows
+            left_on: Columns of df holding the business key, in key_columns order
+            output_column: Name of the column to add
+        """
+        keys = _key_strings(df, list(left_on))
+        df = df.copy()
+        if not self._spilled:
+            df[output_column] = keys.map(self._memory).to_numpy()
+            return df
+        result = pd.Series(index=keys.index, dtype=object)
+        partitions = self._partition_of(keys).to_numpy()
+        for partition in pd.unique(partitions):
+            mask = partitions == partition
+            result[mask] = keys[mask].map(self._load_partition(int(partition))).to_numpy()
+        df[output_column] = result.to_numpy()
+        return df
+
+    def close(self) -> None:
+        if self._own_spill_dir and self.spill_dir:
+            shutil.rmtree(self.spill_dir, ignore_errors=True)
+
+    def __enter__(self) -> "HashJoinLookup":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+
+def target_schema(data_model_folder: str, table: str) -> Optional["pa.Schema"]:
+    """Arrow schema of a target table from the Data Type column of the data model, if it is defined there."""
+    return load_target_schemas(data_model_folder).get(table)
+
+
+class PartitionedWriter:
+    """
+    Appends chunks to an output table, optionally split into Hive-style partitions.
+
+    CSV output goes to folder/<table>.csv, or with partition_cols to
+    folder/<table>/<col>=<value>/part-NNNNN.csv. Parquet output is always a
+    dataset folder, folder/<table>/[<col>=<value>/]part-NNNNN.parquet, written
+    with column statistics and the configured compression; a target schema
+    (see target_schema) gives the columns their data model types. A new part
+    is started after max_rows_per_file rows. In incremental runs (append=True)
+    existing outputs are extended instead of replaced.
+    """
+
+    def __init__(
+        self,
+        folder: str,
+        table: str,
+        partition_cols: Optional[List[str]] = None,
+        max_rows_per_file: int = 1000000,
+        append: Optional[bool] = None,
+        format: Optional[str] = None,
+        schema: Optional["pa.Schema"] = None,
+        compression: Optional[str] = None
+    ):
+        self.folder = folder
+        self.table = table
+        self.partition_cols = list(partition_cols or [])
+        self.max_rows_per_file = max_rows_per_file
+        self.append = is_incremental() if append is None else append
+        self.format = format or os.environ.get(OUTPUT_FORMAT_ENV, 'csv')
+        if self.format not in OUTPUT_FORMATS:
+            raise ValueError(f"Unknown output format '{self.format}', expected one of {OUTPUT_FORMATS}")
+        if self.format == 'parquet' and pa is None:
+            raise ImportError("Parquet output requires the pyarrow package")
+        self.schema = schema
+        self.compression = compression or os.environ.get(PARQUET_COMPRESSION_ENV, 'zstd')
+        self.rows_written = 0
+        self._files: Dict[str, List] = {}
+        os.makedirs(folder, exist_ok=True)
+        if not self.append:
+            self._clear()
+
+    def _clear(self) -> None:
+        for name in (f"{self.table}.csv", f"{self.table}.parquet"):
+            if os.path.exists(os.path.join(self.folder, name)):
+                os.remove(os.path.join(self.folder, name))
+        shutil.rmtree(os.path.join(self.folder, self.table), ignore_errors=True)
+
+    def _partition_dir(self, values: tuple) -> str:
+        parts = [f"{column}={value}" for column, value in zip(self.partition_cols, values)]
+        return os.path.join(self.folder, self.table, *parts)
+
+    def _to_arrow(self, frame: pd.DataFrame) -> "pa.Table":
+        table = pa.Table.from_pandas(frame, preserve_index=False)
+        if self.schema is not None:
+            table = cast_to_schema(table, self.schema)
+        # All-null chunks infer the null type; store such columns as strings
+        nulls = [i for i, field in enumerate(table.schema) if pa.types.is_null(field.type)]
+        for i in nulls:
+            table = table.set_column(i, table.schema.field(i).name, table.column(i).cast(pa.string()))
+        return table
+
+    def _append(self, directory: str, frame: pd.DataFrame) -> None:
+        # [path, rows in current part, open ParquetWriter] per output directory
+        state = self._files.get(directory)
+        extension = '.parquet' if self.format == 'parquet' else '.csv'
+        if state is None:
+            os.makedirs(directory, exist_ok=True)
+            existing = sorted(name for name in os.listdir(directory) if name.startswith('part-'))
+            state = [os.path.join(directory, f"part-{len(existing):05d}{extension}"), 0, None]
+            self._files[directory] = state
+        elif state[1] >= self.max_rows_per_file:
+            if state[2] is not None:
+                state[2].close()
+            index = int(os.path.basename(state[0])[5:10]) + 1
+            state[:] = [os.path.join(directory, f"part-{index:05d}{extension}"), 0, None]
+
+        if self.format == 'parquet':
+            table = self._to_arrow(frame)
+            if state[2] is None:
+                state[2] = pq.ParquetWriter(state[0], table.schema, compression=self.compression,
+                                            write_statistics=True)
+            elif table.schema != state[2].schema:
+                table = cast_to_schema(table, state[2].schema)
+            state[2].write_table(table)
+        else:
+            frame.to_csv(state[0], mode='a', header=state[1] == 0, index=False)
+        state[1] += len(frame)
+
+    def write(self, df: pd.DataFrame) -> int:
+        """Appends a chunk and returns its number of rows."""
+        if df.empty:
+            return 0
+        if self.format == 'csv' and not self.partition_cols:
+            path = os.path.join(self.folder, f"{self.table}.csv")
+            df.to_csv(path, mode='a', header=not os.path.exists(path) or os.path.getsize(path) == 0, index=False)
+        elif not self.partition_cols:
+            self._append(os.path.join(self.folder, self.table), df)
+        else:
+            for values, group in df.groupby(self.partition_cols, dropna=False, sort=False):
+                values = values if isinstance(values, tuple) else (values,)
+                self._append(self._partition_dir(values), group.drop(columns=self.partition_cols))
+        self.rows_written += len(df)
+        return len(df)
+
+    def close(self) -> None:
+        for state in self._files.values():
+            if state[2] is not None:
+                state[2].close()
+        self._files.clear()
+
+    def __enter__(self) -> "PartitionedWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
@@ -0,0 +1,247 @@
+"""
+Profiling of generated scripts, for finding the slow step of an ETL script.
+
+Two modes are available:
+
+- sampling: a background thread samples the script's stack every few
+  milliseconds. Time is attributed to the script line being executed and to
+  the library call made from it, e.g. pandas.DataFrame.merge, together with
+  the resident memory seen on that line. The overhead is low, and top-level
+  scripts, the usual shape of generated code, get per-line results.
+- cprofile: deterministic profiling of every function call with cProfile,
+  reported per script function and per library call.
+
+Like exec_worker, this module only uses the standard library because it runs
+by path under the interpreter of a cached virtual environment:
+
+    python exec_profiler.py --mode sampling --report report.json script.py
+"""
+import argparse
+import json
+import linecache
+import os
+import runpy
+import sys
+import threading
+import time
+from typing import Any, Dict, List, Optional, Tuple
+
+
+PROFILE_MODES = ('sampling', 'cprofile')
+DEFAULT_INTERVAL = 0.005
+DEFAULT_TOP = 10
+
+
+def _rss_mb() -> Optional[float]:
+    """Current resident set size from /proc (Linux), None elsewhere."""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE') / 1024 / 1024
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def _package(filename: str, module: Optional[str] = None) -> str:
+    """Top-level package of a library function, from its module name or its file path."""
+    if module:
+        return module.split('.')[0]
+    if filename.startswith('<frozen '):
+        return filename[len('<frozen '):].rstrip('>').split('.')[0]
+    parts = filename.replace('\\', '/').split('/')
+    for marker in ('site-packages', 'dist-packages'):
+        if marker in parts and parts.index(marker) + 1 < len(parts):
+            return parts[parts.index(marker) + 1].split('.')[0]
+    return os.path.splitext(os.path.basename(filename))[0]
+
+
+def _operation(frame) -> str:
+    code = frame.f_code
+    package = _package(code.co_filename, frame.f_globals.get('__name__'))
+    return f"{package}.{getattr(code, 'co_qualname', code.co_name)}"
+
+
+def _source(script_path: str, lineno: int) -> str:
+    return linecache.getline(script_path, lineno).strip()[:120]
+
+
+class StackSampler:
+    """
+    Samples the main thread's stack on a background thread.
+
+    Each sample is weighted with the time elapsed since the previous one, so
+    stretches where a C extension held the GIL are still attributed correctly.
+    """
+
+    def __init__(self, script_path: str, interval: float = DEFAULT_INTERVAL):
+        self.script_path = script_path
+        self.interval = interval
+        self.lines: Dict[Tuple[int, str], Dict[str, Any]] = {}
+        self.operations: Dict[str, float] = {}
+        self.samples = 0
+        self.peak_rss_mb: Optional[float] = None
+        self._target = threading.main_thread().ident
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="stack-sampler", daemon=True)
+
+    def start(self) -> None:
+        self._thread.start()
+
+    def stop(self) -> None:
+        self._stop.set()
+        self._thread.join()
+
+    def _run(self) -> None:
+        last = time.perf_counter()
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            frame = sys._current_frames().get(self._target)
+            if frame is not None:
+                self._record(frame, now - last)
+            last = now
+
+    def _record(self, frame, seconds: float) -> None:
+        callee = None
+        while frame is not None and frame.f_code.co_filename != self.script_path:
+            callee, frame = frame, frame.f_back
+        if frame is None:
+            return
+        rss = _rss_mb()
+        operation = _operation(callee) if callee is not None else None
+        entry = self.lines.setdefault((frame.f_lineno, frame.f_code.co_name), {
+            'seconds': 0.0, 'operations': {}, 'peak_rss_mb': None})
+        entry['seconds'] += seconds
+        if operation:
+            entry['operations'][operation] = entry['operations'].get(operation, 0.0) + seconds
+            self.operations[operation] = self.operations.get(operation, 0.0) + seconds
+        if rss is not None:
+            entry['peak_rss_mb'] = max(entry['peak_rss_mb'] or 0.0, rss)
+            self.peak_rss_mb = max(self.peak_rss_mb or 0.0, rss)
+        self.samples += 1
+
+    def summary(self, wall_seconds: float, top: int = DEFAULT_TOP) -> Dict[str, Any]:
+        total = sum(entry['seconds'] for entry in self.lines.values()) or 1.0
+        hotspots = []
+        ranked = sorted(self.lines.items(), key=lambda item: -item[1]['seconds'])[:top]
+        for rank, ((lineno, function), entry) in enumerate(ranked, 1):
+            operations = sorted(entry['operations'].items(), key=lambda item: -item[1])
+            hotspots.append({
+                'rank': rank,
+                'line': lineno,
+                'function': function,
+                'code': _source(self.script_path, lineno),
+                'seconds': round(entry['seconds'], 3),
+                'percent': round(100 * entry['seconds'] / total, 1),
+                'operation': operations[0][0] if operations else None,
+                'peak_rss_mb': round(entry['peak_rss_mb'], 1) if entry['peak_rss_mb'] is not None else None,
+            })
+        operations = sorted(self.operations.items(), key=lambda item: -item[1])[:top]
+        return {
+            'mode': 'sampling',
+            'wall_seconds': round(wall_seconds, 3),
+            'samples': self.samples,
+            'peak_rss_mb': round(self.peak_rss_mb, 1) if self.peak_rss_mb is not None else None,
+            'hotspots': hotspots,
+            'operations': [{'operation': name, 'seconds': round(seconds, 3),
+                            'percent': round(100 * seconds / total, 1)} for name, seconds in operations],
+        }
+
+
+def _cprofile_summary(profiler, script_path: str, wall_seconds: float, top: int = DEFAULT_TOP) -> Dict[str, Any]:
+    """Ranks script functions by cumulative time and library calls made from the script."""
+    import pstats
+    stats = pstats.Stats(profiler).stats
+    functions, operations = [], {}
+    for (filename, lineno, name), (_, calls, self_time, cumulative, callers) in stats.items():
+        if filename == script_path:
+            functions.append({'line': lineno, 'function': name, 'calls': calls,
+                              'seconds': cumulative, 'self_seconds': self_time})
+            continue
+        for caller, (_, caller_calls, _, caller_cumulative) in callers.items():
+            if caller[0] == script_path:
+                label = name if name.startswith('<') else f"{_package(filename)}.{name}"
+                entry = operations.setdefault(label, {'calls': 0, 'seconds': 0.0})
+                entry['calls'] += caller_calls
+                entry['seconds'] += caller_cumulative
+    total = max((function['seconds'] for function in functions), default=0.0) or wall_seconds or 1.0
+    functions.sort(key=lambda function: -function['seconds'])
+    ranked_operations = sorted(operations.items(), key=lambda item: -item[1]['seconds'])[:top]
+    return {
+        'mode': 'cprofile',
+        'wall_seconds': round(wall_seconds, 3),
+        'hotspots': [
+            {'rank': rank, 'line': function['line'], 'function': function['function'],
+             'code': _source(script_path, function['line']) if function['function'] != '<module>' else '',
+             'calls': function['calls'],
+             'seconds': round(function['seconds'], 3), 'self_seconds': round(function['self_seconds'], 3),
+             'percent': round(100 * function['seconds'] / total, 1)}
+            for rank, function in enumerate(functions[:top], 1)
+        ],
+        'operations': [{'operation': name, 'calls': entry['calls'], 'seconds': round(entry['seconds'], 3),
+                        'percent': round(100 * entry['seconds'] / total, 1)} for name, entry in ranked_operations],
+    }
+
+
+def run_profiled(
+    script_path: str,
+    report_path: str,
+    mode: str = 'sampling',
+    interval: float = DEFAULT_INTERVAL,
+    top: int = DEFAULT_TOP
+) -> None:
+    """
+    Runs a script as __main__ under the profiler and writes the ranked summary as JSON.
+
+    The report is written even when the script fails, so partial hotspots of a
+    failing or killed-by-exception run are still available. Exceptions and
+    SystemExit propagate unchanged.
+    """
+    if mode not in PROFILE_MODES:
+        raise ValueError(f"Unknown profile mode '{mode}', expected one of {PROFILE_MODES}")
+    script_path = os.path.abspath(script_path)
+    started = time.perf_counter()
+    if mode == 'sampling':
+        sampler = StackSampler(script_path, interval)
+        sampler.start()
+        try:
+            runpy.run_path(script_path, run_name="__main__")
+        finally:
+            sampler.stop()
+            summary = sampler.summary(time.perf_counter() - started, top)
+            with open(report_path, 'w') as f:
+                json.dump(summary, f)
+    else:
+        import cProfile
+        profiler = cProfile.Profile()
+        try:
+            profiler.runcall(runpy.run_path, script_path, run_name="__main__")
+        finally:
+            summary = _cprofile_summary(profiler, script_path, time.perf_counter() - started, top)
+            with open(report_path, 'w') as f:
+                json.dump(summary, f)
+
+
+def read_report(report_path: str) -> Optional[Dict[str, Any]]:
+    """Loads a report written by run_profiled, None if the script died before it was written."""
+    try:
+        with open(report_path) as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def main(argv: Optional[List[str]] = None) -> None:
+    parser = argparse.ArgumentParser(description="Run a Python script under a profiler")
+    parser.add_argument('--mode', choices=PROFILE_MODES, default='sampling')
+    parser.add_argument('--interval', type=float, default=DEFAULT_INTERVAL, help='seconds between samples')
+    parser.add_argument('--top', type=int, default=DEFAULT_TOP, help='entries per ranking')
+    parser.add_argument('--report', required=True, help='JSON file the summary is written to')
+    parser.add_argument('script')
+    args = parser.parse_args(argv)
+    # Behave like "python script.py": argv and the script's folder on sys.path
+    sys.argv = [args.script]
+    sys.path[0] = os.path.dirname(os.path.abspath(args.script))
+    run_profiled(args.script, args.report, args.mode, args.interval, args.top)
+
+
+if __name__ == '__main__':
+    main()
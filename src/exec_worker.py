@@ -0,0 +1,497 @@
+"""
+Execution of generated scripts with resource limits, optionally from warm workers.
+
+A warm worker is a long-lived interpreter that has pandas/numpy imported once
+and forks a fresh child for every script, so each run skips interpreter start
+and library import time while still running in isolation. This module only
+uses the standard library because the worker runs it by path under the
+interpreter of a cached virtual environment.
+"""
+import atexit
+import json
+import os
+import queue
+import resource
+import signal
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import traceback
+from dataclasses import dataclass, field, asdict
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import exec_profiler
+
+
+DEFAULT_TIMEOUT = 1800
+DEFAULT_MAX_OUTPUT_BYTES = 1000000
+POLL_INTERVAL = 0.01
+
+
+@dataclass
+class ExecutionResult:
+    """Structured outcome of running a generated script."""
+    success: bool
+    exit_code: Optional[int]
+    signal: Optional[int] = None
+    timed_out: bool = False
+    duration_seconds: float = 0.0
+    peak_rss_mb: Optional[float] = None
+    stdout: str = ""
+    stderr: str = ""
+    stdout_truncated: bool = False
+    stderr_truncated: bool = False
+    errors: List[str] = field(default_factory=list)
+    warm: bool = False
+    profile: Optional[Dict[str, Any]] = None
+
+    def to_dict(self) -> Dict:
+        return asdict(self)
+
+
+def _limit_memory(memory_limit_mb: Optional[int]) -> None:
+    """Caps the address space of the current process (used in the child)."""
+    if memory_limit_mb:
+        limit = memory_limit_mb * 1024 * 1024
+        resource.setrlimit(resource.RLIMIT_AS, (limit, limit))
+
+
+def _peak_rss_mb() -> Optional[float]:
+    """
+    High-water mark of this process's resident memory from /proc (Linux), None elsewhere.
+
+    Unlike ru_maxrss of a child, which starts from the parent's high-water mark
+    at fork, VmHWM only counts the memory of the current address space.
+    """
+    try:
+        with open('/proc/self/status') as f:
+            for line in f:
+                if line.startswith('VmHWM:'):
+                    return round(int(line.split()[1]) / 1024, 1)
+    except (OSError, ValueError, IndexError):
+        pass
+    return None
+
+
+def _write_peak_rss(path: str) -> None:
+    """Reports the peak RSS of the script's process to the parent (used in the child)."""
+    peak = _peak_rss_mb()
+    if peak is not None:
+        with open(path, 'w') as f:
+            f.write(str(peak))
+
+
+def _read_peak_rss(path: str) -> Optional[float]:
+    """Peak RSS written by the child, None if it died before reporting it."""
+    try:
+        with open(path) as f:
+            return float(f.read())
+    except (OSError, ValueError):
+        return None
+
+
+def _run_main(script_path: str, profile: Optional[Dict[str, Any]], report_path: str) -> int:
+    """
+    Runs a script like "python script.py" in the current process and returns its exit code.
+
+    The caller puts the script's folder on sys.path. Exceptions are printed with
+    the traceback starting in the script, as the interpreter would print them.
+    """
+    sys.argv = [script_path]
+    try:
+        if profile:
+            exec_profiler.run_profiled(script_path, report_path, **profile)
+        else:
+            import runpy
+            runpy.run_path(script_path, run_name="__main__")
+        return 0
+    except SystemExit as e:
+        if e.code is None:
+            return 0
+        if isinstance(e.code, int):
+            return e.code
+        print(e.code, file=sys.stderr)
+        return 1
+    except BaseException as e:
+        # Hide the worker's own frames so the traceback starts in the script
+        tb = e.__traceback__
+        while tb is not None and tb.tb_frame.f_code.co_filename != script_path:
+            tb = tb.tb_next
+        traceback.print_exception(type(e), e, tb or e.__traceback__)
+        return 1
+
+
+def _bootstrap(request: Dict) -> None:
+    """
+    Entry point of a cold run: runs the script in this interpreter and reports its peak RSS.
+
+    Started as "python exec_worker.py --run <request>" so the script runs in
+    a process of its own, as with "python script.py". The memory limit is set
+    here rather than in a preexec_fn, which is unsafe in a threaded parent and
+    keeps subprocess off its fast spawn path.
+    """
+    _limit_memory(request.get('memory_limit_mb'))
+    script_path = request['script_path']
+    # The script's folder replaces this module's folder as sys.path[0]
+    sys.path[0] = os.path.dirname(script_path)
+    exit_code = 1
+    try:
+        exit_code = _run_main(script_path, request.get('profile'), request['report_path'])
+    finally:
+        _write_peak_rss(request['rss_path'])
+        sys.stdout.flush()
+        sys.stderr.flush()
+    sys.exit(exit_code)
+
+
+def _read_capped(path: str, max_bytes: int) -> Tuple[str, bool]:
+    """
+    Reads the last max_bytes of a captured stream and reports truncation.
+
+    The tail is kept because that is where tracebacks and final status lines are.
+    """
+    with open(path, 'rb') as f:
+        size = f.seek(0, os.SEEK_END)
+        f.seek(max(size - max_bytes, 0))
+        data = f.read(max_bytes)
+    return data.decode('utf-8', errors='replace'), size > max_bytes
+
+
+def _wait_with_timeout(pid: int, timeout: Optional[float]) -> Tuple[int, "resource.struct_rusage", bool]:
+    """
+    Waits for a child with wait4 so its resource usage can be collected.
+
+    Returns:
+        Tuple of (wait status, rusage, timed_out); the child is killed on timeout
+    """
+    deadline = None if timeout is None else time.monotonic() + timeout
+    while True:
+        waited_pid, status, rusage = os.wait4(pid, os.WNOHANG)
+        if waited_pid == pid:
+            return status, rusage, False
+        if deadline is not None and time.monotonic() >= deadline:
+            # The child leads its own process group so helpers it spawned go too
+            try:
+                os.killpg(pid, signal.SIGKILL)
+            except ProcessLookupError:
+                pass
+            _, status, rusage = os.wait4(pid, 0)
+            return status, rusage, True
+        time.sleep(POLL_INTERVAL)
+
+
+def _build_result(
+    status: int,
+    peak_rss_mb: Optional[float],
+    timed_out: bool,
+    started: float,
+    stdout_path: str,
+    stderr_path: str,
+    max_output_bytes: int,
+    timeout: Optional[float],
+    memory_limit_mb: Optional[int],
+    warm: bool
+) -> ExecutionResult:
+    stdout, stdout_truncated = _read_capped(stdout_path, max_output_bytes)
+    stderr, stderr_truncated = _read_capped(stderr_path, max_output_bytes)
+    exit_code = os.waitstatus_to_exitcode(status)
+    signal_number = -exit_code if exit_code < 0 else None
+
+    errors = []
+    if timed_out:
+        errors.append(f"Execution timed out after {timeout} seconds")
+    elif signal_number is not None:
+        errors.append(f"Execution killed by signal {signal.Signals(signal_number).name}")
+    elif exit_code != 0:
+        errors.append(f"Execution failed (code {exit_code}): {stderr}")
+    if memory_limit_mb and 'MemoryError' in stderr:
+        errors.append(f"Execution exceeded the memory limit of {memory_limit_mb} MB")
+
+    return ExecutionResult(
+        success=exit_code == 0 and not timed_out,
+        exit_code=None if signal_number is not None else exit_code,
+        signal=signal_number,
+        timed_out=timed_out,
+        duration_seconds=round(time.monotonic() - started, 3),
+        peak_rss_mb=peak_rss_mb,
+        stdout=stdout,
+        stderr=stderr,
+        stdout_truncated=stdout_truncated,
+        stderr_truncated=stderr_truncated,
+        errors=errors,
+        warm=warm
+    )
+
+
+def run_script(
+    python_path: str,
+    script_path: str,
+    timeout: Optional[float] = DEFAULT_TIMEOUT,
+    memory_limit_mb: Optional[int] = None,
+    max_output_bytes: int = DEFAULT_MAX_OUTPUT_BYTES,
+    cwd: Optional[str] = None,
+    env: Optional[Dict[str, str]] = None,
+    profile: Optional[Dict[str, Any]] = None
+) -> ExecutionResult:
+    """
+    Runs a script in a new interpreter with a timeout, memory limit and output caps.
+
+    Args:
+        python_path: Interpreter used to run the script
+        script_path: Path to the Python file
+        timeout: Seconds before the script is killed (default: 1800, None for no limit)
+        memory_limit_mb: Address-space limit for the script (default: no limit)
+        max_output_bytes: Trailing bytes of stdout and of stderr kept in the result (default: 1000000)
+        cwd: Working directory of the script (default: current directory)
+        env: Extra environment variables for the script
+        profile: Run under exec_profiler with these run_profiled options, e.g. {'mode': 'sampling'};
+            the ranked summary is returned in ExecutionResult.profile (default: no profiling)
+
+    Returns:
+        ExecutionResult for the run
+    """
+    with tempfile.TemporaryDirectory(prefix="exec-") as tmp:
+        stdout_path = os.path.join(tmp, "stdout")
+        stderr_path = os.path.join(tmp, "stderr")
+        report_path = os.path.join(tmp, "profile.json")
+        rss_path = os.path.join(tmp, "peak_rss")
+        request = {'script_path': os.path.abspath(script_path), 'profile': profile,
+                   'report_path': report_path, 'rss_path': rss_path, 'memory_limit_mb': memory_limit_mb}
+        command = [python_path, os.path.abspath(__file__), "--run", json.dumps(request)]
+        started = time.monotonic()
+        with open(stdout_path, 'wb') as out, open(stderr_path, 'wb') as err:
+            process = subprocess.Popen(
+                command,
+                stdout=out,
+                stderr=err,
+                cwd=cwd,
+                env={**os.environ, **env} if env else None,
+                start_new_session=True
+            )
+        status, _, timed_out = _wait_with_timeout(process.pid, timeout)
+        # wait4 already reaped the child, tell Popen so it does not wait again
+        process.returncode = os.waitstatus_to_exitcode(status)
+        result = _build_result(status, _read_peak_rss(rss_path), timed_out, started, stdout_path, stderr_path,
+                               max_output_bytes, timeout, memory_limit_mb, warm=False)
+        if profile:
+            result.profile = exec_profiler.read_report(report_path)
+        return result
+
+
+def _run_forked(request: Dict) -> Dict:
+    """Forks a child of the warm worker to run one script and returns its result."""
+    timeout = request.get('timeout', DEFAULT_TIMEOUT)
+    memory_limit_mb = request.get('memory_limit_mb')
+    max_output_bytes = request.get('max_output_bytes', DEFAULT_MAX_OUTPUT_BYTES)
+    script_path = request['script_path']
+
+    with tempfile.TemporaryDirectory(prefix="exec-") as tmp:
+        stdout_path = os.path.join(tmp, "stdout")
+        stderr_path = os.path.join(tmp, "stderr")
+        report_path = os.path.join(tmp, "profile.json")
+        rss_path = os.path.join(tmp, "peak_rss")
+        for path in (stdout_path, stderr_path):
+            open(path, 'wb').close()
+        started = time.monotonic()
+        pid = os.fork()
+        if pid == 0:
+            exit_code = 1
+            try:
+                os.setsid()
+                out_fd = os.open(stdout_path, os.O_WRONLY)
+                err_fd = os.open(stderr_path, os.O_WRONLY)
+                os.dup2(out_fd, 1)
+                os.dup2(err_fd, 2)
+                sys.stdin = open(os.devnull)
+                if request.get('cwd'):
+                    os.chdir(request['cwd'])
+                os.environ.update(request.get('env') or {})
+                _limit_memory(memory_limit_mb)
+                sys.path.insert(0, os.path.dirname(os.path.abspath(script_path)))
+                exit_code = _run_main(script_path, request.get('profile'), report_path)
+            except BaseException:
+                traceback.print_exc()
+            finally:
+                _write_peak_rss(rss_path)
+                sys.stdout.flush()
+                sys.stderr.flush()
+                os._exit(exit_code)
+
+        status, _, timed_out = _wait_with_timeout(pid, timeout)
+        result = _build_result(status, _read_peak_rss(rss_path), timed_out, started, stdout_path, stderr_path,
+                               max_output_bytes, timeout, memory_limit_mb, warm=True)
+        if request.get('profile'):
+            result.profile = exec_profiler.read_report(report_path)
+        return result.to_dict()
+
+
+def serve(preload: Sequence[str]) -> None:
+    """
+    Warm worker main loop: preload modules, then run one JSON request per line.
+
+    Requests and results are exchanged over stdin and the original stdout; the
+    worker's own fd 1 is pointed at stderr so stray prints cannot corrupt them.
+    """
+    protocol_out = os.fdopen(os.dup(1), 'w')
+    os.dup2(2, 1)
+
+    for module in preload:
+        __import__(module)
+    protocol_out.write(json.dumps({'ready': True, 'pid': os.getpid()}) + "\n")
+    protocol_out.flush()
+
+    for line in sys.stdin:
+        if not line.strip():
+            continue
+        try:
+            response = _run_forked(json.loads(line))
+        except Exception as e:
+            response = {'success': False, 'exit_code': None, 'errors': [f"Worker error: {e}"], 'warm': True}
+        protocol_out.write(json.dumps(response) + "\n")
+        protocol_out.flush()
+
+
+class WarmWorker:
+    """Handle to one warm worker process."""
+
+    def __init__(self, python_path: str, preload: Sequence[str]):
+        self.process = subprocess.Popen(
+            [python_path, os.path.abspath(__file__), "--serve", "--preload", ",".join(preload)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            text=True,
+            bufsize=1
+        )
+        ready = self.process.stdout.readline()
+        if not ready:
+            raise RuntimeError(f"Warm worker failed to start (exit code {self.process.wait()})")
+
+    def alive(self) -> bool:
+        return self.process.poll() is None
+
+    def run(self, request: Dict) -> ExecutionResult:
+        self.process.stdin.write(json.dumps(request) + "\n")
+        self.process.stdin.flush()
+        line = self.process.stdout.readline()
+        if not line:
+            raise RuntimeError("Warm worker exited while running a script")
+        return ExecutionResult(**json.loads(line))
+
+    def close(self) -> None:
+        if self.alive():
+            self.process.stdin.close()
+            try:
+                self.process.wait(timeout=5)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+                self.process.wait()
+
+
+class WarmWorkerPool:
+    """
+    Pool of warm workers that run generated scripts in freshly forked children.
+
+    Each worker keeps the preloaded modules in memory; a script runs in a fork
+    of it, so it starts in milliseconds and cannot affect later runs. Note that
+    memory_limit_mb and peak RSS include the preloaded libraries.
+    """
+
+    def __init__(self, python_path: str, size: int = 2, preload: Sequence[str] = ("pandas", "numpy")):
+        self.python_path = python_path
+        self.preload = tuple(preload)
+        self._idle: "queue.Queue[WarmWorker]" = queue.Queue()
+        self._workers: List[WarmWorker] = []
+        self._lock = threading.Lock()
+        for _ in range(size):
+            self._add_worker()
+
+    def _add_worker(self) -> WarmWorker:
+        worker = WarmWorker(self.python_path, self.preload)
+        with self._lock:
+            self._workers.append(worker)
+        self._idle.put(worker)
+        return worker
+
+    def run(
+        self,
+        script_path: str,
+        timeout: Optional[float] = DEFAULT_TIMEOUT,
+        memory_limit_mb: Optional[int] = None,
+        max_output_bytes: int = DEFAULT_MAX_OUTPUT_BYTES,
+        cwd: Optional[str] = None,
+        env: Optional[Dict[str, str]] = None,
+        profile: Optional[Dict[str, Any]] = None
+    ) -> ExecutionResult:
+        """
+        Runs a script on the next idle worker; same arguments as run_script.
+
+        Returns:
+            ExecutionResult for the run
+        """
+        request = {
+            'script_path': os.path.abspath(script_path),
+            'timeout': timeout,
+            'memory_limit_mb': memory_limit_mb,
+            'max_output_bytes': max_output_bytes,
+            'cwd': cwd or os.getcwd(),
+            'env': env,
+            'profile': profile,
+        }
+        worker = self._idle.get()
+        try:
+            return worker.run(request)
+        finally:
+            if worker.alive():
+                self._idle.put(worker)
+            else:
+                # Replace a crashed worker so the pool keeps its size
+                with self._lock:
+                    self._workers.remove(worker)
+                self._add_worker()
+
+    def close(self) -> None:
+        with self._lock:
+            workers, self._workers = self._workers, []
+        for worker in workers:
+            worker.close()
+
+
+_warm_pools: Dict[str, WarmWorkerPool] = {}
+_warm_pools_lock = threading.Lock()
+
+
+def get_warm_worker_pool(python_path: str, size: int = 2) -> WarmWorkerPool:
+    """
+    Returns the shared warm pool for an interpreter, starting it on first use.
+
+    Args:
+        python_path: Interpreter the workers run under, e.g. from VenvPool.get_python
+        size: Number of workers when the pool is created (default: 2)
+
+    Returns:
+        The WarmWorkerPool for that interpreter
+    """
+    with _warm_pools_lock:
+        if python_path not in _warm_pools:
+            _warm_pools[python_path] = WarmWorkerPool(python_path, size=size)
+        return _warm_pools[python_path]
+
+
+@atexit.register
+def _close_warm_pools() -> None:
+    with _warm_pools_lock:
+        pools = list(_warm_pools.values())
+        _warm_pools.clear()
+    for pool in pools:
+        pool.close()
+
+
+if __name__ == "__main__":
+    if len(sys.argv) == 3 and sys.argv[1] == "--run":
+        _bootstrap(json.loads(sys.argv[2]))
+    if len(sys.argv) >= 2 and sys.argv[1] == "--serve":
+        modules = sys.argv[3].split(",") if len(sys.argv) >= 4 and sys.argv[2] == "--preload" else []
+        serve([m for m in modules if m])
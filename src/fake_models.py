@@ -0,0 +1,121 @@
+import asyncio
+import itertools
+import json
+from typing import Any, AsyncIterable, Callable, Dict, List, Optional, Union
+
+from strands.models import Model
+from strands.types.exceptions import ModelThrottledException
+
+
+# A scripted turn is either plain text, or a dict with optional "text" and a
+# list of "tool_calls" ({"name": ..., "input": {...}}) the agent should execute.
+# Structured output requests take the fields of the output model from the
+# turn's "output" dict, or parse its text as JSON.
+ScriptedTurn = Union[str, Dict[str, Any]]
+
+
+class ScriptedModel(Model):
+    """
+    Local stand-in for a BedrockModel that replays scripted turns.
+
+    Each call to stream() emits the next turn of the script as Bedrock-style
+    stream events, including tool calls and token usage, so agents, tools and
+    the workflow run end to end without network access. A responder callable
+    can be given instead of a script to build turns from the request.
+    """
+
+    def __init__(
+        self,
+        turns: Optional[List[ScriptedTurn]] = None,
+        responder: Optional[Callable[[List[Dict], Optional[str]], ScriptedTurn]] = None,
+        model_id: str = "fake-model",
+        latency: float = 0.0,
+        chunk_size: int = 64,
+        chunk_delay: float = 0.0,
+        throttle_first: int = 0,
+        **config: Any
+    ):
+        if turns is None and responder is None:
+            raise ValueError("ScriptedModel needs turns or a responder")
+        self.turns = list(turns or [])
+        self.responder = responder
+        self.latency = latency
+        self.chunk_size = chunk_size
+        self.chunk_delay = chunk_delay
+        self.throttle_first = throttle_first
+        self.config = {'model_id': model_id, **config}
+        self.calls = 0
+        self.throttled = 0
+        self._tool_ids = itertools.count(1)
+
+    def update_config(self, **model_config: Any) -> None:
+        self.config.update(model_config)
+
+    def get_config(self) -> Dict[str, Any]:
+        return self.config
+
+    async def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        await self._start_call()
+        turn = self._next_turn(prompt, system_prompt)
+        if isinstance(turn, str):
+            turn = {'text': turn}
+        fields = turn['output'] if 'output' in turn else json.loads(turn.get('text') or '{}')
+        yield {'output': output_model(**fields)}
+
+    async def _start_call(self) -> None:
+        """Counts a model call, throttling the first throttle_first calls and then waiting the latency."""
+        self.calls += 1
+        if self.throttled < self.throttle_first:
+            self.throttled += 1
+            raise ModelThrottledException("ThrottlingException: scripted throttle")
+        if self.latency:
+            await asyncio.sleep(self.latency)
+
+    def _next_turn(self, messages: List[Dict], system_prompt: Optional[str]) -> ScriptedTurn:
+        if self.responder is not None:
+            return self.responder(messages, system_prompt)
+        index = self.calls - self.throttled - 1
+        # Keep answering with the last turn once the script is exhausted
+        return self.turns[min(index, len(self.turns) - 1)]
+
+    async def stream(
+        self,
+        messages,
+        tool_specs=None,
+        system_prompt: Optional[str] = None,
+        **kwargs: Any
+    ) -> AsyncIterable[Dict[str, Any]]:
+        await self._start_call()
+        turn = self._next_turn(messages, system_prompt)
+        if isinstance(turn, str):
+            turn = {'text': turn}
+        text = turn.get('text', '')
+        tool_calls = turn.get('tool_calls', [])
+
+        yield {'messageStart': {'role': 'assistant'}}
+        if text:
+            for start in range(0, len(text), self.chunk_size):
+                if self.chunk_delay:
+                    await asyncio.sleep(self.chunk_delay)
+                yield {'contentBlockDelta': {'delta': {'text': text[start:start + self.chunk_size]}}}
+            yield {'contentBlockStop': {}}
+        for call in tool_calls:
+            tool_use_id = f"tooluse_{next(self._tool_ids)}"
+            yield {'contentBlockStart': {'start': {'toolUse': {'toolUseId': tool_use_id, 'name': call['name']}}}}
+            # Tool arguments stream in pieces too, as with Bedrock
+            arguments = json.dumps(call.get('input', {}))
+            for start in range(0, len(arguments), self.chunk_size):
+                if self.chunk_delay:
+                    await asyncio.sleep(self.chunk_delay)
+                yield {'contentBlockDelta': {'delta': {'toolUse': {'input': arguments[start:start + self.chunk_size]}}}}
+            yield {'contentBlockStop': {}}
+        yield {'messageStop': {'stopReason': 'tool_use' if tool_calls else 'end_turn'}}
+
+        # Same rough four-characters-per-token estimate the rate limiter uses
+        input_tokens = (len(json.dumps(messages, default=str)) + len(system_prompt or "")) // 4
+        output_tokens = (len(text) + len(json.dumps(tool_calls))) // 4
+        yield {'metadata': {
+            'usage': {'inputTokens': input_tokens, 'outputTokens': output_tokens,
+                      'totalTokens': input_tokens + output_tokens},
+            'metrics': {'latencyMs': int(self.latency * 1000)}
+        }}
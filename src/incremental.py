@@ -0,0 +1,313 @@
+import csv
+import hashlib
+import json
+import os
+import time
+from dataclasses import asdict, dataclass, field
+from datetime import datetime
+from typing import Dict, List, Optional
+
+from readers import list_source_files
+from schema_digest import structure_signature
+from toolkit import _file_fingerprint, _profile_source_file
+
+
+def _sha256(text: str) -> str:
+    return hashlib.sha256(text.encode('utf-8')).hexdigest()
+
+
+def hash_file(path: str) -> Optional[str]:
+    """Content hash of a file, or None if it does not exist."""
+    if not os.path.isfile(path):
+        return None
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1 << 20), b''):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def hash_data_model(data_model_folder: str) -> Optional[str]:
+    """Hash over the names and contents of the data model CSVs, or None if there are none."""
+    if not os.path.isdir(data_model_folder):
+        return None
+    names = sorted(name for name in os.listdir(data_model_folder) if name.endswith('.csv'))
+    if not names:
+        return None
+    return _sha256(json.dumps([(name, hash_file(os.path.join(data_model_folder, name))) for name in names]))
+
+
+def read_data_model(data_model_folder: str) -> str:
+    """Rebuilds the pipe-delimited data model text from the CSVs written by pipe_delimited_string_to_csv."""
+    tables = []
+    for name in sorted(os.listdir(data_model_folder)):
+        if name.endswith('.csv'):
+            with open(os.path.join(data_model_folder, name), newline='', encoding='utf-8') as f:
+                tables.append("\n".join("|".join(row) for row in csv.reader(f)))
+    return "\n\n".join(tables)
+
+
+@dataclass
+class RunManifest:
+    """
+    Fingerprints of the inputs and outputs of the last successful workflow run.
+
+    source_files maps each source file (relative path) to its fingerprint and
+    structure signature; structure_hash covers only the set of distinct
+    structures, so a new partition of a known feed does not change it.
+    needs_full_rebuild is set when a full rebuild failed or did not run, so
+    the next run rebuilds again instead of processing only new files.
+    """
+    business_case_hash: str
+    structure_hash: str
+    source_files: Dict[str, Dict] = field(default_factory=dict)
+    data_model_hash: Optional[str] = None
+    code_hash: Optional[str] = None
+    created_at: str = ''
+    needs_full_rebuild: bool = False
+
+    @classmethod
+    def load(cls, path: str) -> Optional["RunManifest"]:
+        if not os.path.isfile(path):
+            return None
+        try:
+            with open(path) as f:
+                return cls(**json.load(f))
+        except (ValueError, TypeError):
+            # An unreadable manifest only costs one full run
+            return None
+
+    def save(self, path: str) -> None:
+        self.created_at = datetime.now().isoformat()
+        tmp_path = path + '.tmp'
+        with open(tmp_path, 'w') as f:
+            json.dump(asdict(self), f, indent=2)
+        os.replace(tmp_path, path)
+
+
+@dataclass
+class IncrementalPlan:
+    """What an incremental run has to redo, and why."""
+    run_modeler: bool
+    run_engineer: bool
+    run_code: bool
+    full_rebuild: bool
+    changed_files: List[str] = field(default_factory=list)
+    removed_files: List[str] = field(default_factory=list)
+    reasons: List[str] = field(default_factory=list)
+
+
+def fingerprint_sources(source_folder: str, previous: Optional[RunManifest] = None,
+                        sample_rows: int = 100) -> Dict[str, Dict]:
+    """
+    Fingerprints every source file and determines its structure signature.
+
+    Files whose fingerprint matches the previous manifest keep their recorded
+    signature; only new or changed files are profiled.
+
+    Args:
+        source_folder: Source data folder
+        previous: Manifest of the last run, if any
+        sample_rows: Rows sampled when profiling a new or changed file (default: 100)
+
+    Returns:
+        Mapping of relative path to {'fingerprint': [...], 'structure': signature}
+    """
+    known = previous.source_files if previous else {}
+    files = {}
+    for path in list_source_files(source_folder):
+        rel_path = os.path.relpath(path, source_folder)
+        fingerprint = _file_fingerprint(path)
+        entry = {'fingerprint': [fingerprint.size, fingerprint.mtime_ns, fingerprint.head_hash]}
+        if rel_path in known and known[rel_path]['fingerprint'] == entry['fingerprint']:
+            entry['structure'] = known[rel_path]['structure']
+        else:
+            file_schema = _profile_source_file(path, sample_rows, 'utf-8', {})
+            entry['structure'] = ('failed' if file_schema.get('status') == 'failed'
+                                  else structure_signature(file_schema))
+        files[rel_path] = entry
+    return files
+
+
+def plan_incremental_run(
+    previous: Optional[RunManifest],
+    current: RunManifest,
+    code_location: str,
+    data_product_folder: Optional[str] = None
+) -> IncrementalPlan:
+    """
+    Compares the current inputs with the last run and decides which stages to rerun.
+
+    The modeler reruns when the business case or the set of source structures
+    changed. The engineer reruns after the modeler, or when the data model CSVs
+    changed or the code is missing; hand edits to the saved code are kept. The
+    code then processes only new files, unless the code is new or files were
+    removed or modified, which needs a full rebuild: the code appends the rows
+    of the files it is given, so a modified file would add its rows again next
+    to those of its earlier version.
+    """
+    reasons = []
+    if previous is None:
+        reasons.append("no previous run")
+        return IncrementalPlan(True, True, True, True, sorted(current.source_files), [], reasons)
+
+    changed = sorted(path for path, entry in current.source_files.items()
+                     if previous.source_files.get(path, {}).get('fingerprint') != entry['fingerprint'])
+    removed = sorted(set(previous.source_files) - set(current.source_files))
+    modified = [path for path in changed if path in previous.source_files]
+
+    run_modeler = False
+    if previous.business_case_hash != current.business_case_hash:
+        run_modeler = True
+        reasons.append("business case changed")
+    if previous.structure_hash != current.structure_hash:
+        run_modeler = True
+        reasons.append("source schema changed")
+    if current.data_model_hash is None:
+        run_modeler = True
+        reasons.append("data model missing")
+
+    run_engineer = run_modeler
+    if not run_modeler and previous.data_model_hash != current.data_model_hash:
+        run_engineer = True
+        reasons.append("data model changed")
+    if not os.path.isfile(code_location):
+        run_engineer = True
+        reasons.append("generated code missing")
+
+    product_missing = bool(data_product_folder) and not (
+        os.path.isdir(data_product_folder) and os.listdir(data_product_folder))
+    full_rebuild = (run_engineer or bool(removed) or bool(modified) or product_missing
+                    or previous.needs_full_rebuild)
+    if previous.needs_full_rebuild:
+        reasons.append("previous full rebuild did not complete")
+    if removed:
+        reasons.append(f"{len(removed)} source files removed")
+    if modified:
+        reasons.append(f"{len(modified)} source files modified")
+    if product_missing:
+        reasons.append("data product missing")
+    if changed and not full_rebuild:
+        reasons.append(f"{len(changed)} new source files")
+    run_code = full_rebuild or bool(changed)
+    if not run_code:
+        reasons.append("inputs unchanged")
+    return IncrementalPlan(run_modeler, run_engineer, run_code, full_rebuild, changed, removed, reasons)
+
+
+def run_incremental_workflow(
+    user_input: str,
+    source_data_folder: str,
+    data_model_output_folder: str,
+    generated_code_location: str,
+    data_product_folder: Optional[str] = None,
+    manifest_path: Optional[str] = None,
+    agents=None,
+    execute_code: bool = True
+) -> Dict:
+    """
+    Runs only the workflow stages whose inputs changed since the last run.
+
+    A manifest next to the generated code records fingerprints of the business
+    case, the source files and their structure, the data model CSVs and the
+    code. Unchanged inputs skip the modeler and engineer and reuse the saved
+    code, which is then executed directly (without the code runner agent) on
+    the new source files only, passed to it in the DATA_PRODUCT_SOURCE_FILES
+    environment variable. Modified or removed source files need a full rebuild.
+
+    Args:
+        user_input: Business case and folder locations, as for run_data_workflow
+        source_data_folder: Source data folder named in user_input
+        data_model_output_folder: Data model folder named in user_input
+        generated_code_location: Generated code file named in user_input
+        data_product_folder: Data product folder; a missing or empty folder forces a full rebuild.
+            Runs through the code runner agent only count as successful if the data product
+            in this folder passes validate_data_product, so without it they are never recorded
+            as processed
+        manifest_path: Manifest file (default: generated_code_location + '.manifest.json')
+        agents: WorkflowAgents to use when stages have to run (default: the module level agents)
+        execute_code: Whether to run the code (default: True)
+
+    Returns:
+        Dictionary with the 'plan', 'data_models', 'code', 'execution' result, the 'validation'
+        of an agent run, whether the run 'succeeded' and per-stage 'timings'
+    """
+    import workflow
+    # etl_runtime and data_validation load pandas and pyarrow, which importing the workflow should not
+    from data_validation import validate_data_product
+    from etl_runtime import SOURCE_FILES_ENV
+    from toolkit import check_and_execute_python_file
+
+    manifest_path = manifest_path or generated_code_location + '.manifest.json'
+    previous = RunManifest.load(manifest_path)
+    timings = {}
+
+    started = time.perf_counter()
+    source_files = fingerprint_sources(source_data_folder, previous)
+    current = RunManifest(
+        business_case_hash=_sha256(user_input),
+        structure_hash=_sha256(json.dumps(sorted({entry['structure'] for entry in source_files.values()}))),
+        source_files=source_files,
+        data_model_hash=hash_data_model(data_model_output_folder),
+        code_hash=hash_file(generated_code_location),
+    )
+    plan = plan_incremental_run(previous, current, generated_code_location, data_product_folder)
+    timings['fingerprinting'] = time.perf_counter() - started
+    print(f"Incremental plan: {', '.join(plan.reasons)}")
+
+    modeler = agents.data_modeler if agents else workflow.data_modeler_agent
+    engineer = agents.data_engineer if agents else workflow.data_engineer_agent
+    runner = agents.code_runner if agents else workflow.code_runner_agent
+
+    if plan.run_modeler:
+        started = time.perf_counter()
+        data_models = str(modeler(f"Generate data model based on the business requirement: '{user_input}' "))
+        timings['data_modeler'] = time.perf_counter() - started
+        current.data_model_hash = hash_data_model(data_model_output_folder)
+    else:
+        data_models = read_data_model(data_model_output_folder)
+
+    if plan.run_engineer:
+        started = time.perf_counter()
+        engineer(f"Generate code based on the business requirements:'{user_input}' and  and data model:\n\n{data_models}")
+        timings['data_engineer'] = time.perf_counter() - started
+        current.code_hash = hash_file(generated_code_location)
+    code = open(generated_code_location).read() if os.path.isfile(generated_code_location) else ''
+
+    execution = None
+    validation = None
+    succeeded = True
+    if execute_code and plan.run_code:
+        started = time.perf_counter()
+        if plan.run_engineer:
+            # New code gets the code runner agent, which can interpret and report failures.
+            # Its answer is free text, so success is taken from the data product it left behind.
+            execution = str(runner(f"Find the saved code location based on provided'{user_input}', execute the code"))
+            if data_product_folder:
+                validation = validate_data_product(data_product_folder, data_model_output_folder)
+                succeeded = validation['status'] == 'ok'
+            else:
+                succeeded = False
+                print("No data product folder to validate, the run is not recorded as processed")
+        else:
+            env = None
+            if not plan.full_rebuild:
+                env = {SOURCE_FILES_ENV: json.dumps(
+                    [os.path.join(source_data_folder, path) for path in plan.changed_files])}
+            execution = check_and_execute_python_file(generated_code_location, env=env)
+            succeeded = execution['success']
+        timings['code_execution'] = time.perf_counter() - started
+
+    if plan.run_code and not (execute_code and succeeded):
+        # Keep the old fingerprints of unprocessed files so the next run picks them up again
+        current.needs_full_rebuild = plan.full_rebuild
+        known = previous.source_files if previous else {}
+        for path in plan.changed_files + plan.removed_files:
+            if path in known:
+                current.source_files[path] = known[path]
+            else:
+                current.source_files.pop(path, None)
+    current.save(manifest_path)
+    return {'plan': asdict(plan), 'data_models': data_models, 'code': code, 'execution': execution,
+            'validation': validation, 'succeeded': bool(execute_code and succeeded) if plan.run_code else True,
+            'timings': timings}
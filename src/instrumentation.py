@@ -0,0 +1,286 @@
+import abc
+import contextvars
+import functools
+import json
+import threading
+import time
+from collections import defaultdict
+from contextlib import contextmanager
+from dataclasses import asdict, dataclass, field
+from typing import Any, Callable, Dict, Iterator, List, Optional, Union
+
+try:
+    from opentelemetry import metrics as otel_metrics
+    from opentelemetry import trace as otel_trace
+except ImportError:  # pragma: no cover - strands depends on opentelemetry-api
+    otel_metrics = None
+    otel_trace = None
+
+
+@dataclass
+class Span:
+    """
+    Timing and resource usage of one tool or agent call.
+
+    cpu_seconds is process CPU time while the span was open, so it includes
+    worker threads started by the call, and also any other call running at
+    the same time. bytes_read/bytes_written come from the process-wide I/O
+    counters where the platform provides them (Linux); they are recorded only
+    when no unrelated span was open at the same time and are None otherwise,
+    since concurrent calls (e.g. the cases of a batch) would be counted into
+    each other's spans. counters holds what the call itself reported, e.g.
+    files_processed, rows_sampled, subprocess_seconds.
+    """
+    name: str
+    kind: str
+    parent: Optional[str] = None
+    started_at: float = 0.0
+    wall_seconds: float = 0.0
+    cpu_seconds: float = 0.0
+    bytes_read: Optional[int] = None
+    bytes_written: Optional[int] = None
+    counters: Dict[str, float] = field(default_factory=dict)
+    status: str = 'ok'
+    error: Optional[str] = None
+
+    def to_dict(self) -> Dict[str, Any]:
+        return asdict(self)
+
+
+class SpanExporter(abc.ABC):
+    """Receives every finished span; subclasses decide where it goes."""
+
+    @abc.abstractmethod
+    def export(self, span: Span) -> None:
+        """Handles one finished span; called from the thread that ran it."""
+
+    def shutdown(self) -> None:
+        pass
+
+
+class InMemoryExporter(SpanExporter):
+    """Keeps spans in a list, e.g. for notebooks, tests and benchmarks."""
+
+    def __init__(self):
+        self.spans: List[Span] = []
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        with self._lock:
+            self.spans.append(span)
+
+    def clear(self) -> None:
+        with self._lock:
+            self.spans = []
+
+    def summary(self) -> Dict[str, Dict[str, float]]:
+        """Aggregates spans by name: calls, errors, wall and CPU totals, max wall time and summed counters."""
+        summary: Dict[str, Dict[str, float]] = {}
+        with self._lock:
+            spans = list(self.spans)
+        for span in spans:
+            entry = summary.setdefault(span.name, defaultdict(float))
+            entry['calls'] += 1
+            entry['errors'] += span.status != 'ok'
+            entry['wall_seconds'] += span.wall_seconds
+            entry['cpu_seconds'] += span.cpu_seconds
+            entry['max_wall_seconds'] = max(entry['max_wall_seconds'], span.wall_seconds)
+            for key in ('bytes_read', 'bytes_written'):
+                if getattr(span, key) is not None:
+                    entry[key] += getattr(span, key)
+            for key, value in span.counters.items():
+                entry[key] += value
+        return {name: {key: round(value, 6) for key, value in entry.items()} for name, entry in summary.items()}
+
+
+class JsonFileExporter(SpanExporter):
+    """Appends one JSON line per span to a file."""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+
+    def export(self, span: Span) -> None:
+        line = json.dumps(span.to_dict(), default=str)
+        with self._lock:
+            with open(self.path, 'a') as f:
+                f.write(line + '\n')
+
+
+class OTelExporter(SpanExporter):
+    """
+    Emits spans and metrics through OpenTelemetry, next to the traces Strands produces.
+
+    Each span becomes an OTEL span with the resource figures as attributes, and
+    wall time, CPU time and bytes are recorded as histograms/counters labelled
+    with the span name, so whatever provider is configured (e.g. the console
+    exporter enabled in the notebook) receives them.
+    """
+
+    def __init__(self, service_name: str = 'data-product-agents'):
+        if otel_trace is None:
+            raise ImportError("opentelemetry-api is required for the OTEL exporter")
+        self.tracer = otel_trace.get_tracer(service_name)
+        meter = otel_metrics.get_meter(service_name)
+        self.wall_time = meter.create_histogram('data_product.wall_time', unit='s')
+        self.cpu_time = meter.create_histogram('data_product.cpu_time', unit='s')
+        self.bytes_read = meter.create_counter('data_product.bytes_read', unit='By')
+        self.bytes_written = meter.create_counter('data_product.bytes_written', unit='By')
+
+    def export(self, span: Span) -> None:
+        attributes = {'data_product.kind': span.kind, 'data_product.status': span.status}
+        attributes.update({f'data_product.{key}': value for key, value in span.counters.items()})
+        for key in ('cpu_seconds', 'bytes_read', 'bytes_written'):
+            if getattr(span, key) is not None:
+                attributes[f'data_product.{key}'] = getattr(span, key)
+        start_ns = int(span.started_at * 1e9)
+        otel_span = self.tracer.start_span(span.name, start_time=start_ns, attributes=attributes)
+        if span.error:
+            otel_span.set_status(otel_trace.Status(otel_trace.StatusCode.ERROR, span.error))
+        otel_span.end(end_time=start_ns + int(span.wall_seconds * 1e9))
+
+        labels = {'name': span.name, 'kind': span.kind}
+        self.wall_time.record(span.wall_seconds, labels)
+        self.cpu_time.record(span.cpu_seconds, labels)
+        if span.bytes_read:
+            self.bytes_read.add(span.bytes_read, labels)
+        if span.bytes_written:
+            self.bytes_written.add(span.bytes_written, labels)
+
+
+EXPORTERS = {'memory': InMemoryExporter, 'json': JsonFileExporter, 'otel': OTelExporter}
+
+_exporter: Optional[SpanExporter] = None
+_current: contextvars.ContextVar = contextvars.ContextVar('data_product_span', default=None)
+# ids of the open spans enclosing the current one, which may overlap it
+_lineage: contextvars.ContextVar = contextvars.ContextVar('data_product_span_lineage', default=())
+# Open spans process-wide, and those that overlapped an unrelated span
+_open_spans: set = set()
+_overlapped: set = set()
+_open_lock = threading.Lock()
+
+
+def configure_instrumentation(exporter: Union[None, str, SpanExporter] = 'memory', **exporter_kwargs) -> Optional[SpanExporter]:
+    """
+    Turns instrumentation on with the given exporter, or off with None.
+
+    Args:
+        exporter: 'memory', 'json', 'otel', a SpanExporter instance, or None to disable (default: 'memory')
+        **exporter_kwargs: Arguments of the named exporter, e.g. path for 'json'
+
+    Returns:
+        The active exporter, or None when disabled
+    """
+    global _exporter
+    if _exporter is not None:
+        _exporter.shutdown()
+    if isinstance(exporter, str):
+        if exporter not in EXPORTERS:
+            raise ValueError(f"Unknown exporter '{exporter}', expected one of {sorted(EXPORTERS)}")
+        exporter = EXPORTERS[exporter](**exporter_kwargs)
+    _exporter = exporter
+    return _exporter
+
+
+def get_exporter() -> Optional[SpanExporter]:
+    return _exporter
+
+
+def _open_span(span_id: int, lineage: tuple) -> None:
+    with _open_lock:
+        others = _open_spans.difference(lineage)
+        if others:
+            _overlapped.update(others)
+            _overlapped.add(span_id)
+        _open_spans.add(span_id)
+
+
+def _close_span(span_id: int) -> bool:
+    """Closes a span and returns whether it ran alone, i.e. the process counters are its own."""
+    with _open_lock:
+        _open_spans.discard(span_id)
+        if span_id in _overlapped:
+            _overlapped.discard(span_id)
+            return False
+        return True
+
+
+def _io_counters() -> Optional[Dict[str, int]]:
+    try:
+        with open('/proc/self/io') as f:
+            values = dict(line.split(': ') for line in f.read().splitlines())
+        return {'read': int(values['rchar']), 'write': int(values['wchar'])}
+    except (OSError, KeyError, ValueError):
+        return None
+
+
+@contextmanager
+def trace_span(name: str, kind: str = 'tool') -> Iterator[Optional[Span]]:
+    """
+    Measures the enclosed block as a span and hands it to the exporter.
+
+    Yields None, at the cost of a single check, while instrumentation is disabled.
+
+    Args:
+        name: Span name, e.g. the tool or agent name
+        kind: 'tool', 'agent' or 'stage'
+    """
+    exporter = _exporter
+    if exporter is None:
+        yield None
+        return
+
+    parent = _current.get()
+    span = Span(name=name, kind=kind, parent=parent.name if parent else None, started_at=time.time())
+    lineage = _lineage.get()
+    _open_span(id(span), lineage)
+    token = _current.set(span)
+    lineage_token = _lineage.set(lineage + (id(span),))
+    io_start = _io_counters()
+    cpu_start = time.process_time()
+    wall_start = time.perf_counter()
+    try:
+        yield span
+    except BaseException as e:
+        span.status, span.error = 'error', f"{type(e).__name__}: {e}"
+        raise
+    finally:
+        span.wall_seconds = time.perf_counter() - wall_start
+        span.cpu_seconds = time.process_time() - cpu_start
+        io_end = _io_counters()
+        if _close_span(id(span)) and io_start and io_end:
+            span.bytes_read = io_end['read'] - io_start['read']
+            span.bytes_written = io_end['write'] - io_start['write']
+        _lineage.reset(lineage_token)
+        _current.reset(token)
+        exporter.export(span)
+
+
+def record(**counters: float) -> None:
+    """Adds counters (files_processed, rows_sampled, subprocess_seconds, ...) to the current span."""
+    span = _current.get()
+    if span is None:
+        return
+    for key, value in counters.items():
+        if value is not None:
+            span.counters[key] = span.counters.get(key, 0) + value
+
+
+def instrumented(func: Optional[Callable] = None, *, name: Optional[str] = None, kind: str = 'tool') -> Callable:
+    """
+    Decorator that runs each call of func inside a span named after it.
+
+    Place it below @tool so Strands still sees the original signature and docstring.
+    """
+    def decorate(func: Callable) -> Callable:
+        span_name = name or func.__name__
+
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            if _exporter is None:
+                return func(*args, **kwargs)
+            with trace_span(span_name, kind):
+                return func(*args, **kwargs)
+        return wrapper
+
+    return decorate(func) if func is not None else decorate
@@ -0,0 +1,45 @@
+"""
+Deferred imports of heavy libraries.
+
+pandas and pyarrow take most of the start-up time of the workflow modules,
+even when no tool that reads data ever runs. Modules that need them only
+inside functions bind them with lazy_module instead of an import statement:
+
+    pd = lazy_module('pandas')
+    pa = lazy_module('pyarrow', optional=True)   # None if pyarrow is not installed
+
+The real module is imported on the first attribute access. Annotations that
+name these modules have to be strings, e.g. "pd.DataFrame", because they are
+evaluated at function definition.
+"""
+import importlib
+import importlib.util
+import types
+from typing import Optional
+
+
+class LazyModule(types.ModuleType):
+    """Placeholder that imports the module of the same name on first attribute access."""
+
+    def __getattr__(self, attribute: str):
+        module = importlib.import_module(self.__name__)
+        # Later lookups hit the copied attributes and no longer go through __getattr__
+        self.__dict__.update(module.__dict__)
+        return getattr(module, attribute)
+
+    def __repr__(self) -> str:
+        return f"<lazy module '{self.__name__}'>"
+
+
+def lazy_module(name: str, optional: bool = False) -> Optional[LazyModule]:
+    """
+    Binds a module without importing it.
+
+    Args:
+        name: Module name, e.g. "pandas" or "pyarrow.parquet"
+        optional: Return None when the top-level package is not installed, like the
+            `except ImportError: pa = None` fallback it replaces (default: False)
+    """
+    if optional and importlib.util.find_spec(name.split('.')[0]) is None:
+        return None
+    return LazyModule(name)
@@ -0,0 +1,264 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, AsyncIterable, Dict, List, Optional
+
+from strands.models import Model
+
+
+CACHE_MODES = ('off', 'read_write', 'record', 'replay')
+
+# Tool result fields that differ between runs of the same call, e.g. the run time
+# and memory of check_and_execute_python_file; they are left out of the request key
+VOLATILE_RESULT_FIELDS = frozenset({'duration_seconds', 'peak_rss_mb', 'seconds'})
+
+
+class CacheMissError(Exception):
+    """Raised in replay mode when a request has no recorded response."""
+
+
+class LLMResponseCache:
+    """
+    SQLite store of model stream events keyed by a hash of the full request.
+
+    Entries are evicted least-recently-used first once the stored events
+    exceed max_size_mb.
+    """
+
+    def __init__(self, db_path: str, max_size_mb: float = 512):
+        db_dir = os.path.dirname(os.path.abspath(db_path))
+        if not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+        self.max_bytes = int(max_size_mb * 1024 * 1024)
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS llm_responses (
+                request_key TEXT PRIMARY KEY,
+                model_id TEXT,
+                events TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self.conn.commit()
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def request_key(model_id: Optional[str], config: Any, system_prompt: Optional[str],
+                    messages: Any, tool_specs: Any, extra: Dict[str, Any]) -> str:
+        """
+        Hashes everything that determines a model response.
+
+        Messages are hashed by role and content only, and tool results without
+        VOLATILE_RESULT_FIELDS, so a recorded workflow replays although its tools
+        ran again and took a different time.
+        """
+        payload = json.dumps({
+            'model_id': model_id,
+            'config': config,
+            'system_prompt': system_prompt,
+            'messages': _stable_messages(messages),
+            'tool_specs': tool_specs,
+            'extra': extra,
+        }, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, key: str) -> Optional[List[Dict]]:
+        with self._lock:
+            row = self.conn.execute(
+                "SELECT events FROM llm_responses WHERE request_key = ?", (key,)
+            ).fetchone()
+            if row is None:
+                self.misses += 1
+                return None
+            self.hits += 1
+            self.conn.execute("UPDATE llm_responses SET last_used = ? WHERE request_key = ?", (time.time(), key))
+            self.conn.commit()
+        return json.loads(row[0])
+
+    def put(self, key: str, model_id: Optional[str], events: List[Dict]) -> None:
+        data = json.dumps(events, default=str)
+        now = time.time()
+        with self._lock:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO llm_responses VALUES (?, ?, ?, ?, ?, ?)",
+                (key, model_id, data, len(data), now, now)
+            )
+            self._evict()
+            self.conn.commit()
+
+    def _evict(self) -> None:
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM llm_responses").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        stale = []
+        for key, size in self.conn.execute("SELECT request_key, size FROM llm_responses ORDER BY last_used"):
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        self.conn.executemany("DELETE FROM llm_responses WHERE request_key = ?", stale)
+
+    def stats(self) -> Dict[str, int]:
+        with self._lock:
+            entries, size = self.conn.execute(
+                "SELECT COUNT(*), COALESCE(SUM(size), 0) FROM llm_responses"
+            ).fetchone()
+        return {'entries': entries, 'size_bytes': size, 'hits': self.hits, 'misses': self.misses}
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+_cache: Optional[LLMResponseCache] = None
+_mode = 'off'
+
+
+def configure_llm_cache(path: Optional[str] = None, mode: str = 'read_write', max_size_mb: float = 512) -> None:
+    """
+    Turns the response cache on or off for every CachingModel.
+
+    Modes:
+        off: call the model, never cache
+        read_write: serve cached responses, record the misses
+        record: always call the model and overwrite the stored response
+        replay: serve cached responses only and raise CacheMissError otherwise,
+            for offline, deterministic runs
+
+    Args:
+        path: SQLite file holding the cache (required unless mode is 'off')
+        mode: One of 'off', 'read_write', 'record', 'replay' (default: 'read_write')
+        max_size_mb: Size above which least recently used responses are evicted (default: 512)
+    """
+    global _cache, _mode
+    if mode not in CACHE_MODES:
+        raise ValueError(f"Unknown cache mode '{mode}', expected one of {CACHE_MODES}")
+    if mode != 'off' and not path:
+        raise ValueError(f"Cache mode '{mode}' needs a cache path")
+    if _cache is not None:
+        _cache.close()
+    _cache = LLMResponseCache(path, max_size_mb) if mode != 'off' else None
+    _mode = mode
+
+
+def llm_cache_stats() -> Optional[Dict[str, int]]:
+    """Returns hit/miss counts and size of the active cache, or None when it is off."""
+    return _cache.stats() if _cache is not None else None
+
+
+def _without_volatile(value: Any) -> Any:
+    if isinstance(value, dict):
+        return {key: _without_volatile(item) for key, item in value.items() if key not in VOLATILE_RESULT_FIELDS}
+    if isinstance(value, list):
+        return [_without_volatile(item) for item in value]
+    return value
+
+
+def _stable_tool_result(block: Dict) -> Dict:
+    content = []
+    for item in block.get('content', []):
+        if 'json' in item:
+            item = {'json': _without_volatile(item['json'])}
+        elif 'text' in item:
+            try:
+                item = {'text': json.dumps(_without_volatile(json.loads(item['text'])), sort_keys=True)}
+            except ValueError:
+                pass
+        content.append(item)
+    return {**block, 'content': content}
+
+
+def _stable_messages(messages: Any) -> Any:
+    """Role and content of each message, with the volatile fields of tool results removed."""
+    if not isinstance(messages, list):
+        return messages
+    stable = []
+    for message in messages:
+        if not isinstance(message, dict):
+            stable.append(message)
+            continue
+        content = [
+            {**block, 'toolResult': _stable_tool_result(block['toolResult'])}
+            if isinstance(block, dict) and 'toolResult' in block else block
+            for block in message.get('content', [])
+        ]
+        stable.append({'role': message.get('role'), 'content': content})
+    return stable
+
+
+def _model_id(config: Any) -> Optional[str]:
+    return config.get('model_id') if isinstance(config, dict) else getattr(config, 'model_id', None)
+
+
+class CachingModel(Model):
+    """
+    Model wrapper that serves repeated requests from the LLM response cache.
+
+    The key covers model id, inference parameters, system prompt, messages and
+    tool specs, so a hit is the response the model produced for exactly the
+    same request. The cache mode is looked up per request, which makes caching
+    opt-in via configure_llm_cache even for agents built at import time.
+    """
+
+    def __init__(self, model: Model):
+        self.model = model
+
+    def update_config(self, **model_config: Any) -> None:
+        self.model.update_config(**model_config)
+
+    def get_config(self) -> Any:
+        return self.model.get_config()
+
+    def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        return self.model.structured_output(output_model, prompt, system_prompt=system_prompt, **kwargs)
+
+    async def stream(
+        self,
+        messages,
+        tool_specs=None,
+        system_prompt: Optional[str] = None,
+        **kwargs: Any
+    ) -> AsyncIterable[Any]:
+        cache, mode = _cache, _mode
+        if cache is None:
+            async for event in self.model.stream(messages, tool_specs, system_prompt, **kwargs):
+                yield event
+            return
+
+        config = self.get_config()
+        extra = {name: kwargs[name] for name in ('tool_choice', 'system_prompt_content') if kwargs.get(name)}
+        key = cache.request_key(_model_id(config), config, system_prompt, messages, tool_specs, extra)
+
+        if mode in ('read_write', 'replay'):
+            events = cache.get(key)
+            if events is not None:
+                for event in events:
+                    yield event
+                return
+            if mode == 'replay':
+                raise CacheMissError(f"No recorded response for {_model_id(config)} request {key[:12]}")
+
+        events = []
+        async for event in self.model.stream(messages, tool_specs, system_prompt, **kwargs):
+            events.append(event)
+            yield event
+        # Only complete responses are stored; a failed stream raises before this point
+        cache.put(key, _model_id(config), events)
+
+    def __getattr__(self, name: str) -> Any:
+        if name == 'model':
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+
+def cached(model: Model) -> CachingModel:
+    """Wraps a model so its responses go through the configured response cache."""
+    return model if isinstance(model, CachingModel) else CachingModel(model)
@@ -1,48 +1,116 @@
-from strands.models import BedrockModel
-from botocore.config import Config as BotocoreConfig
-
-
-boto_config = BotocoreConfig(
-    retries={"max_attempts": 4, "mode": "standard"},
-    read_timeout=1000
-)
-
-sonnet37_model = BedrockModel(
-    model_id="us.anthropic.claude-3-7-sonnet-20250219-v1:0",
-    temperature=0,
-    top_p=1,
-    max_tokens=131072,
-    boto_client_config=boto_config, 
-)
-
-
-opus4_model = BedrockModel(
-    model_id="us.anthropic.claude-opus-4-20250514-v1:0",
-    temperature=0.2,
-    max_tokens=10000,
-    boto_client_config=boto_config, 
-)
-
-sonnet35_model = BedrockModel(
-    model_id="us.anthropic.claude-3-5-sonnet-20241022-v2:0",
-    temperature=1,
-    top_p=1,
-    max_tokens=8191,
-    boto_client_config=boto_config, 
-)
-
-nova_pro_model = BedrockModel(
-    model_id="us.amazon.nova-pro-v1:0",
-    temperature=0.5,
-    max_tokens=10000,
-    boto_client_config=boto_config, 
-)
-
-# Create the central orchestrator with interleaved thinking
-sonnet4_model = BedrockModel(
-    model_id="us.anthropic.claude-sonnet-4-20250514-v1:0",
-    temperature=0.1,  # Need temperature 1 for creative thinking
-    top_p=0.95,
-    max_tokens=65536,
-    boto_client_config=boto_config,
-)
\ No newline at end of file
+"""
+Bedrock models used by the workflow agents, built on demand by name.
+
+Creating a BedrockModel loads botocore and opens a client, so models are only
+built when an agent first asks for them, once per name:
+
+    model = get_model("sonnet37")
+
+The module-level names of earlier versions (sonnet37_model, opus4_model, ...)
+still work and resolve through the same registry.
+"""
+import threading
+from typing import Any, Dict, List
+
+
+BOTO_CLIENT_CONFIG = {
+    "retries": {"max_attempts": 4, "mode": "standard"},
+    "read_timeout": 1000,
+}
+
+MODEL_CONFIGS: Dict[str, Dict[str, Any]] = {
+    "sonnet37": dict(
+        model_id="us.anthropic.claude-3-7-sonnet-20250219-v1:0",
+        temperature=0,
+        top_p=1,
+        max_tokens=131072,
+    ),
+    "opus4": dict(
+        model_id="us.anthropic.claude-opus-4-20250514-v1:0",
+        temperature=0.2,
+        max_tokens=10000,
+    ),
+    "sonnet35": dict(
+        model_id="us.anthropic.claude-3-5-sonnet-20241022-v2:0",
+        temperature=1,
+        top_p=1,
+        max_tokens=8191,
+    ),
+    "nova_pro": dict(
+        model_id="us.amazon.nova-pro-v1:0",
+        temperature=0.5,
+        max_tokens=10000,
+    ),
+    # Central orchestrator with interleaved thinking
+    "sonnet4": dict(
+        model_id="us.anthropic.claude-sonnet-4-20250514-v1:0",
+        temperature=0.1,  # Need temperature 1 for creative thinking
+        top_p=0.95,
+        max_tokens=65536,
+    ),
+}
+
+# Registry name of the model each workflow agent uses unless overridden
+DEFAULT_MODELS = {
+    "data_modeler": "sonnet37",
+    "data_engineer": "opus4",
+    "code_runner": "nova_pro",
+}
+
+_models: Dict[str, Any] = {}
+_lock = threading.Lock()
+
+__all__ = ["BOTO_CLIENT_CONFIG", "MODEL_CONFIGS", "DEFAULT_MODELS", "get_model", "register_model",
+           "model_names", "built_models"]
+
+
+def register_model(name: str, **config) -> None:
+    """
+    Adds a model to the registry, or replaces its settings.
+
+    Args:
+        name: Registry name, e.g. "haiku"
+        **config: BedrockModel arguments (model_id, temperature, max_tokens, ...);
+            boto_client_config defaults to BOTO_CLIENT_CONFIG
+    """
+    with _lock:
+        MODEL_CONFIGS[name] = config
+        _models.pop(name, None)
+
+
+def get_model(name: str):
+    """
+    Returns the BedrockModel registered under name, creating it on first use.
+
+    Raises:
+        KeyError: If no model is registered under name
+    """
+    model = _models.get(name)
+    if model is not None:
+        return model
+    if name not in MODEL_CONFIGS:
+        raise KeyError(f"Unknown model '{name}', expected one of {model_names()}")
+    with _lock:
+        if name not in _models:
+            from botocore.config import Config as BotocoreConfig
+            from strands.models import BedrockModel
+            config = dict(MODEL_CONFIGS[name])
+            config.setdefault("boto_client_config", BotocoreConfig(**BOTO_CLIENT_CONFIG))
+            _models[name] = BedrockModel(**config)
+        return _models[name]
+
+
+def model_names() -> List[str]:
+    return sorted(MODEL_CONFIGS)
+
+
+def built_models() -> List[str]:
+    """Names of the models created so far."""
+    return sorted(_models)
+
+
+def __getattr__(attribute: str):
+    # sonnet37_model, opus4_model, ... of earlier versions
+    if attribute.endswith("_model") and attribute[:-len("_model")] in MODEL_CONFIGS:
+        return get_model(attribute[:-len("_model")])
+    raise AttributeError(f"module {__name__!r} has no attribute {attribute!r}")
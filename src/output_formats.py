@@ -0,0 +1,298 @@
+import csv
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+from lazy_imports import lazy_module
+
+# Imported on first use; None without the arrow extra
+pa = lazy_module('pyarrow', optional=True)
+pc = lazy_module('pyarrow.compute', optional=True)
+pq = lazy_module('pyarrow.parquet', optional=True)
+
+
+OUTPUT_FORMATS = ('csv', 'parquet')
+
+# Passed to executed code so etl_runtime.PartitionedWriter writes the configured format
+OUTPUT_FORMAT_ENV = "DATA_PRODUCT_OUTPUT_FORMAT"
+PARQUET_COMPRESSION_ENV = "DATA_PRODUCT_PARQUET_COMPRESSION"
+
+# Key of the Parquet file metadata holding the typed target schemas of a data model
+TARGET_SCHEMAS_KEY = b"data_product.target_schemas"
+
+_output_format: Dict[str, Any] = {'format': 'csv', 'compression': 'zstd'}
+
+# Integer type names as a whole word, e.g. INT, BIGINT, INTEGER UNSIGNED, int64, SERIAL; not INTERVAL or POINT
+_INTEGER_TYPE = re.compile(
+    r'(unsigned\s+)?((tiny|small|medium|big)?int(eger)?(2|4|8|16|32|64)?|(big|small)?serial|long)\b')
+
+
+def _require_pyarrow() -> None:
+    if pa is None:
+        raise ImportError("Parquet output requires the pyarrow package (pip install .[arrow])")
+
+
+def configure_output_format(format: str = 'csv', compression: str = 'zstd') -> None:
+    """
+    Sets the format data products and data model artifacts are written in.
+
+    Args:
+        format: 'csv' or 'parquet' (default: 'csv'), typically the "output_format" entry of config.json
+        compression: Parquet compression codec, e.g. 'zstd', 'snappy', 'gzip' (default: 'zstd')
+    """
+    if format not in OUTPUT_FORMATS:
+        raise ValueError(f"Unknown output format '{format}', expected one of {OUTPUT_FORMATS}")
+    if format == 'parquet':
+        _require_pyarrow()
+    _output_format.update(format=format, compression=compression)
+
+
+def get_output_format() -> Dict[str, Any]:
+    return dict(_output_format)
+
+
+def output_format_env() -> Dict[str, str]:
+    """Environment variables telling generated code which output format to write."""
+    return {OUTPUT_FORMAT_ENV: _output_format['format'], PARQUET_COMPRESSION_ENV: _output_format['compression']}
+
+
+def arrow_type(data_type: str) -> "pa.DataType":
+    """
+    Maps a Data Type value of the data model (SQL-like, free text) to an Arrow type.
+
+    decimal(p, s) keeps its precision and scale; unknown types become strings.
+    """
+    _require_pyarrow()
+    text = data_type.strip().lower()
+    decimal = re.match(r'(decimal|numeric)\s*\(\s*(\d+)\s*(?:,\s*(\d+))?\s*\)', text)
+    if decimal:
+        return pa.decimal128(int(decimal.group(2)), int(decimal.group(3) or 0))
+    if text.startswith(('bool', 'bit')):
+        return pa.bool_()
+    if _INTEGER_TYPE.match(text):
+        return pa.int64()
+    if text.startswith(('decimal', 'numeric', 'float', 'double', 'real', 'number', 'money')):
+        return pa.float64()
+    if text.startswith(('timestamp', 'datetime')):
+        return pa.timestamp('us')
+    if text.startswith('date'):
+        return pa.date32()
+    return pa.string()
+
+
+def _normalize(cell: str) -> str:
+    return cell.strip().strip('*').strip().lower()
+
+
+def parse_data_model_columns(data_model_folder: str) -> Dict[str, List[Dict[str, str]]]:
+    """
+    Collects the column specifications of every table in the data model CSVs.
+
+    Rows are read below any header containing "Table Name", "Column Name" and
+    "Data Type", the column table layout the modeler is asked to produce.
+
+    Returns:
+        Mapping of target table name to a list of {'column', 'data_type', 'key', 'description'} dictionaries
+    """
+    tables: Dict[str, List[Dict[str, str]]] = {}
+    if not os.path.isdir(data_model_folder):
+        return tables
+    for name in sorted(os.listdir(data_model_folder)):
+        if not name.endswith('.csv'):
+            continue
+        with open(os.path.join(data_model_folder, name), newline='', encoding='utf-8') as f:
+            positions = None
+            for row in csv.reader(f):
+                header = [_normalize(cell) for cell in row]
+                if 'table name' in header and 'column name' in header and 'data type' in header:
+                    positions = (header.index('table name'), header.index('column name'), header.index('data type'),
+                                 header.index('pk/fk') if 'pk/fk' in header else None,
+                                 header.index('description') if 'description' in header else None)
+                    continue
+                if positions is None or len(row) <= max(p for p in positions if p is not None):
+                    continue
+                table, column, data_type, key, description = positions
+                spec = {'column': row[column].strip(), 'data_type': row[data_type].strip(),
+                        'key': row[key].strip() if key is not None else '',
+                        'description': row[description].strip() if description is not None else ''}
+                if row[table].strip() and spec['column']:
+                    tables.setdefault(row[table].strip(), []).append(spec)
+    return tables
+
+
+def load_target_schemas(data_model_folder: str) -> Dict[str, "pa.Schema"]:
+    """Arrow schema of every target table, built from the Data Type column of the data model."""
+    return {
+        table: pa.schema([(spec['column'], arrow_type(spec['data_type'])) for spec in specs])
+        for table, specs in parse_data_model_columns(data_model_folder).items()
+    }
+
+
+def cast_to_schema(table: "pa.Table", schema: "pa.Schema") -> "pa.Table":
+    """
+    Casts the columns of table that appear in schema to their target types.
+
+    Columns missing from schema keep their inferred type; a value that cannot
+    be converted raises a ValueError naming the column.
+    """
+    columns = []
+    for field in table.schema:
+        column = table.column(field.name)
+        if field.name in schema.names and schema.field(field.name).type != field.type:
+            target = schema.field(field.name).type
+            try:
+                if pa.types.is_date32(target) and pa.types.is_timestamp(field.type):
+                    column = pc.cast(column, target)
+                elif pa.types.is_decimal(target) and pa.types.is_floating(field.type):
+                    # Go through strings so values are rounded to the target scale, not truncated
+                    column = pc.cast(pc.round(column, target.scale).cast(pa.string()), target)
+                else:
+                    column = pc.cast(column, target)
+            except (pa.ArrowInvalid, pa.ArrowNotImplementedError) as e:
+                raise ValueError(f"Column '{field.name}' cannot be converted to {target}: {e}") from e
+        columns.append(column)
+    return pa.Table.from_arrays(columns, names=table.column_names)
+
+
+def write_data_model_parquet(csv_path: str, target_schemas: Dict[str, "pa.Schema"], compression: str = 'zstd') -> str:
+    """
+    Writes a data model CSV as Parquet next to it, embedding the typed target schemas.
+
+    The typed schemas are stored as JSON (column -> Arrow type) under the
+    data_product.target_schemas metadata key, so consumers can read the
+    intended types without parsing the Data Type column.
+
+    Returns:
+        Path of the Parquet file
+    """
+    _require_pyarrow()
+    with open(csv_path, newline='', encoding='utf-8') as f:
+        rows = [row for row in csv.reader(f) if row]
+    width = max((len(row) for row in rows), default=0)
+    header = rows[0] + [f"column_{i + 1}" for i in range(len(rows[0]), width)] if rows else []
+    data = {name: [row[i] if i < len(row) else None for row in rows[1:]] for i, name in enumerate(header)}
+    table = pa.table(data, schema=pa.schema([(name, pa.string()) for name in header]))
+    metadata = {TARGET_SCHEMAS_KEY: json.dumps({
+        name: {field.name: str(field.type) for field in schema} for name, schema in target_schemas.items()
+    }).encode('utf-8')}
+    table = table.replace_schema_metadata(metadata)
+    parquet_path = os.path.splitext(csv_path)[0] + '.parquet'
+    pq.write_table(table, parquet_path, compression=compression)
+    return parquet_path
+
+
+def _table_files(data_product_folder: str) -> Dict[str, List[str]]:
+    """Groups output files by table: <table>.csv, <table>.parquet or a <table>/ dataset folder."""
+    tables: Dict[str, List[str]] = {}
+    for name in sorted(os.listdir(data_product_folder)):
+        path = os.path.join(data_product_folder, name)
+        if name.startswith('.'):
+            continue
+        if os.path.isdir(path):
+            files = sorted(os.path.join(root, file) for root, _, names in os.walk(path)
+                           for file in names if file.endswith(('.csv', '.parquet')))
+            if files:
+                tables[name] = files
+        elif name.endswith(('.csv', '.parquet')):
+            tables.setdefault(os.path.splitext(name)[0], []).append(path)
+    return tables
+
+
+def _partition_columns(path: str, table_dir: str) -> Dict[str, str]:
+    relative = os.path.relpath(os.path.dirname(path), table_dir)
+    return dict(part.split('=', 1) for part in relative.split(os.sep) if '=' in part)
+
+
+def inspect_table_files(files: List[str], table_dir: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Describes an output table without reading its data.
+
+    Parquet schemas, row counts, null counts and sizes come from the file
+    footers; CSV files contribute their header and a row count from a
+    streaming newline count.
+    """
+    columns: Dict[str, str] = {}
+    rows = 0
+    null_counts: Dict[str, int] = {}
+    formats = set()
+    for path in files:
+        if path.endswith('.parquet'):
+            _require_pyarrow()
+            formats.add('parquet')
+            metadata = pq.read_metadata(path)
+            schema = metadata.schema.to_arrow_schema()
+            for field in schema:
+                columns.setdefault(field.name, str(field.type))
+            rows += metadata.num_rows
+            for group in range(metadata.num_row_groups):
+                row_group = metadata.row_group(group)
+                for index in range(row_group.num_columns):
+                    chunk = row_group.column(index)
+                    if chunk.is_stats_set and chunk.statistics.has_null_count:
+                        name = chunk.path_in_schema
+                        null_counts[name] = null_counts.get(name, 0) + chunk.statistics.null_count
+        else:
+            formats.add('csv')
+            with open(path, newline='', encoding='utf-8') as f:
+                header = next(csv.reader(f), [])
+            for name in header:
+                columns.setdefault(name, 'csv')
+            with open(path, 'rb') as f:
+                lines = sum(block.count(b'\n') for block in iter(lambda: f.read(1 << 20), b''))
+            rows += max(0, lines - 1)
+        if table_dir:
+            # Hive-style partition folders hold columns that are not stored in the files
+            for name in _partition_columns(path, table_dir):
+                columns.setdefault(name, 'partition')
+    return {'format': '/'.join(sorted(formats)), 'files': len(files), 'rows': rows,
+            'columns': columns, 'null_counts': null_counts}
+
+
+def inspect_data_product(data_product_folder: str, data_model_output_folder: Optional[str] = None) -> Dict[str, Any]:
+    """
+    Checks the written tables against the data model using only footers and headers.
+
+    Returns:
+        Dictionary with per-table descriptions, missing tables and a list of problems
+        (missing or unexpected columns, Parquet type mismatches, empty tables)
+    """
+    if not os.path.isdir(data_product_folder):
+        return {'tables': {}, 'missing_tables': [], 'problems': [f"Folder '{data_product_folder}' does not exist"],
+                'status': 'failed'}
+    tables = {}
+    for table, files in _table_files(data_product_folder).items():
+        table_dir = os.path.join(data_product_folder, table)
+        tables[table] = inspect_table_files(files, table_dir if os.path.isdir(table_dir) else None)
+
+    problems = []
+    missing_tables = []
+    if data_model_output_folder:
+        expected = parse_data_model_columns(data_model_output_folder)
+        missing_tables = sorted(set(expected) - set(tables))
+        problems += [f"{table}: table missing" for table in missing_tables]
+        for table, specs in expected.items():
+            if table not in tables:
+                continue
+            actual = tables[table]['columns']
+            expected_columns = [spec['column'] for spec in specs]
+            missing = [column for column in expected_columns if column not in actual]
+            unexpected = [column for column in actual if column not in expected_columns]
+            if missing:
+                problems.append(f"{table}: missing columns {missing}")
+            if unexpected:
+                problems.append(f"{table}: columns not in the data model {unexpected}")
+            if pa is not None:
+                for spec in specs:
+                    written = actual.get(spec['column'])
+                    if written in (None, 'csv', 'partition'):
+                        continue
+                    target = str(arrow_type(spec['data_type']))
+                    if written != target:
+                        problems.append(f"{table}.{spec['column']}: written as {written}, data model type "
+                                        f"'{spec['data_type']}' expects {target}")
+    for table, description in tables.items():
+        if description['rows'] == 0:
+            problems.append(f"{table}: no rows")
+    return {'tables': tables, 'missing_tables': missing_tables, 'problems': problems,
+            'status': 'failed' if problems else 'ok'}
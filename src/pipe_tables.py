@@ -0,0 +1,212 @@
+import csv
+import os
+import re
+from typing import Dict, Iterable, Optional, TextIO
+
+
+HEADER_PATTERN = re.compile(r'^#+\s+(.*?)\s*$')
+
+
+def _table_filename(table_name: str, file_prefix: str, index: int) -> str:
+    """Creates a valid CSV file name from a table name."""
+    if table_name == "single_table":
+        return f"{file_prefix}.csv"
+
+    # Clean the table name to create a valid filename
+    clean_name = re.sub(r'[^\w\s-]', '', table_name).strip().lower()
+    clean_name = re.sub(r'[-\s]+', '_', clean_name)
+
+    if clean_name:
+        return f"{file_prefix}_{clean_name}.csv"
+    return f"{file_prefix}_{index + 1}.csv"
+
+
+class PipeTableStreamWriter:
+    """
+    Converts pipe-delimited model output to CSV files in a single pass.
+
+    Text is fed in arbitrary chunks (e.g. tokens as they arrive); every complete
+    line is tokenized once and written straight to the CSV writer of the table
+    it belongs to, so memory use is bounded by the longest line.
+
+    Table detection follows pipe_delimited_string_to_csv: a markdown header
+    ("### Name") starts a new table, as does a "| Name |" line that follows at
+    least two lines of non-pipe content. Separator rows such as "|---|---|" are
+    skipped.
+    """
+
+    def __init__(
+        self,
+        data_model_output_folder: str,
+        file_prefix: str = "table",
+        detect_tables: bool = True,
+        single_output_file: Optional[str] = None
+    ):
+        self.data_model_output_folder = data_model_output_folder
+        self.file_prefix = file_prefix
+        self.detect_tables = detect_tables
+        self.single_output_file = single_output_file
+        self.saved_files: Dict[str, str] = {}
+
+        self._carry = ""        # trailing backslash that may start an escaped "\n"
+        self._partial = ""      # text of the line that has not been terminated yet
+        self._table_index: Dict[str, int] = {}
+        self._current_table = "Table_1" if detect_tables else "single_table"
+        self._current_rows = 0
+        self._last_line = ""
+        self._table_open = False
+        self._file: Optional[TextIO] = None
+        self._writer = None
+        self._closed = False
+
+        # Create output directory if it doesn't exist
+        if not os.path.exists(data_model_output_folder):
+            os.makedirs(data_model_output_folder)
+
+        if single_output_file:
+            full_path = os.path.join(data_model_output_folder, single_output_file)
+            self._file = open(full_path, 'w', newline='', encoding='utf-8')
+            self._writer = csv.writer(self._file)
+            self.saved_files["combined"] = full_path
+        if not detect_tables:
+            # Without table detection all content is one table, written even if empty
+            self._open_table()
+
+    def __enter__(self) -> "PipeTableStreamWriter":
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
+
+    def feed(self, chunk: str) -> None:
+        """
+        Consumes the next piece of model output.
+
+        Args:
+            chunk: Any slice of the output text; lines may span chunks
+        """
+        text = self._carry + chunk
+        # Hold back a trailing backslash, its "n" may arrive in the next chunk
+        if text.endswith('\\'):
+            self._carry, text = '\\', text[:-1]
+        else:
+            self._carry = ''
+
+        # Replace escaped newlines with actual newlines
+        lines = (self._partial + text.replace("\\n", "\n")).split('\n')
+        self._partial = lines.pop()
+        for line in lines:
+            self._process_line(line)
+
+    def close(self) -> Dict[str, str]:
+        """
+        Flushes the last line and closes all open files.
+
+        Returns:
+            Dictionary mapping table names to their saved file paths
+        """
+        if not self._closed:
+            self._process_line(self._partial + self._carry)
+            self._partial = self._carry = ''
+            self._end_table()
+            if self._file is not None:
+                self._file.close()
+                self._file = None
+            self._closed = True
+        return self.saved_files
+
+    def _process_line(self, line: str) -> None:
+        line = line.strip()
+
+        # Skip empty lines
+        if not line:
+            return
+
+        if self.detect_tables:
+            # Check if line is a header (markdown style)
+            header_match = HEADER_PATTERN.match(line)
+            if header_match:
+                self._end_table()
+                self._current_table = header_match.group(1).strip()
+                return
+
+            # Also check for table name in the format "| Table Name |"
+            if line.startswith('| ') and ' |' in line and '|-' not in line:
+                if self._current_rows > 1 and not self._last_line.startswith('|'):
+                    self._end_table()
+                    self._current_table = line.strip('| ').strip()
+
+        if not self._table_open:
+            self._open_table()
+        self._current_rows += 1
+        self._last_line = line
+        self._write_line(line)
+
+    def _write_line(self, line: str) -> None:
+        # Skip markdown table formatting lines; strip() tests "only |, - and +" in C
+        if line.startswith('|') and '-+-' in line or not line.strip('|-+'):
+            return
+
+        # Process pipe-delimited line
+        if line.startswith('|') and line.endswith('|'):
+            # Extract cells, strip whitespace
+            self._writer.writerow([cell.strip() for cell in line.strip('|').split('|')])
+        else:
+            # For non-pipe lines, just write as a single cell
+            self._writer.writerow([line])
+
+    def _open_table(self) -> None:
+        table_name = self._current_table
+        self._table_open = True
+        if self.single_output_file:
+            # Add table name as a header
+            self._file.write(f"# {table_name}\n")
+            return
+
+        index = self._table_index.setdefault(table_name, len(self._table_index))
+        full_path = os.path.join(
+            self.data_model_output_folder,
+            _table_filename(table_name, self.file_prefix, index)
+        )
+        # A repeated table name replaces the earlier table, as before
+        self._file = open(full_path, 'w', newline='', encoding='utf-8')
+        self._writer = csv.writer(self._file)
+        self.saved_files[table_name] = full_path
+
+    def _end_table(self) -> None:
+        if self._table_open:
+            if self.single_output_file:
+                # Add a separator between tables
+                self._file.write("\n\n")
+            else:
+                self._file.close()
+                self._file = None
+        self._table_open = False
+        self._current_rows = 0
+        self._last_line = ""
+
+
+def stream_pipe_delimited_to_csv(
+    chunks: Iterable[str],
+    data_model_output_folder: str,
+    file_prefix: str = "table",
+    detect_tables: bool = True,
+    single_output_file: Optional[str] = None
+) -> Dict[str, str]:
+    """
+    Converts pipe-delimited text, delivered as an iterable of chunks, to CSV file(s).
+
+    Args:
+        chunks: Pieces of the pipe-delimited content, e.g. streamed model tokens
+        data_model_output_folder: Folder to save CSV files
+        file_prefix: Prefix for generated file names (default: "table")
+        detect_tables: Whether to detect multiple tables (default: True)
+        single_output_file: If provided, saves all content to this single file
+
+    Returns:
+        Dictionary mapping table names to their saved file paths
+    """
+    with PipeTableStreamWriter(data_model_output_folder, file_prefix, detect_tables, single_output_file) as writer:
+        for chunk in chunks:
+            writer.feed(chunk)
+    return writer.saved_files
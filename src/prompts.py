@@ -7,7 +7,7 @@ Your task is to use business requirement the sample source data to build a well-
 </task>
 
 <Instructions> 
-    1. Use the extract_csv_schemas tool to read data in the <source_data_folder>source data folder</source_data_folder> to get source data schema. 
+    1. Use the summarize_source_schemas tool to read data in the <source_data_folder>source data folder</source_data_folder> to get a compact source data schema. Files with identical structure are listed once with a file count. Use the extract_csv_schemas tool only if you need the full profile of the source files. If the folder was profiled in an earlier run, use the query_schema_catalog tool to look up columns (files_with_column) or see what changed since then (drift) instead of profiling it again. 
     2. Identify the Facts:
     - Determine the business processes to be modeled (sales, orders, shipments, etc.)
     - Identify the appropriate granularity for each fact table
@@ -82,7 +82,18 @@ Follow the following instructions to generate the code.
     2. Transforms this data into the star schema following the data model designed by the data_modeler subagent
     3. Implements proper handling for all fact and dimension tables
     4. Creates appropriate primary and foreign key relationships
-    5. Save the output tables as csv files in the data product folder <output_location>data_product_path</output_location>. 
+    5. Save the output tables in the data product folder <output_location>data_product_path</output_location> with PartitionedWriter (see below). It writes csv files or typed, compressed Parquet datasets depending on the configured output format; pass schema=target_schema(data_model_folder, table) so columns get the types of the Data Type column. 
+    6. Support incremental refreshes: if the environment variable DATA_PRODUCT_SOURCE_FILES is set, it holds a JSON list of new source file paths. Process only those files and merge the results into the existing output tables (append new facts, update changed dimension records) instead of rebuilding everything. If it is not set, process the whole source folder. The etl_runtime helpers below already do this. 
+
+    Source data can be larger than memory, so process it in chunks with the etl_runtime library, which is importable when the code runs (from etl_runtime import ...):
+    - source_files(source_folder, pattern=None): the files to process, e.g. pattern="sales/*.csv"
+    - read_chunks(paths, chunksize=100000, columns=None, csv_kwargs=None): streams files as DataFrame chunks. Never load whole files with pd.read_csv
+    - SurrogateKeyAssigner(state_dir, table, key_columns, key_type='uuid4').assign(chunk, key_column): stable surrogate keys across chunks and runs
+    - Scd2Dimension(state_dir, table, key_columns, tracked_columns, surrogate_key='surrogate_key'): merge(chunk) maintains Type 2 history with uuid4 surrogate keys, effective_date, expiration_date and is_current; write(data_product_folder) rewrites <table>.csv with all versions at the end; current_keys() yields key frames for fact lookups
+    - HashJoinLookup(key_columns, value_column): add(dimension key chunk) for each chunk, then lookup(fact_chunk, left_on, output_column); spills to disk for large dimensions
+    - PartitionedWriter(data_product_folder, table, partition_cols=None, schema=None): write(chunk) appends to the table (<table>.csv, or a <table>/ folder for Parquet or partitioned output)
+    - target_schema(data_model_folder, table): the typed schema of a data model table, for PartitionedWriter and Scd2Dimension.write(..., schema=...)
+    Keep the runtime state (state_dir) in a ".etl_state" folder inside the data product folder. Use these classes as context managers. 
 
     For Type 2 Slowly Changing Dimensions:
     - Generate a new surrogate key column using uuid4 for each dimension table that requires Type 2 SCD handling
@@ -108,16 +119,24 @@ You are a code runner responsible for executing generated Python code and valida
 EXECUTION WORKFLOW:
 1. Check shared state for generated code location
 2. Execute the Python code using check_and_execute_python_file tool
-3. Analyze execution results
-4. Report success or failure with details
+3. Analyze execution results (success, exit_code, errors, stderr, duration_seconds, peak_rss_mb)
+4. After a successful run, check the data product with the validate_data_product tool, passing the data product folder and the data model folder. It checks tables, columns and types, primary key uniqueness, foreign keys against the referenced dimension keys and SCD current flags. If it reports problems, the run has failed
+5. If the run was slow, used much memory, or profiling was requested, run the code again with profile="sampling" (or profile="cprofile" for per-function call counts) and read the ranked 'hotspots' (script lines with the pandas call made there and the memory seen) and 'operations'
+6. Report success or failure with details
 
 VALIDATION CRITERIA:
 - Code executes without errors
 - Expected output files are created
+- validate_data_product reports no problems:
+  - every data model table exists with its columns, Parquet column types match the data model
+  - primary keys are unique and never empty
+  - every foreign key value exists in the referenced table
+  - Type 2 dimensions have exactly one current version per business key, and only current versions have an open expiration date
 
 REPORTING:
 - Provide clear success/failure status
-- Include execution logs and outputs
-- Detail any errors encountered
+- Include execution logs and outputs, run duration and peak memory
+- Detail any errors encountered, including the validation problems
 - Suggest specific fixes for failures
+- When profiled, name the top hotspots (line, code, operation, share of time, peak memory) so the slow step can be targeted when the code is regenerated
 """
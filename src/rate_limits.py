@@ -0,0 +1,288 @@
+import asyncio
+import contextlib
+import json
+import threading
+import time
+from typing import Any, AsyncIterable, AsyncIterator, Dict, Optional
+
+from strands.models import Model
+from strands.types.exceptions import ModelThrottledException
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket that hands out reservations instead of blocking.
+
+    reserve() debits the bucket immediately (it may go negative) and returns how
+    long the caller must wait, so it works from any thread or event loop and
+    callers are served in arrival order.
+    """
+
+    def __init__(self, rate_per_second: float, capacity: float):
+        self.rate = rate_per_second
+        self.capacity = capacity
+        self.tokens = capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def _refill(self, now: float) -> None:
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def reserve(self, amount: float) -> float:
+        """Takes amount tokens and returns the seconds to wait before using them."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens -= amount
+            return max(0.0, -self.tokens / self.rate)
+
+    def adjust(self, amount: float) -> None:
+        """Debits (positive) or credits (negative) tokens after the real cost is known."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.capacity, self.tokens - amount)
+
+    def drain(self) -> None:
+        """Empties the bucket so queued callers wait for a full refill interval."""
+        with self._lock:
+            self._refill(time.monotonic())
+            self.tokens = min(self.tokens, 0.0)
+
+    def set_rate(self, rate_per_second: float) -> None:
+        with self._lock:
+            self._refill(time.monotonic())
+            self.rate = rate_per_second
+
+
+class ModelRateLimiter:
+    """
+    Requests-per-minute and tokens-per-minute limiter for one model id.
+
+    Quotas come from config.json. Token cost is estimated from the request
+    before it is sent and corrected with the usage the model reports. The
+    allowed rate is halved when Bedrock throttles (at most once per cooldown
+    window) and recovers gradually on successful calls, so there is no fixed
+    sleep between calls.
+    """
+
+    def __init__(
+        self,
+        requests_per_minute: Optional[float] = None,
+        tokens_per_minute: Optional[float] = None,
+        backoff_factor: float = 0.5,
+        recovery_factor: float = 1.1,
+        min_rate_fraction: float = 0.1,
+        backoff_cooldown: float = 5.0
+    ):
+        self.requests_per_minute = requests_per_minute
+        self.tokens_per_minute = tokens_per_minute
+        self.backoff_factor = backoff_factor
+        self.recovery_factor = recovery_factor
+        self.min_rate_fraction = min_rate_fraction
+        self.backoff_cooldown = backoff_cooldown
+        self.rate_fraction = 1.0
+        self.last_backoff = float('-inf')
+        self.throttle_count = 0
+        self.waited_seconds = 0.0
+        self._lock = threading.Lock()
+        self.request_bucket = (
+            TokenBucket(requests_per_minute / 60, requests_per_minute) if requests_per_minute else None
+        )
+        self.token_bucket = (
+            TokenBucket(tokens_per_minute / 60, tokens_per_minute) if tokens_per_minute else None
+        )
+
+    async def acquire(self, estimated_tokens: int) -> None:
+        """Waits until a request of about estimated_tokens may be sent."""
+        wait = 0.0
+        if self.request_bucket:
+            wait = max(wait, self.request_bucket.reserve(1))
+        if self.token_bucket:
+            wait = max(wait, self.token_bucket.reserve(estimated_tokens))
+        if wait > 0:
+            with self._lock:
+                self.waited_seconds += wait
+            await asyncio.sleep(wait)
+
+    def record_usage(self, estimated_tokens: int, actual_tokens: int) -> None:
+        """Corrects the token bucket once the model reports the real usage."""
+        if self.token_bucket:
+            self.token_bucket.adjust(actual_tokens - estimated_tokens)
+
+    def on_success(self) -> None:
+        with self._lock:
+            if self.rate_fraction < 1.0:
+                self.rate_fraction = min(1.0, self.rate_fraction * self.recovery_factor)
+                self._apply_rate()
+
+    def on_throttle(self) -> None:
+        with self._lock:
+            self.throttle_count += 1
+            # Concurrent requests are often throttled together; count that burst as one signal
+            now = time.monotonic()
+            if now - self.last_backoff >= self.backoff_cooldown:
+                self.last_backoff = now
+                self.rate_fraction = max(self.min_rate_fraction, self.rate_fraction * self.backoff_factor)
+                self._apply_rate()
+        for bucket in (self.request_bucket, self.token_bucket):
+            if bucket:
+                bucket.drain()
+
+    def _apply_rate(self) -> None:
+        if self.request_bucket:
+            self.request_bucket.set_rate(self.requests_per_minute / 60 * self.rate_fraction)
+        if self.token_bucket:
+            self.token_bucket.set_rate(self.tokens_per_minute / 60 * self.rate_fraction)
+
+    def stats(self) -> Dict[str, float]:
+        return {
+            'rate_fraction': round(self.rate_fraction, 3),
+            'throttle_count': self.throttle_count,
+            'waited_seconds': round(self.waited_seconds, 3),
+        }
+
+
+class ModelConcurrencyLimits:
+    """
+    Caps how many agent invocations talk to the same model id at once.
+
+    Quotas bound the request rate, but a batch of cases started together still
+    opens one conversation per case with every model. Slots are asyncio
+    semaphores, so one instance serves the coroutines of a single event loop
+    (one batch run).
+    """
+
+    def __init__(self, model_concurrency: Optional[Dict[str, int]] = None, default: Optional[int] = None):
+        """
+        Args:
+            model_concurrency: Mapping of model id to the maximum number of concurrent invocations
+            default: Limit for model ids not in model_concurrency (default: unlimited)
+        """
+        self.model_concurrency = dict(model_concurrency or {})
+        self.default = default
+        self.waited_seconds: Dict[str, float] = {}
+        self._semaphores: Dict[str, asyncio.Semaphore] = {}
+
+    def _semaphore(self, model_id: Optional[str]) -> Optional[asyncio.Semaphore]:
+        limit = self.model_concurrency.get(model_id, self.default)
+        if not limit:
+            return None
+        if model_id not in self._semaphores:
+            self._semaphores[model_id] = asyncio.Semaphore(limit)
+        return self._semaphores[model_id]
+
+    @contextlib.asynccontextmanager
+    async def slot(self, model_id: Optional[str]) -> AsyncIterator[None]:
+        """Holds one of the model's slots for the duration of the block."""
+        semaphore = self._semaphore(model_id)
+        if semaphore is None:
+            yield
+            return
+        started = time.perf_counter()
+        async with semaphore:
+            self.waited_seconds[model_id] = self.waited_seconds.get(model_id, 0.0) + time.perf_counter() - started
+            yield
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        return {
+            model_id: {'limit': self.model_concurrency.get(model_id, self.default),
+                       'waited_seconds': round(self.waited_seconds.get(model_id, 0.0), 3)}
+            for model_id in self._semaphores
+        }
+
+
+_limiters: Dict[str, ModelRateLimiter] = {}
+
+
+def configure_rate_limits(rate_limits: Optional[Dict[str, Dict[str, Any]]]) -> None:
+    """
+    Sets the per-model quotas used by every RateLimitedModel.
+
+    Args:
+        rate_limits: Mapping of Bedrock model id to ModelRateLimiter arguments, e.g.
+            {"us.amazon.nova-pro-v1:0": {"requests_per_minute": 100, "tokens_per_minute": 400000}},
+            typically the "rate_limits" entry of config.json
+    """
+    _limiters.clear()
+    for model_id, limits in (rate_limits or {}).items():
+        _limiters[model_id] = ModelRateLimiter(**limits)
+
+
+def get_rate_limiter(model_id: str) -> Optional[ModelRateLimiter]:
+    """Returns the limiter configured for a model id, or None if it is unlimited."""
+    return _limiters.get(model_id)
+
+
+def rate_limit_stats() -> Dict[str, Dict[str, float]]:
+    """Returns backoff and waiting statistics for every configured model."""
+    return {model_id: limiter.stats() for model_id, limiter in _limiters.items()}
+
+
+def _estimate_tokens(messages: Any, system_prompt: Optional[str]) -> int:
+    # Roughly four characters per token; corrected later from reported usage
+    return (len(json.dumps(messages, default=str)) + len(system_prompt or "")) // 4
+
+
+class RateLimitedModel(Model):
+    """
+    Model wrapper that applies the configured quota of the wrapped model id.
+
+    The limiter is looked up on every request, so quotas configured after the
+    agents were built still apply. Models without a configured quota pass
+    straight through.
+    """
+
+    def __init__(self, model: Model):
+        self.model = model
+
+    @property
+    def model_id(self) -> Optional[str]:
+        config = self.model.get_config()
+        return config.get('model_id') if isinstance(config, dict) else getattr(config, 'model_id', None)
+
+    def update_config(self, **model_config: Any) -> None:
+        self.model.update_config(**model_config)
+
+    def get_config(self) -> Any:
+        return self.model.get_config()
+
+    def structured_output(self, output_model, prompt, system_prompt=None, **kwargs):
+        return self.model.structured_output(output_model, prompt, system_prompt=system_prompt, **kwargs)
+
+    async def stream(
+        self,
+        messages,
+        tool_specs=None,
+        system_prompt: Optional[str] = None,
+        **kwargs: Any
+    ) -> AsyncIterable[Any]:
+        limiter = get_rate_limiter(self.model_id)
+        if limiter is None:
+            async for event in self.model.stream(messages, tool_specs, system_prompt, **kwargs):
+                yield event
+            return
+
+        estimated = _estimate_tokens(messages, system_prompt)
+        await limiter.acquire(estimated)
+        try:
+            async for event in self.model.stream(messages, tool_specs, system_prompt, **kwargs):
+                usage = event.get('metadata', {}).get('usage') if isinstance(event, dict) else None
+                if usage:
+                    limiter.record_usage(estimated, usage.get('totalTokens', estimated))
+                yield event
+        except ModelThrottledException:
+            # Strands retries throttled calls with its own delay; slow everyone down meanwhile
+            limiter.on_throttle()
+            raise
+        limiter.on_success()
+
+    def __getattr__(self, name: str) -> Any:
+        # Expose provider specific attributes (e.g. config, client) of the wrapped model
+        if name == 'model':
+            raise AttributeError(name)
+        return getattr(self.model, name)
+
+
+def rate_limited(model: Model) -> RateLimitedModel:
+    """Wraps a model so calls respect the quota configured for its model id."""
+    return model if isinstance(model, RateLimitedModel) else RateLimitedModel(model)
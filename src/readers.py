@@ -0,0 +1,270 @@
+import os
+from typing import List, Dict, Any, Optional, Iterator, Tuple
+
+from lazy_imports import lazy_module
+
+# Imported on first use, so that importing the workflow does not load them
+pd = lazy_module('pandas')
+# pyarrow is optional, pandas is used for everything without it
+pa = lazy_module('pyarrow', optional=True)
+pa_csv = lazy_module('pyarrow.csv', optional=True)
+pq = lazy_module('pyarrow.parquet', optional=True)
+
+
+COMPRESSION_SUFFIXES = {'.gz': 'gzip', '.zst': 'zstd', '.zstd': 'zstd'}
+CSV_SUFFIXES = ('.csv',)
+JSONL_SUFFIXES = ('.jsonl', '.ndjson')
+PARQUET_SUFFIXES = ('.parquet', '.pq')
+
+# Block size used by the pyarrow CSV reader; sampling reads only the first blocks
+ARROW_BLOCK_SIZE = 1 << 20
+
+# Cells pd.read_csv reads as missing by default; the pyarrow reader is given the same list
+PANDAS_NA_VALUES = ['', '#N/A', '#N/A N/A', '#NA', '-1.#IND', '-1.#QNAN', '-NaN', '-nan', '1.#IND', '1.#QNAN',
+                    '<NA>', 'N/A', 'NA', 'NULL', 'NaN', 'None', 'n/a', 'nan', 'null']
+
+
+def detect_format(file_path: str) -> Optional[Tuple[str, Optional[str]]]:
+    """
+    Detects the source format and compression of a file from its name.
+
+    Args:
+        file_path: Path of the source file
+
+    Returns:
+        Tuple of (format, compression) where format is 'csv', 'jsonl' or 'parquet',
+        or None if the file is not a supported source
+    """
+    name = file_path.lower()
+    compression = None
+    for suffix, codec in COMPRESSION_SUFFIXES.items():
+        if name.endswith(suffix):
+            compression = codec
+            name = name[:-len(suffix)]
+            break
+
+    if name.endswith(CSV_SUFFIXES):
+        return 'csv', compression
+    if name.endswith(JSONL_SUFFIXES):
+        return 'jsonl', compression
+    # Parquet compresses pages internally, a compressed .parquet.gz is not readable in place
+    if name.endswith(PARQUET_SUFFIXES) and compression is None:
+        return 'parquet', None
+    return None
+
+
+def _use_arrow_csv(engine: str, csv_kwargs: Optional[Dict]) -> bool:
+    """Decides whether the pyarrow CSV reader should be used for a read."""
+    if engine == 'pyarrow':
+        if pa is None:
+            raise ImportError("engine='pyarrow' requires the pyarrow package")
+        if csv_kwargs:
+            raise ValueError("csv_kwargs are pandas options and cannot be used with engine='pyarrow'")
+        return True
+    if engine == 'auto':
+        # pandas-specific read options are only honoured by the pandas parser
+        return pa is not None and not csv_kwargs
+    if engine == 'c':
+        return False
+    raise ValueError(f"Unknown reader engine '{engine}', expected 'auto', 'pyarrow' or 'c'")
+
+
+def _arrow_to_pandas(table: "pa.Table") -> "pd.DataFrame":
+    """
+    Converts an Arrow table to pandas with the dtypes the pandas CSV parser would give.
+
+    pyarrow infers dates and timestamps while pd.read_csv keeps them as strings;
+    casting them back keeps profiles identical whichever engine read the file.
+    """
+    for i, field in enumerate(table.schema):
+        if pa.types.is_date(field.type) or pa.types.is_timestamp(field.type):
+            table = table.set_column(i, field.name, table.column(i).cast(pa.string()))
+    return table.to_pandas()
+
+
+def _read_arrow_csv_head(file_path: str, nrows: int, encoding: str, compression: Optional[str]) -> "pd.DataFrame":
+    """Reads the first nrows of a (possibly compressed) CSV with the streaming pyarrow reader."""
+    read_options = pa_csv.ReadOptions(encoding=encoding, use_threads=True, block_size=ARROW_BLOCK_SIZE)
+    # Without these, empty and 'NA' cells of string columns come back as '' and 'NA' instead of NaN
+    convert_options = pa_csv.ConvertOptions(strings_can_be_null=True, null_values=PANDAS_NA_VALUES)
+    batches = []
+    rows = 0
+    with pa.input_stream(file_path, compression=compression) as stream:
+        reader = pa_csv.open_csv(stream, read_options=read_options, convert_options=convert_options)
+        for batch in reader:
+            batches.append(batch)
+            rows += batch.num_rows
+            if rows >= nrows:
+                break
+        table = pa.Table.from_batches(batches, schema=reader.schema)
+    return _arrow_to_pandas(table.slice(0, nrows))
+
+
+def read_sample(
+    file_path: str,
+    nrows: int,
+    encoding: str = 'utf-8',
+    csv_kwargs: Optional[Dict] = None,
+    engine: str = 'auto'
+) -> "pd.DataFrame":
+    """
+    Reads the first rows of a source file into a DataFrame.
+
+    Args:
+        file_path: Path of the source file
+        nrows: Number of rows to read
+        encoding: Character encoding for text formats (default: 'utf-8')
+        csv_kwargs: Additional keyword arguments to pass to pd.read_csv
+        engine: CSV parser, 'auto' (pyarrow if installed), 'pyarrow' or 'c' (default: 'auto')
+
+    Returns:
+        DataFrame with at most nrows rows
+    """
+    detected = detect_format(file_path)
+    if detected is None:
+        raise ValueError(f"Unsupported source file format: '{file_path}'")
+    fmt, compression = detected
+
+    if fmt == 'csv':
+        if _use_arrow_csv(engine, csv_kwargs):
+            return _read_arrow_csv_head(file_path, nrows, encoding, compression)
+        # The codec is passed explicitly, pandas and pyarrow do not infer it from ".zstd"
+        kwargs = {'compression': compression, **(csv_kwargs or {})}
+        return pd.read_csv(file_path, encoding=encoding, nrows=nrows, **kwargs)
+
+    if fmt == 'jsonl':
+        return pd.read_json(file_path, lines=True, nrows=nrows, encoding=encoding, convert_dates=False,
+                            compression=compression)
+
+    if pa is None:
+        raise ImportError("Reading Parquet files requires the pyarrow package")
+    parquet_file = pq.ParquetFile(file_path)
+    batch = next(parquet_file.iter_batches(batch_size=max(nrows, 1)), None)
+    if batch is None:
+        return parquet_file.schema_arrow.empty_table().to_pandas()
+    return pa.Table.from_batches([batch]).slice(0, nrows).to_pandas()
+
+
+def iter_chunks(
+    file_path: str,
+    chunksize: int,
+    encoding: str = 'utf-8',
+    csv_kwargs: Optional[Dict] = None
+) -> Iterator["pd.DataFrame"]:
+    """
+    Streams a whole source file as DataFrame chunks with bounded memory.
+
+    CSV and JSONL chunks are parsed independently by pandas, so each chunk gets
+    its own dtype inference, which is what type-promotion tracking relies on.
+
+    Args:
+        file_path: Path of the source file
+        chunksize: Number of rows per chunk
+        encoding: Character encoding for text formats (default: 'utf-8')
+        csv_kwargs: Additional keyword arguments to pass to pd.read_csv
+
+    Yields:
+        DataFrame chunks in file order
+    """
+    detected = detect_format(file_path)
+    if detected is None:
+        raise ValueError(f"Unsupported source file format: '{file_path}'")
+    fmt, compression = detected
+
+    if fmt == 'csv':
+        kwargs = {'compression': compression, **(csv_kwargs or {})}
+        with pd.read_csv(file_path, encoding=encoding, chunksize=chunksize, **kwargs) as reader:
+            yield from reader
+    elif fmt == 'jsonl':
+        with pd.read_json(file_path, lines=True, chunksize=chunksize, encoding=encoding,
+                          convert_dates=False, compression=compression) as reader:
+            yield from reader
+    else:
+        if pa is None:
+            raise ImportError("Reading Parquet files requires the pyarrow package")
+        parquet_file = pq.ParquetFile(file_path)
+        for batch in parquet_file.iter_batches(batch_size=chunksize):
+            yield pa.Table.from_batches([batch]).to_pandas()
+
+
+def _statistic_value(value: Any) -> Any:
+    """Converts a Parquet statistics value to something JSON friendly."""
+    if isinstance(value, (str, int, float, bool)) or value is None:
+        return value
+    return str(value)
+
+
+def parquet_footer_metadata(file_path: str) -> Dict:
+    """
+    Reads whole-file statistics from a Parquet footer without touching data pages.
+
+    Null counts and min/max are aggregated over row groups and only reported
+    for columns whose statistics are present in every row group.
+
+    Args:
+        file_path: Path of the Parquet file
+
+    Returns:
+        Dictionary with 'row_count', 'dtypes', 'null_counts', 'min_values' and 'max_values'
+    """
+    if pa is None:
+        raise ImportError("Reading Parquet files requires the pyarrow package")
+    parquet_file = pq.ParquetFile(file_path)
+    metadata = parquet_file.metadata
+    schema = parquet_file.schema_arrow
+    top_level = set(schema.names)
+
+    null_counts: Dict[str, Optional[int]] = {}
+    min_values: Dict[str, Any] = {}
+    max_values: Dict[str, Any] = {}
+    for rg in range(metadata.num_row_groups):
+        row_group = metadata.row_group(rg)
+        for ci in range(row_group.num_columns):
+            column = row_group.column(ci)
+            name = column.path_in_schema
+            if name not in top_level:
+                continue
+            stats = column.statistics
+            if stats is None or not stats.has_null_count:
+                null_counts[name] = None
+            elif null_counts.get(name, 0) is not None:
+                null_counts[name] = null_counts.get(name, 0) + stats.null_count
+
+            if stats is None or not stats.has_min_max:
+                min_values[name] = max_values[name] = None
+            elif rg == 0 or min_values.get(name) is not None:
+                # Compare first and convert last, str() of e.g. dates would not order correctly
+                current_min, current_max = min_values.get(name), max_values.get(name)
+                min_values[name] = stats.min if current_min is None else min(current_min, stats.min)
+                max_values[name] = stats.max if current_max is None else max(current_max, stats.max)
+
+    return {
+        'row_count': metadata.num_rows,
+        'dtypes': {name: str(dtype) for name, dtype in schema.empty_table().to_pandas().dtypes.items()},
+        'null_counts': {name: count for name, count in null_counts.items() if count is not None},
+        'min_values': {name: _statistic_value(v) for name, v in min_values.items() if v is not None},
+        'max_values': {name: _statistic_value(v) for name, v in max_values.items() if v is not None},
+    }
+
+
+def list_source_files(source_data_folder_path: str) -> List[str]:
+    """
+    Recursively lists supported source files under a folder in a deterministic order.
+
+    Args:
+        source_data_folder_path: Path to the folder containing source files
+
+    Returns:
+        Sorted list of full source file paths
+    """
+    source_paths = []
+
+    # Walk through all subdirectories, sorting so results do not depend on
+    # the order the filesystem happens to return entries in
+    for root, dirs, files in os.walk(source_data_folder_path):
+        dirs.sort()
+        for f in sorted(files):
+            if detect_format(f) is not None:
+                source_paths.append(os.path.join(root, f))
+
+    return source_paths
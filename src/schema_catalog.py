@@ -0,0 +1,283 @@
+import hashlib
+import json
+import os
+import sqlite3
+import threading
+from datetime import datetime
+from typing import Any, Dict, List, Optional
+
+from schema_digest import path_pattern, structure_signature
+
+
+class SchemaCatalog:
+    """
+    SQLite index of the source files, columns and profile statistics seen by
+    every extract_csv_schemas run.
+
+    A run is stored only when the folder differs from its latest run, and the
+    newest keep_runs runs of a folder are kept, so the catalog answers lookups
+    such as "which files contain column X" without re-profiling, and reports
+    schema drift between runs, without growing with every extraction. Paths
+    are stored relative to the source folder, as in the extract_csv_schemas
+    result.
+    """
+
+    def __init__(self, db_path: str, keep_runs: int = 10):
+        db_dir = os.path.dirname(os.path.abspath(db_path))
+        if not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+        self.db_path = db_path
+        self.keep_runs = keep_runs
+        self._lock = threading.Lock()
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS catalog_runs (
+                run_id INTEGER PRIMARY KEY AUTOINCREMENT,
+                source_folder TEXT NOT NULL,
+                created_at TEXT NOT NULL,
+                file_count INTEGER NOT NULL,
+                snapshot_hash TEXT
+            );
+            CREATE TABLE IF NOT EXISTS catalog_files (
+                run_id INTEGER NOT NULL,
+                file_path TEXT NOT NULL,
+                source_format TEXT,
+                structure_hash TEXT,
+                num_columns INTEGER,
+                row_count INTEGER,
+                size INTEGER,
+                error TEXT,
+                PRIMARY KEY (run_id, file_path)
+            );
+            CREATE TABLE IF NOT EXISTS catalog_columns (
+                run_id INTEGER NOT NULL,
+                file_path TEXT NOT NULL,
+                position INTEGER NOT NULL,
+                column_name TEXT NOT NULL,
+                dtype TEXT,
+                null_count INTEGER,
+                unique_count INTEGER,
+                example_values TEXT,
+                PRIMARY KEY (run_id, file_path, column_name)
+            );
+            CREATE INDEX IF NOT EXISTS catalog_runs_folder ON catalog_runs (source_folder, run_id);
+            CREATE INDEX IF NOT EXISTS catalog_files_structure ON catalog_files (run_id, structure_hash);
+            CREATE INDEX IF NOT EXISTS catalog_columns_name ON catalog_columns (run_id, column_name COLLATE NOCASE);
+            """
+        )
+        # Catalogs created before runs were compared lack the snapshot hash
+        run_columns = {row[1] for row in self.conn.execute("PRAGMA table_info(catalog_runs)")}
+        if 'snapshot_hash' not in run_columns:
+            self.conn.execute("ALTER TABLE catalog_runs ADD COLUMN snapshot_hash TEXT")
+        self.conn.commit()
+
+    def record_run(self, source_folder: str, schemas: Dict[str, Dict]) -> int:
+        """
+        Stores an extract_csv_schemas result as a new run of source_folder.
+
+        Nothing is stored when files, columns and statistics equal those of the
+        latest run. Runs beyond keep_runs are pruned after a new one is stored.
+
+        Returns:
+            The id of the new run, or of the latest run if nothing changed
+        """
+        folder = os.path.abspath(source_folder)
+        files, columns = [], []
+        for file_path, file_schema in schemas.items():
+            try:
+                size = os.path.getsize(os.path.join(folder, file_path))
+            except OSError:
+                size = None
+            if file_schema.get('status') == 'failed':
+                files.append((file_path, None, None, None, None, size, file_schema.get('error')))
+                continue
+            files.append((
+                file_path, file_schema.get('source_format'), structure_signature(file_schema),
+                file_schema.get('num_columns'), file_schema.get('row_count', file_schema.get('sample_size')),
+                size, None
+            ))
+            dtypes = file_schema.get('dtypes', {})
+            null_counts = file_schema.get('null_counts', {})
+            unique_counts = file_schema.get('unique_counts', {})
+            examples = file_schema.get('example_values', {})
+            for position, column in enumerate(file_schema.get('columns', [])):
+                columns.append((
+                    file_path, position, column, dtypes.get(column), null_counts.get(column),
+                    unique_counts.get(column), json.dumps(examples.get(column, []), default=str)
+                ))
+
+        files.sort()
+        columns.sort()
+        snapshot_hash = hashlib.sha1(json.dumps([files, columns]).encode('utf-8')).hexdigest()
+
+        with self._lock:
+            latest = self.conn.execute(
+                "SELECT run_id, snapshot_hash FROM catalog_runs WHERE source_folder = ? ORDER BY run_id DESC LIMIT 1",
+                (folder,)
+            ).fetchone()
+            if latest is not None and latest[1] == snapshot_hash:
+                return latest[0]
+            cursor = self.conn.execute(
+                "INSERT INTO catalog_runs (source_folder, created_at, file_count, snapshot_hash) VALUES (?, ?, ?, ?)",
+                (folder, datetime.now().isoformat(), len(files), snapshot_hash)
+            )
+            run_id = cursor.lastrowid
+            self.conn.executemany("INSERT INTO catalog_files VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                  [(run_id, *row) for row in files])
+            self.conn.executemany("INSERT INTO catalog_columns VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                                  [(run_id, *row) for row in columns])
+            self.conn.commit()
+        self.prune(folder, self.keep_runs)
+        return run_id
+
+    def runs(self, source_folder: str) -> List[Dict[str, Any]]:
+        """Runs of a source folder, newest first."""
+        rows = self.conn.execute(
+            "SELECT run_id, created_at, file_count FROM catalog_runs WHERE source_folder = ? ORDER BY run_id DESC",
+            (os.path.abspath(source_folder),)
+        ).fetchall()
+        return [{'run_id': run_id, 'created_at': created_at, 'files': count} for run_id, created_at, count in rows]
+
+    def latest_run(self, source_folder: str, before: Optional[int] = None) -> Optional[int]:
+        """Id of the newest run of a source folder, optionally older than run id before."""
+        row = self.conn.execute(
+            "SELECT MAX(run_id) FROM catalog_runs WHERE source_folder = ? AND run_id < ?",
+            (os.path.abspath(source_folder), before if before is not None else 2 ** 63 - 1)
+        ).fetchone()
+        return row[0]
+
+    def files_with_column(self, source_folder: str, column: str, run_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """
+        Files of a run (default: the latest) that contain a column.
+
+        The name is matched case-insensitively; '*' works as a wildcard.
+        """
+        run_id = run_id or self.latest_run(source_folder)
+        if '*' in column:
+            # '%' and '_' in column names are literal, only '*' is a wildcard
+            escaped = column.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_')
+            condition, value = "LIKE ? ESCAPE '\\'", escaped.replace('*', '%')
+        else:
+            condition, value = "= ? COLLATE NOCASE", column
+        rows = self.conn.execute(
+            f"""
+            SELECT c.file_path, c.column_name, c.dtype, c.null_count, c.unique_count, f.structure_hash
+            FROM catalog_columns c JOIN catalog_files f ON f.run_id = c.run_id AND f.file_path = c.file_path
+            WHERE c.run_id = ? AND c.column_name {condition}
+            ORDER BY c.file_path
+            """,
+            (run_id, value)
+        )
+        keys = ('file_path', 'column', 'dtype', 'null_count', 'unique_count', 'structure_hash')
+        return [dict(zip(keys, row)) for row in rows]
+
+    def shared_schemas(self, source_folder: str, run_id: Optional[int] = None) -> List[Dict[str, Any]]:
+        """Groups the files of a run (default: the latest) by identical structure, largest group first."""
+        run_id = run_id or self.latest_run(source_folder)
+        groups: Dict[str, List[str]] = {}
+        for structure_hash, file_path in self.conn.execute(
+            "SELECT structure_hash, file_path FROM catalog_files "
+            "WHERE run_id = ? AND structure_hash IS NOT NULL ORDER BY file_path",
+            (run_id,)
+        ):
+            groups.setdefault(structure_hash, []).append(file_path)
+        result = []
+        for structure_hash, paths in sorted(groups.items(), key=lambda item: -len(item[1])):
+            columns = self.conn.execute(
+                "SELECT column_name, dtype FROM catalog_columns WHERE run_id = ? AND file_path = ? ORDER BY position",
+                (run_id, paths[0])
+            ).fetchall()
+            result.append({'structure_hash': structure_hash, 'files': len(paths), 'pattern': path_pattern(paths),
+                           'columns': [f"{name}:{dtype}" for name, dtype in columns]})
+        return result
+
+    def schema_drift(self, source_folder: str, run_id: Optional[int] = None,
+                     since_run_id: Optional[int] = None) -> Dict[str, Any]:
+        """
+        Compares a run (default: the latest) with an earlier one (default: the run before it).
+
+        Returns:
+            Dictionary with the compared run ids, added files (and whether their structure was
+            already known), removed files, and per-file added/removed columns and type changes
+        """
+        run_id = run_id or self.latest_run(source_folder)
+        since_run_id = since_run_id or self.latest_run(source_folder, before=run_id)
+        drift = {'run_id': run_id, 'since_run_id': since_run_id, 'added_files': [], 'removed_files': [],
+                 'changed_files': {}, 'new_structures': 0}
+        if run_id is None or since_run_id is None:
+            return drift
+
+        known = {row[0] for row in self.conn.execute(
+            "SELECT DISTINCT structure_hash FROM catalog_files WHERE run_id = ?", (since_run_id,))}
+        file_diff = """
+            SELECT new.file_path, new.structure_hash FROM catalog_files new
+            LEFT JOIN catalog_files old ON old.run_id = ? AND old.file_path = new.file_path
+            WHERE new.run_id = ? AND old.file_path IS NULL ORDER BY new.file_path
+        """
+        new_structures = set()
+        for file_path, structure_hash in self.conn.execute(file_diff, (since_run_id, run_id)):
+            drift['added_files'].append({'file_path': file_path, 'known_structure': structure_hash in known})
+            if structure_hash not in known:
+                new_structures.add(structure_hash)
+        drift['new_structures'] = len(new_structures)
+        drift['removed_files'] = [row[0] for row in self.conn.execute(file_diff, (run_id, since_run_id))]
+
+        column_diff = """
+            SELECT new.file_path, new.column_name, new.dtype FROM catalog_columns new
+            JOIN catalog_files old_file ON old_file.run_id = ? AND old_file.file_path = new.file_path
+            LEFT JOIN catalog_columns old
+                ON old.run_id = old_file.run_id AND old.file_path = new.file_path AND old.column_name = new.column_name
+            WHERE new.run_id = ? AND old.column_name IS NULL
+        """
+        changes = drift['changed_files']
+        for file_path, column, dtype in self.conn.execute(column_diff, (since_run_id, run_id)):
+            changes.setdefault(file_path, {}).setdefault('added_columns', {})[column] = dtype
+        for file_path, column, dtype in self.conn.execute(column_diff, (run_id, since_run_id)):
+            changes.setdefault(file_path, {}).setdefault('removed_columns', {})[column] = dtype
+        for file_path, column, old_dtype, new_dtype in self.conn.execute(
+            """
+            SELECT new.file_path, new.column_name, old.dtype, new.dtype FROM catalog_columns new
+            JOIN catalog_columns old
+                ON old.run_id = ? AND old.file_path = new.file_path AND old.column_name = new.column_name
+            WHERE new.run_id = ? AND old.dtype IS NOT new.dtype
+            """,
+            (since_run_id, run_id)
+        ):
+            changes.setdefault(file_path, {}).setdefault('type_changes', {})[column] = [old_dtype, new_dtype]
+        return drift
+
+    def prune(self, source_folder: str, keep_runs: int = 10) -> int:
+        """Deletes all but the newest keep_runs runs of a source folder and returns how many were deleted."""
+        old_runs = [(run['run_id'],) for run in self.runs(source_folder)[keep_runs:]]
+        with self._lock:
+            for table in ('catalog_columns', 'catalog_files', 'catalog_runs'):
+                self.conn.executemany(f"DELETE FROM {table} WHERE run_id = ?", old_runs)
+            self.conn.commit()
+        return len(old_runs)
+
+    def close(self) -> None:
+        self.conn.close()
+
+
+_catalog: Optional[SchemaCatalog] = None
+
+
+def configure_schema_catalog(path: Optional[str] = None, keep_runs: int = 10) -> None:
+    """
+    Turns the schema catalog on (a SQLite file) or off (no path).
+
+    While it is on, every extract_csv_schemas run that changed the folder is recorded in it.
+
+    Args:
+        path: SQLite file holding the catalog, typically the "schema_catalog" entry of config.json
+        keep_runs: Runs kept per source folder (default: 10)
+    """
+    global _catalog
+    if _catalog is not None:
+        _catalog.close()
+    _catalog = SchemaCatalog(path, keep_runs) if path else None
+
+
+def get_schema_catalog() -> Optional[SchemaCatalog]:
+    return _catalog
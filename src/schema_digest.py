@@ -0,0 +1,161 @@
+import hashlib
+import json
+import os
+from typing import Any, Dict, List, Optional, Tuple
+
+
+# Short type names for the digest; anything else is shown as reported
+DTYPE_ALIASES = {
+    'int64': 'int', 'int32': 'int', 'Int64': 'int',
+    'float64': 'float', 'float32': 'float', 'Float64': 'float',
+    'bool': 'bool', 'boolean': 'bool',
+    'object': 'str', 'str': 'str', 'string': 'str',
+    'datetime64[ns]': 'datetime', 'datetime64[us]': 'datetime',
+}
+
+# Detail levels tried in order until the digest fits the token budget:
+# (example values per column, include null/unique counts)
+DETAIL_LEVELS = [(3, True), (1, True), (0, True), (0, False)]
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count, using the same four-characters-per-token rule as the rate limiter."""
+    return (len(text) + 3) // 4
+
+
+def short_dtype(dtype: Any) -> str:
+    dtype = str(dtype)
+    if dtype.startswith('datetime64'):
+        return 'datetime'
+    return DTYPE_ALIASES.get(dtype, dtype)
+
+
+def compact_value(value: Any, max_chars: int = 32) -> str:
+    """
+    Renders an example value for the digest.
+
+    Values longer than max_chars are cut and tagged with a short hash, so
+    distinct long values (ids, JSON blobs, free text) stay distinguishable.
+    """
+    text = str(value).replace('\n', ' ').replace('|', '/')
+    if len(text) <= max_chars:
+        return text
+    digest = hashlib.sha1(text.encode('utf-8')).hexdigest()[:6]
+    return f"{text[:max_chars]}…#{digest}"
+
+
+def structure_signature(file_schema: Dict) -> str:
+    """Hash of file format and column names/types; files with equal signatures are grouped."""
+    dtypes = file_schema.get('dtypes', {})
+    columns = [(column, short_dtype(dtypes.get(column))) for column in file_schema.get('columns', [])]
+    payload = json.dumps([file_schema.get('source_format', 'csv'), columns])
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()
+
+
+def path_pattern(paths: List[str]) -> str:
+    """Collapses the paths of a group into 'common_prefix*common_suffix'."""
+    if len(paths) == 1:
+        return paths[0]
+    prefix = os.path.commonprefix(paths)
+    suffix = os.path.commonprefix([path[len(prefix):][::-1] for path in paths])[::-1]
+    return f"{prefix}*{suffix}"
+
+
+def _group_schemas(schemas: Dict[str, Dict]) -> Tuple[List[Dict], List[Tuple[str, str]]]:
+    groups: Dict[str, Dict] = {}
+    failed = []
+    for path, file_schema in schemas.items():
+        if file_schema.get('status') == 'failed':
+            failed.append((path, str(file_schema.get('error', ''))))
+            continue
+        group = groups.setdefault(structure_signature(file_schema), {'paths': [], 'schemas': []})
+        group['paths'].append(path)
+        group['schemas'].append(file_schema)
+    return list(groups.values()), failed
+
+
+def _render_group(group: Dict, examples: int, with_stats: bool, max_example_chars: int) -> List[str]:
+    paths, file_schemas = group['paths'], group['schemas']
+    first = file_schemas[0]
+    fmt = first.get('source_format', 'csv')
+    rows = sum(s.get('row_count', s.get('sample_size', 0)) for s in file_schemas)
+    row_label = 'rows' if all('row_count' in s for s in file_schemas) else 'sampled rows'
+    header = f"{path_pattern(paths)} ({fmt}"
+    if len(paths) > 1:
+        header += f", {len(paths)} files"
+    lines = [f"{header}, {rows} {row_label})"]
+
+    dtypes = first.get('dtypes', {})
+    for column in first.get('columns', []):
+        line = f"  {column}:{short_dtype(dtypes.get(column))}"
+        if with_stats:
+            nulls = sum(s.get('null_counts', {}).get(column, 0) for s in file_schemas)
+            unique = max(s.get('unique_counts', {}).get(column, 0) for s in file_schemas)
+            line += f" nulls={nulls} uniq={unique}"
+        if examples:
+            values = first.get('example_values', {}).get(column, [])[:examples]
+            if values:
+                line += " ex=" + "|".join(compact_value(value, max_example_chars) for value in values)
+        lines.append(line)
+    return lines
+
+
+def digest_schemas(
+    schemas: Dict[str, Dict],
+    token_budget: int = 4000,
+    max_example_chars: int = 32
+) -> Dict[str, Any]:
+    """
+    Builds a compact, token-budgeted text digest of extract_csv_schemas output.
+
+    Structurally identical files (same format, column names and types, e.g.
+    daily partitions of one feed) become a single entry with a file count and
+    a path pattern. Long example values are truncated and hashed. If the digest
+    exceeds the budget, example values and then null/unique counts are dropped,
+    and as a last resort trailing groups are omitted with a note.
+
+    Args:
+        schemas: Output of extract_csv_schemas (relative path -> file schema)
+        token_budget: Approximate maximum number of tokens of the digest (default: 4000)
+        max_example_chars: Characters kept of each example value (default: 32)
+
+    Returns:
+        Dictionary with the 'digest' text and a 'report' of files, groups,
+        detail level and estimated tokens before and after
+    """
+    groups, failed = _group_schemas(schemas)
+    failed_lines = [f"FAILED {path}: {compact_value(error, 80)}" for path, error in failed]
+
+    for level, (examples, with_stats) in enumerate(DETAIL_LEVELS):
+        blocks = [_render_group(group, examples, with_stats, max_example_chars) for group in groups]
+        text = "\n".join(line for block in blocks for line in block + [""]) + "\n".join(failed_lines)
+        if estimate_tokens(text) <= token_budget:
+            break
+
+    omitted = 0
+    if estimate_tokens(text) > token_budget:
+        # Even names and types do not fit: keep as many whole groups as possible
+        kept, used = [], estimate_tokens("\n".join(failed_lines)) + 20
+        for block in blocks:
+            cost = estimate_tokens("\n".join(block)) + 1
+            if used + cost > token_budget:
+                break
+            kept.append(block)
+            used += cost
+        omitted = len(blocks) - len(kept)
+        text = "\n".join(line for block in kept for line in block + [""])
+        text += f"... {omitted} more file groups omitted to fit the token budget\n" + "\n".join(failed_lines)
+
+    original_tokens = estimate_tokens(json.dumps(schemas, default=str))
+    digest_tokens = estimate_tokens(text)
+    report = {
+        'files': len(schemas),
+        'groups': len(groups),
+        'failed_files': len(failed),
+        'omitted_groups': omitted,
+        'detail_level': level,
+        'original_tokens': original_tokens,
+        'digest_tokens': digest_tokens,
+        'tokens_saved': max(0, original_tokens - digest_tokens),
+    }
+    return {'digest': text.rstrip("\n"), 'report': report}
@@ -0,0 +1,470 @@
+"""
+Streaming workflow: tool arguments are parsed and written while the model is
+still generating them, and each stage starts as soon as its inputs are complete.
+
+The modeler passes the data model tables to pipe_delimited_string_to_csv and
+then repeats them in its final answer; the engineer passes the code to
+save_generated_code and usually repeats it too. The engineer therefore starts
+once the modeler's table argument is complete, and the code runner once the
+code fence is complete and written, each overlapping the previous agent's final
+answer.
+"""
+import asyncio
+import json
+import os
+import re
+import shutil
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+from instrumentation import trace_span
+from pipe_tables import PipeTableStreamWriter
+
+
+# Code extracted by save_generated_code; answers without a match are saved as they are
+CODE_FENCE_PATTERN = re.compile(r"```python\n(.*?)\n```", re.DOTALL)
+
+JSON_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+
+class PartialJsonStrings:
+    """
+    Decodes the top-level string values of a JSON object while its text is still arriving.
+
+    feed() takes the accumulated text (as in Strands' current_tool_use input) and
+    only scans what is new. Decoded pieces of each string value are passed to
+    on_text(key, text) and the whole value to on_complete(key, value) once its
+    closing quote arrives. Values of other types are passed whole to
+    on_value(key, value) and the end of the object is signalled by on_end().
+    """
+
+    def __init__(
+        self,
+        on_text: Callable[[str, str], None],
+        on_complete: Callable[[str, str], None],
+        on_value: Optional[Callable[[str, Any], None]] = None,
+        on_end: Optional[Callable[[], None]] = None
+    ):
+        self.on_text = on_text
+        self.on_complete = on_complete
+        self.on_value = on_value
+        self.on_end = on_end
+        self.ended = False
+        self._position = 0
+        self._state = 'key_start'
+        self._key: List[str] = []
+        self._value: List[str] = []
+        self._pending: List[str] = []
+        self._escape: Optional[str] = None
+        self._high_surrogate: Optional[int] = None
+        self._depth = 0
+        self._in_nested_string = False
+        self._raw: List[str] = []
+
+    def feed(self, text: str) -> None:
+        for char in text[self._position:]:
+            self._char(char)
+        self._position = len(text)
+        self._flush()
+
+    def _flush(self) -> None:
+        if self._pending:
+            text = ''.join(self._pending)
+            self._pending = []
+            self._value.append(text)
+            self.on_text(''.join(self._key), text)
+
+    def _emit(self, char: str) -> None:
+        if self._high_surrogate is not None:
+            high, self._high_surrogate = self._high_surrogate, None
+            if 0xDC00 <= ord(char) <= 0xDFFF:
+                char = chr(0x10000 + ((high - 0xD800) << 10) + (ord(char) - 0xDC00))
+            else:
+                self._pending.append(chr(high))
+        if 0xD800 <= ord(char) <= 0xDBFF:
+            self._high_surrogate = ord(char)
+            return
+        self._pending.append(char)
+
+    def _end(self) -> None:
+        self._state = 'end'
+        self.ended = True
+        if self.on_end is not None:
+            self.on_end()
+
+    def _other_complete(self) -> None:
+        try:
+            value = json.loads(''.join(self._raw))
+        except ValueError:
+            return
+        if self.on_value is not None:
+            self.on_value(''.join(self._key), value)
+
+    def _char(self, char: str) -> None:
+        state = self._state
+        if state == 'key_start':
+            if char == '"':
+                self._key, self._state = [], 'key'
+            elif char == '}':
+                self._end()
+        elif state == 'key':
+            if self._escape is not None:
+                self._key.append(JSON_ESCAPES.get(char, char))
+                self._escape = None
+            elif char == '\\':
+                self._escape = ''
+            elif char == '"':
+                self._state = 'colon'
+            else:
+                self._key.append(char)
+        elif state == 'colon':
+            if char == ':':
+                self._state = 'value_start'
+        elif state == 'value_start':
+            if char == '"':
+                self._value, self._state = [], 'string'
+            elif not char.isspace():
+                self._depth = 1 if char in '{[' else 0
+                self._in_nested_string = False
+                self._raw = [char]
+                self._state = 'other'
+        elif state == 'string':
+            self._string_char(char)
+        elif state == 'other':
+            # Collect numbers, literals, objects and arrays up to the next top-level separator
+            if char in ',}' and not self._depth and not self._in_nested_string:
+                self._other_complete()
+                if char == '}':
+                    self._end()
+                else:
+                    self._state = 'key_start'
+                return
+            self._raw.append(char)
+            if self._in_nested_string:
+                if self._escape is not None:
+                    self._escape = None
+                elif char == '\\':
+                    self._escape = ''
+                elif char == '"':
+                    self._in_nested_string = False
+            elif char == '"':
+                self._in_nested_string = True
+            elif char in '{[':
+                self._depth += 1
+            elif char in '}]' and self._depth:
+                self._depth -= 1
+
+    def _string_char(self, char: str) -> None:
+        if self._escape is not None:
+            if self._escape.startswith('u'):
+                self._escape += char
+                if len(self._escape) == 5:
+                    self._emit(chr(int(self._escape[1:], 16)))
+                    self._escape = None
+            elif char == 'u':
+                self._escape = 'u'
+            else:
+                self._emit(JSON_ESCAPES.get(char, char))
+                self._escape = None
+        elif char == '\\':
+            self._escape = ''
+        elif char == '"':
+            if self._high_surrogate is not None:
+                self._pending.append(chr(self._high_surrogate))
+                self._high_surrogate = None
+            self._flush()
+            self.on_complete(''.join(self._key), ''.join(self._value))
+            self._state = 'key_start'
+        else:
+            self._emit(char)
+
+
+def _replace_file(source: str, destination: str) -> None:
+    """Copies source next to destination, then renames it into place so readers never see a partial file."""
+    folder = os.path.dirname(os.path.abspath(destination))
+    os.makedirs(folder, exist_ok=True)
+    staging = os.path.join(folder, f".{os.path.basename(destination)}.partial")
+    shutil.copyfile(source, staging)
+    os.replace(staging, destination)
+
+
+class CodeFenceStreamWriter:
+    """
+    Writes the first ```python fence of streamed text to a staging file, line by line.
+
+    Mirrors save_generated_code: text without a python fence is saved as it is,
+    and on close the file is checked against CODE_FENCE_PATTERN so edge cases
+    the line scan reads differently (an empty or inline fence) match the tool.
+    """
+
+    def __init__(self):
+        handle, self.staging_path = tempfile.mkstemp(prefix="generated-", suffix=".py")
+        self._file = os.fdopen(handle, 'w')
+        self._partial = ""
+        self._raw: List[str] = []
+        self._in_code = False
+        self._first_line = True
+        self.fence_found = False
+        self.fence_closed = False
+        self.complete = False
+
+    def feed(self, text: str) -> None:
+        self._raw.append(text)
+        lines = (self._partial + text).split('\n')
+        self._partial = lines.pop()
+        for line in lines:
+            self._line(line)
+
+    def _line(self, line: str) -> None:
+        if self.complete:
+            return
+        if not self._in_code:
+            if line.startswith("```python"):
+                self._in_code = self.fence_found = True
+            return
+        if line.startswith("```"):
+            self.fence_closed = self.complete = True
+            return
+        self._file.write(line if self._first_line else '\n' + line)
+        self._first_line = False
+
+    def close(self) -> None:
+        if not self.complete and self._partial:
+            self._line(self._partial)
+        self._file.close()
+        content = ''.join(self._raw)
+        match = CODE_FENCE_PATTERN.search(content)
+        code = match.group(1) if match else content
+        with open(self.staging_path) as f:
+            streamed = f.read()
+        if streamed != code:
+            with open(self.staging_path, 'w') as f:
+                f.write(code)
+        self.complete = True
+
+    def commit(self, code_location: str) -> str:
+        _replace_file(self.staging_path, code_location)
+        os.remove(self.staging_path)
+        return code_location
+
+
+class DataModelStreamWriter:
+    """Converts streamed pipe-delimited tables to CSV files in a staging folder, keeping the text."""
+
+    def __init__(self):
+        self.staging_folder = tempfile.mkdtemp(prefix="data-model-")
+        self._writer = PipeTableStreamWriter(self.staging_folder)
+        self._text: List[str] = []
+        self.saved_files: Dict[str, str] = {}
+
+    @property
+    def text(self) -> str:
+        return ''.join(self._text)
+
+    def feed(self, text: str) -> None:
+        self._text.append(text)
+        self._writer.feed(text)
+
+    def close(self) -> None:
+        self.saved_files = self._writer.close()
+
+    def commit(self, data_model_output_folder: str) -> Dict[str, str]:
+        committed = {}
+        for table, path in self.saved_files.items():
+            committed[table] = os.path.join(data_model_output_folder, os.path.basename(path))
+            _replace_file(path, committed[table])
+        shutil.rmtree(self.staging_folder, ignore_errors=True)
+        return committed
+
+    def discard(self) -> Dict[str, str]:
+        shutil.rmtree(self.staging_folder, ignore_errors=True)
+        return {}
+
+
+# Tool name -> (argument streamed to the writer, argument naming its destination, writer class,
+# defaults of the arguments that change the written file names, which the writer assumes)
+STREAMED_TOOLS = {
+    'pipe_delimited_string_to_csv': ('schema_content', 'data_model_output_folder', DataModelStreamWriter,
+                                     {'file_prefix': 'table', 'detect_tables': True, 'single_output_file': None}),
+    'save_generated_code': ('content', 'code_location', CodeFenceStreamWriter, {}),
+}
+
+
+class _StreamedToolCall:
+    def __init__(self, name: str, on_ready: Callable[["_StreamedToolCall"], None]):
+        self.name = name
+        self.content_argument, self.destination_argument, writer_class, self.naming_defaults = STREAMED_TOOLS[name]
+        self.writer = writer_class()
+        self.destination: Optional[str] = None
+        self.naming: Dict[str, Any] = {}
+        self.content_complete = False
+        self.committed = None
+        self._on_ready = on_ready
+        self.parser = PartialJsonStrings(self._on_text, self._on_complete, self._on_value, self._commit)
+
+    def _on_text(self, argument: str, text: str) -> None:
+        if argument == self.content_argument:
+            self.writer.feed(text)
+
+    def _on_complete(self, argument: str, value: str) -> None:
+        if argument == self.content_argument:
+            self.writer.close()
+            self.content_complete = True
+        elif argument == self.destination_argument:
+            self.destination = value
+        elif argument in self.naming_defaults:
+            self.naming[argument] = value
+        self._commit()
+
+    def _on_value(self, argument: str, value: Any) -> None:
+        if argument in self.naming_defaults:
+            self.naming[argument] = value
+
+    def _commit(self) -> None:
+        if not (self.content_complete and self.destination) or self.committed is not None:
+            return
+        # Naming arguments may follow the content, so wait for the whole input when the tool has any
+        if self.naming_defaults and not self.parser.ended:
+            return
+        if any(self.naming.get(name, default) != default for name, default in self.naming_defaults.items()):
+            # The staged files use the default names; leave writing the files to the tool itself
+            self.committed = self.writer.discard()
+        else:
+            self.committed = self.writer.commit(self.destination)
+        self._on_ready(self)
+
+
+class StreamedToolInputs:
+    """
+    Routes the arguments of data model and code tool calls, while they stream,
+    to incremental writers, and signals when a call's output is written.
+
+    Feed it the current_tool_use entries of Agent.stream_async events. Files are
+    written to staging locations as the text arrives and moved into place once
+    the call's destination argument is known, before the tool itself runs.
+    Data model tables also wait for the rest of the call's input, and are left
+    to the tool when it names its files differently from the defaults.
+    """
+
+    def __init__(self):
+        self.calls: Dict[Tuple[str, str], _StreamedToolCall] = {}
+        self.ready: Dict[str, asyncio.Event] = {name: asyncio.Event() for name in STREAMED_TOOLS}
+        self.first: Dict[str, _StreamedToolCall] = {}
+
+    def on_tool_use(self, current_tool_use: Dict) -> None:
+        name = current_tool_use.get('name')
+        if name not in STREAMED_TOOLS:
+            return
+        # Tool use ids need only be unique within one agent's conversation
+        key = (name, current_tool_use.get('toolUseId'))
+        if key not in self.calls:
+            self.calls[key] = _StreamedToolCall(name, self._on_ready)
+        raw_input = current_tool_use.get('input')
+        if isinstance(raw_input, str):
+            self.calls[key].parser.feed(raw_input)
+
+    def _on_ready(self, call: _StreamedToolCall) -> None:
+        self.first.setdefault(call.name, call)
+        self.ready[call.name].set()
+
+
+async def _first_of(ready: asyncio.Event, task: asyncio.Task) -> bool:
+    """Waits until ready is set or task is done; True if ready came first."""
+    waiter = asyncio.ensure_future(ready.wait())
+    await asyncio.wait({waiter, task}, return_when=asyncio.FIRST_COMPLETED)
+    if not waiter.done():
+        waiter.cancel()
+    if ready.is_set():
+        return True
+    task.result()  # re-raise a failed stage
+    return False
+
+
+async def run_data_workflow_streaming(user_input: str, agents=None, execute_code: bool = True) -> Dict:
+    """
+    Runs modeler, engineer and code runner with overlapping stages.
+
+    The engineer starts as soon as the modeler's data model tables (its
+    pipe_delimited_string_to_csv argument) are complete, and the code runner as
+    soon as the engineer's code is written, instead of each waiting for the full
+    previous response. Without those tool calls, a stage waits for the previous
+    agent to finish, as in run_data_workflow_async.
+
+    Args:
+        user_input: Business case and folder locations, as for run_data_workflow
+        agents: WorkflowAgents to use (default: a fresh set from create_workflow_agents)
+        execute_code: Whether to run the code runner step (default: True)
+
+    Returns:
+        Dictionary with 'data_models', 'code' and 'execution' as in run_data_workflow_async,
+        per-step 'timings' in seconds, each step's start offset in 'started_at', whether
+        it started 'early', the streamed 'files' and the total 'seconds'
+    """
+    import workflow
+    if agents is None:
+        agents = workflow.create_workflow_agents()
+    streamed = StreamedToolInputs()
+    started = time.perf_counter()
+    timings, started_at, early = {}, {}, {}
+
+    async def run_stage(agent, prompt: str, step: str) -> str:
+        stage_started = time.perf_counter()
+        started_at[step] = round(stage_started - started, 4)
+        result = None
+        with trace_span(agent.name, 'agent'):
+            async for event in agent.stream_async(prompt):
+                if 'current_tool_use' in event:
+                    streamed.on_tool_use(event['current_tool_use'])
+                elif 'result' in event:
+                    result = event['result']
+        timings[step] = time.perf_counter() - stage_started
+        return str(result)
+
+    modeler = engineer = runner = None
+    try:
+        # Step 1: Create data models
+        modeler = asyncio.create_task(run_stage(
+            agents.data_modeler,
+            f"Generate data model based on the business requirement: '{user_input}' ",
+            'data_modeler'
+        ))
+        early['data_engineer'] = await _first_of(streamed.ready['pipe_delimited_string_to_csv'], modeler)
+        if early['data_engineer']:
+            data_models = streamed.first['pipe_delimited_string_to_csv'].writer.text
+        else:
+            data_models = modeler.result()
+
+        # Step 2: Write data engineering code based on the data models
+        engineer = asyncio.create_task(run_stage(
+            agents.data_engineer,
+            f"Generate code based on the business requirements:'{user_input}' and  and data model:\n\n{data_models}",
+            'data_engineer'
+        ))
+
+        # Step 3: Execute the generated code
+        if execute_code:
+            early['code_runner'] = await _first_of(streamed.ready['save_generated_code'], engineer)
+            runner = asyncio.create_task(run_stage(
+                agents.code_runner,
+                f"Find the saved code location based on provided'{user_input}', execute the code",
+                'code_runner'
+            ))
+
+        data_models_response, code = await asyncio.gather(modeler, engineer)
+        execution = await runner if runner is not None else None
+    finally:
+        # A failed stage must not leave the others running in the background
+        for task in (modeler, engineer, runner):
+            if task is not None and not task.done():
+                task.cancel()
+    return {
+        'data_models': data_models_response,
+        'code': code,
+        'execution': execution,
+        'timings': timings,
+        'started_at': started_at,
+        'early': early,
+        'files': {call.name: call.committed for call in streamed.first.values()},
+        'seconds': round(time.perf_counter() - started, 4),
+    }
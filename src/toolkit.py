@@ -1,24 +1,36 @@
-
-
-
 import json
 import os
 import sqlite3
-import pandas as pd
 from typing import List, Dict, Any, Optional, Union
 from datetime import datetime
 import logging
 from pathlib import Path
-import yaml
 from dataclasses import dataclass
 import asyncio
-from concurrent.futures import ThreadPoolExecutor
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
 import csv
+import hashlib
 import re
 from strands import Agent, tool
 import subprocess
 import sys
 
+from exec_profiler import PROFILE_MODES
+from exec_worker import ExecutionResult, get_warm_worker_pool, run_script
+from instrumentation import instrumented, record
+from output_formats import (get_output_format, inspect_data_product as _inspect_data_product,
+                            load_target_schemas, output_format_env, write_data_model_parquet)
+from pipe_tables import stream_pipe_delimited_to_csv
+from readers import detect_format, iter_chunks, list_source_files, parquet_footer_metadata, read_sample
+from schema_catalog import get_schema_catalog
+from schema_digest import digest_schemas, path_pattern
+from streaming import CODE_FENCE_PATTERN
+from venv_pool import get_venv_pool
+
+# Folder of etl_runtime.py, the chunked ETL library generated code is asked to
+# use (see DATA_ENGINEER_PROMPT); it is put on the PYTHONPATH of executed scripts
+ETL_RUNTIME_DIR = os.path.dirname(os.path.abspath(__file__))
+
 # @tool
 # def get_shared_state_info() -> str:
 #     """
@@ -35,6 +47,7 @@ import sys
 #     return json.dumps(state_info, indent=2)
 
 @tool
+@instrumented
 def pipe_delimited_string_to_csv(
     schema_content: str,
     data_model_output_folder: str,
@@ -56,159 +69,249 @@ def pipe_delimited_string_to_csv(
         Dictionary mapping table names to their saved file paths
     """
     print("**** Calling pipe_delimited_string_to_csv tool ****")
-    def extract_tables(content: str) -> Dict[str, str]:
+    saved_files = stream_pipe_delimited_to_csv(
+        [schema_content],
+        data_model_output_folder,
+        file_prefix=file_prefix,
+        detect_tables=detect_tables,
+        single_output_file=single_output_file
+    )
+    if get_output_format()['format'] == 'parquet':
+        # Typed Parquet copies of the data model tables, carrying the target table schemas
+        target_schemas = load_target_schemas(data_model_output_folder)
+        compression = get_output_format()['compression']
+        for table_name, csv_path in list(saved_files.items()):
+            saved_files[f"{table_name} (parquet)"] = write_data_model_parquet(csv_path, target_schemas, compression)
+    record(files_written=len(saved_files))
+    return saved_files
+
+
+def _profile_source_file(
+    file_path: str,
+    sample_rows: int,
+    encoding: str,
+    csv_kwargs: Dict,
+    full_scan: bool = False,
+    chunksize: int = 100000,
+    stats: Optional[List[str]] = None,
+    engine: str = 'auto'
+) -> Dict:
+    """
+    Reads the head of a single source file and builds its schema dictionary.
+
+    Kept at module level so it can be shipped to a process pool. Errors are
+    caught here so that one bad file never aborts the whole extraction.
+
+    Args:
+        file_path: Full path of the CSV, JSONL or Parquet file
+        sample_rows: Number of rows to sample for inferring data types
+        encoding: Character encoding of text files
+        csv_kwargs: Additional keyword arguments to pass to pd.read_csv
+        full_scan: Stream the whole file instead of reading only its head
+        chunksize: Rows per chunk when full_scan is enabled
+        stats: Column statistics to compute on the sample (default: all registered)
+        engine: CSV parser to use for samples, 'auto', 'pyarrow' or 'c'
+
+    Returns:
+        Schema information dictionary, or an error entry if the file failed
+    """
+    # Deferred: column_stats loads pandas and numpy
+    from column_stats import profile_chunks, profile_dataframe
+    try:
+        source_format, compression = detect_format(file_path)
+        if full_scan:
+            file_schema = profile_chunks(file_path, iter_chunks(file_path, chunksize, encoding, csv_kwargs))
+        else:
+            # Read the header and a sample of rows to infer schema
+            # Use nrows parameter to limit the number of rows read for large files
+            df = read_sample(file_path, sample_rows, encoding, csv_kwargs, engine)
+
+            # Extract schema information
+            file_schema = {
+                'file_path': file_path,
+                'columns': list(df.columns),
+                'num_columns': len(df.columns),
+                'sample_size': min(len(df), sample_rows),
+                'has_header': True,  # Assuming all CSVs have headers
+            }
+            file_schema.update(profile_dataframe(df, stats))
+
+            if source_format == 'parquet':
+                # The footer describes the whole file at no extra I/O: exact
+                # row count, null counts and min/max per column
+                footer = parquet_footer_metadata(file_path)
+                file_schema['row_count'] = footer['row_count']
+                file_schema['min_values'] = footer['min_values']
+                file_schema['max_values'] = footer['max_values']
+                if 'null_counts' in file_schema:
+                    file_schema['null_counts'].update(footer['null_counts'])
+
+        file_schema['source_format'] = source_format
+        if compression:
+            file_schema['compression'] = compression
+        return file_schema
+    except Exception as e:
+        # Add basic error information to the schema dictionary
+        return {
+            'file_path': file_path,
+            'error': str(e),
+            'status': 'failed'
+        }
+
+
+@dataclass
+class FileFingerprint:
+    """Cheap identity of a source file used to detect changes between runs."""
+    size: int
+    mtime_ns: int
+    head_hash: str
+
+
+def _file_fingerprint(file_path: str, head_bytes: int = 65536) -> FileFingerprint:
+    """
+    Fingerprints a file by size, modification time and a hash of its head.
+    
+    Args:
+        file_path: Full path of the file
+        head_bytes: Number of leading bytes included in the content hash (default: 65536)
+        
+    Returns:
+        FileFingerprint for the file
+    """
+    stat = os.stat(file_path)
+    with open(file_path, 'rb') as f:
+        head_hash = hashlib.sha256(f.read(head_bytes)).hexdigest()
+    return FileFingerprint(size=stat.st_size, mtime_ns=stat.st_mtime_ns, head_hash=head_hash)
+
+
+class SchemaProfileCache:
+    """
+    SQLite-backed cache of file_schema dictionaries keyed by file fingerprint.
+    
+    An entry is only reused when the file's size, mtime and head hash match
+    and it was profiled with the same options (sample rows, encoding, ...).
+    """
+
+    def __init__(self, db_path: str):
+        db_dir = os.path.dirname(os.path.abspath(db_path))
+        if not os.path.exists(db_dir):
+            os.makedirs(db_dir)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute(
+            """
+            CREATE TABLE IF NOT EXISTS schema_profiles (
+                file_path TEXT PRIMARY KEY,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                head_hash TEXT NOT NULL,
+                options_hash TEXT NOT NULL,
+                file_schema TEXT NOT NULL,
+                profiled_at TEXT NOT NULL
+            )
+            """
+        )
+        self.conn.commit()
+
+    @staticmethod
+    def options_hash(**options) -> str:
+        """Hashes the profiling options that influence a cached file_schema."""
+        payload = json.dumps(options, sort_keys=True, default=str)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+    def get(self, file_path: str, fingerprint: FileFingerprint, options_hash: str) -> Optional[Dict]:
+        """Returns the cached file_schema if the file is unchanged, otherwise None."""
+        row = self.conn.execute(
+            "SELECT size, mtime_ns, head_hash, options_hash, file_schema "
+            "FROM schema_profiles WHERE file_path = ?",
+            (os.path.abspath(file_path),)
+        ).fetchone()
+        if row is None:
+            return None
+        if tuple(row[:4]) != (fingerprint.size, fingerprint.mtime_ns, fingerprint.head_hash, options_hash):
+            return None
+        return json.loads(row[4])
+
+    def put(self, file_path: str, fingerprint: FileFingerprint, options_hash: str, file_schema: Dict) -> None:
+        """Stores or replaces the file_schema for a file."""
+        self.conn.execute(
+            "INSERT OR REPLACE INTO schema_profiles VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (
+                os.path.abspath(file_path),
+                fingerprint.size,
+                fingerprint.mtime_ns,
+                fingerprint.head_hash,
+                options_hash,
+                json.dumps(file_schema, default=str),
+                datetime.now().isoformat()
+            )
+        )
+
+    def evict_missing(self, folder_path: str, existing_paths: List[str]) -> int:
         """
-        Extracts multiple tables from the content by identifying table headers.
+        Deletes entries under a folder whose files no longer exist.
         
         Args:
-            content: Pipe-delimited string content
+            folder_path: Source folder that was scanned
+            existing_paths: Files found in the folder during this scan
             
         Returns:
-            Dictionary mapping table names to their content
+            Number of evicted entries
         """
-        tables = {}
-        
-        # Split into lines
-        lines = content.strip().split('\n')
-        
-        # Identify potential table headers (e.g., "#### Table_Name" or "| Table Name |")
-        current_table = "Table_1"
-        current_content = []
-        
-        for line in lines:
-            line = line.strip()
-            
-            # Skip empty lines
-            if not line:
-                continue
-            
-            # Check if line is a header (markdown style)
-            header_match = re.match(r'^#+\s+(.*?)\s*$', line)
-            if header_match:
-                # Save previous table if it has content
-                if current_content:
-                    tables[current_table] = '\n'.join(current_content)
-                    current_content = []
-                
-                current_table = header_match.group(1).strip()
-                continue
-            
-            # Also check for table name in the format "| Table Name |"
-            if line.startswith('| ') and ' |' in line and not '|-' in line:
-                # If this looks like a table header and the next line isn't a separator,
-                # it might be a new table
-                if current_content and len(current_content) > 1 and not current_content[-1].startswith('|'):
-                    tables[current_table] = '\n'.join(current_content)
-                    current_content = []
-                    current_table = line.strip('| ').strip()
-            
-            # Add line to current table content
-            current_content.append(line)
-        
-        # Add the last table
-        if current_content:
-            tables[current_table] = '\n'.join(current_content)
-        
-        return tables
+        prefix = os.path.join(os.path.abspath(folder_path), '')
+        existing = {os.path.abspath(p) for p in existing_paths}
+        cached = [
+            row[0] for row in self.conn.execute(
+                "SELECT file_path FROM schema_profiles WHERE substr(file_path, 1, ?) = ?",
+                (len(prefix), prefix)
+            )
+        ]
+        stale = [(p,) for p in cached if p not in existing]
+        self.conn.executemany("DELETE FROM schema_profiles WHERE file_path = ?", stale)
+        return len(stale)
 
-    def save_table_content(table_content: str, csvfile) -> None:
-        """
-        Processes and saves pipe-delimited table content to a CSV file.
-        
-        Args:
-            table_content: Pipe-delimited table content
-            csvfile: File object to write to
-        """
-        # Split into lines and filter out empty lines
-        lines = [line.strip() for line in table_content.split('\n') if line.strip()]
-        
-        csv_writer = csv.writer(csvfile)
-        
-        for line in lines:
-            # Skip markdown table formatting lines
-            if line.startswith('|') and '-+-' in line or all(c in '|-+' for c in line.strip()):
-                continue
-            
-            # Process pipe-delimited line
-            if line.startswith('|') and line.endswith('|'):
-                # Extract cells, strip whitespace
-                cells = [cell.strip() for cell in line.strip('|').split('|')]
-                csv_writer.writerow(cells)
-            else:
-                # For non-pipe lines, just write as a single cell
-                csv_writer.writerow([line])
+    def commit(self) -> None:
+        self.conn.commit()
 
-    # Replace escaped newlines with actual newlines
-    content = schema_content.replace("\\n", "\n")
-    
-    # Create output directory if it doesn't exist
-    if not os.path.exists(data_model_output_folder):
-        os.makedirs(data_model_output_folder)
-    
-    # Process the content
-    if detect_tables:
-        tables = extract_tables(content)
-    else:
-        tables = {"single_table": content}
-    
-    saved_files = {}
-    
-    # If single output file is specified
-    if single_output_file:
-        full_path = os.path.join(data_model_output_folder, single_output_file)
-        with open(full_path, 'w', newline='', encoding='utf-8') as csvfile:
-            for table_name, table_content in tables.items():
-                # Add table name as a header
-                csvfile.write(f"# {table_name}\n")
-                
-                # Process and write the table content
-                save_table_content(table_content, csvfile)
-                
-                # Add a separator between tables
-                csvfile.write("\n\n")
-            
-            saved_files["combined"] = full_path
-    else:
-        # Process each table separately
-        for i, (table_name, table_content) in enumerate(tables.items()):
-            # Create a valid filename from table name
-            if table_name == "single_table":
-                filename = f"{file_prefix}.csv"
-            else:
-                # Clean the table name to create a valid filename
-                clean_name = re.sub(r'[^\w\s-]', '', table_name).strip().lower()
-                clean_name = re.sub(r'[-\s]+', '_', clean_name)
-                
-                if clean_name:
-                    filename = f"{file_prefix}_{clean_name}.csv"
-                else:
-                    filename = f"{file_prefix}_{i+1}.csv"
-            
-            full_path = os.path.join(data_model_output_folder, filename)
-            
-            with open(full_path, 'w', newline='', encoding='utf-8') as csvfile:
-                save_table_content(table_content, csvfile)
-            
-            saved_files[table_name] = full_path
-    
-    return saved_files
+    def close(self) -> None:
+        self.conn.close()
 
 
 @tool
+@instrumented
 def extract_csv_schemas(
     source_data_folder_path: str,
     sample_rows: int = 100,
     encoding: str = 'utf-8',
-    csv_kwargs: Optional[Dict] = None
+    csv_kwargs: Optional[Dict] = None,
+    max_workers: Optional[int] = None,
+    use_processes: bool = False,
+    cache_path: Optional[str] = None,
+    full_scan: bool = False,
+    chunksize: int = 100000,
+    stats: Optional[List[str]] = None,
+    engine: str = 'auto'
 ) -> Dict:
     """
-    Recursively reads all CSV files in a folder and extracts schema information.
+    Recursively reads all source files in a folder and extracts schema information.
+    
+    CSV (optionally .gz/.zst compressed), JSONL/NDJSON and Parquet files are supported.
+    For Parquet, row counts, null counts and min/max come from the file footer.
     
     Args:
-        source_data_folder_path: Path to the folder containing CSV files
+        source_data_folder_path: Path to the folder containing source files
         sample_rows: Number of rows to sample for inferring data types (default: 100)
-        encoding: Character encoding of the CSV files (default: 'utf-8')
+        encoding: Character encoding of CSV and JSONL files (default: 'utf-8')
         csv_kwargs: Additional keyword arguments to pass to pd.read_csv
+        max_workers: Number of files profiled concurrently (default: CPU count, 1 disables the pool)
+        use_processes: Profile files on a process pool instead of a thread pool (default: False)
+        cache_path: SQLite file used to reuse schemas of unchanged files across runs (default: no cache)
+        full_scan: Stream every file in chunks to compute whole-file statistics instead of
+            sampling the first sample_rows rows; unique counts are then approximate (default: False)
+        chunksize: Rows read per chunk when full_scan is enabled (default: 100000)
+        stats: Column statistics to compute when sampling, any of 'dtypes', 'null_counts',
+            'unique_counts', 'example_values' (default: all)
+        engine: CSV parser used for samples: 'auto' uses multithreaded pyarrow when it is
+            installed and csv_kwargs is empty, 'pyarrow' requires it, 'c' forces pandas (default: 'auto')
         
     Returns:
         Dictionary mapping file paths to schema information dictionaries
@@ -222,73 +325,228 @@ def extract_csv_schemas(
     
     if csv_kwargs is None:
         csv_kwargs = {}
+
+    if max_workers is None:
+        max_workers = os.cpu_count() or 1
     
-    schemas = {}
-    
-    # Walk through all subdirectories
-    for root, _, files in os.walk(source_data_folder_path):
-        # Filter for CSV files
-        csv_files = [f for f in files if f.lower().endswith('.csv')]
-        
-        for csv_file in csv_files:
-            file_path = os.path.join(root, csv_file)
+    source_paths = list_source_files(source_data_folder_path)
+    profile_args = (sample_rows, encoding, csv_kwargs, full_scan, chunksize, stats, engine)
+
+    results = {}
+    fingerprints = {}
+    cache = SchemaProfileCache(cache_path) if cache_path else None
+    if cache:
+        options_hash = SchemaProfileCache.options_hash(
+            sample_rows=sample_rows, encoding=encoding, csv_kwargs=csv_kwargs,
+            full_scan=full_scan, chunksize=chunksize, stats=stats, engine=engine
+        )
+        for path in source_paths:
             try:
-                # Read the header and a sample of rows to infer schema
-                # Use nrows parameter to limit the number of rows read for large files
-                df = pd.read_csv(file_path, encoding=encoding, nrows=sample_rows, **csv_kwargs)
-                
-                # Extract schema information
-                file_schema = {
-                    'file_path': file_path,
-                    'columns': list(df.columns),
-                    'num_columns': len(df.columns),
-                    'dtypes': {col: str(df[col].dtype) for col in df.columns},
-                    'sample_size': min(len(df), sample_rows),
-                    'has_header': True,  # Assuming all CSVs have headers
-                    'null_counts': {col: int(df[col].isna().sum()) for col in df.columns},
-                    'unique_counts': {col: int(df[col].nunique()) for col in df.columns},
-                    'example_values': {col: df[col].dropna().head(3).tolist() if not df[col].empty else [] 
-                                      for col in df.columns}
-                }
-                
-                # Store schema with relative path as the key
-                rel_path = os.path.relpath(file_path, source_data_folder_path)
-                schemas[rel_path] = file_schema
-                
-                print(f"Successfully extracted schema for: {rel_path}")
-            except Exception as e:
-                print(f"Error processing {file_path}: {str(e)}")
-                # Add basic error information to the schema dictionary
-                rel_path = os.path.relpath(file_path, source_data_folder_path)
-                schemas[rel_path] = {
-                    'file_path': file_path,
-                    'error': str(e),
-                    'status': 'failed'
-                }
-    
+                fingerprints[path] = _file_fingerprint(path)
+            except OSError:
+                continue
+            cached_schema = cache.get(path, fingerprints[path], options_hash)
+            if cached_schema is not None:
+                results[path] = cached_schema
+
+    pending = [path for path in source_paths if path not in results]
+    if max_workers <= 1 or len(pending) <= 1:
+        profiled = [_profile_source_file(path, *profile_args) for path in pending]
+    else:
+        pool_class = ProcessPoolExecutor if use_processes else ThreadPoolExecutor
+        with pool_class(max_workers=min(max_workers, len(pending))) as pool:
+            # Executor.map yields results in submission order, which keeps
+            # the returned dictionary ordering independent of scheduling
+            profiled = list(pool.map(
+                _profile_source_file,
+                pending,
+                *[[arg] * len(pending) for arg in profile_args]
+            ))
+    results.update(zip(pending, profiled))
+
+    if cache:
+        for path, file_schema in zip(pending, profiled):
+            # Failures are not cached so transient read errors are retried
+            if path in fingerprints and file_schema.get('status') != 'failed':
+                cache.put(path, fingerprints[path], options_hash, file_schema)
+        evicted = cache.evict_missing(source_data_folder_path, source_paths)
+        cache.commit()
+        cache.close()
+        print(f"Schema cache: {len(source_paths) - len(pending)} reused, "
+              f"{len(pending)} profiled, {evicted} evicted")
+
+    schemas = {}
+    for file_path in source_paths:
+        file_schema = results[file_path]
+        # Store schema with relative path as the key
+        rel_path = os.path.relpath(file_path, source_data_folder_path)
+        schemas[rel_path] = file_schema
+
+        if file_schema.get('status') == 'failed':
+            print(f"Error processing {file_path}: {file_schema['error']}")
+        else:
+            print(f"Successfully extracted schema for: {rel_path}")
+
+    catalog = get_schema_catalog()
+    if catalog is not None:
+        latest_run = catalog.latest_run(source_data_folder_path)
+        run_id = catalog.record_run(source_data_folder_path, schemas)
+        if run_id == latest_run:
+            print(f"Schema catalog: {source_data_folder_path} unchanged since run {run_id}")
+        else:
+            print(f"Schema catalog: recorded run {run_id} of {source_data_folder_path}")
+
+    record(
+        files_processed=len(source_paths),
+        files_profiled=len(pending),
+        rows_sampled=sum(s.get('row_count', s.get('sample_size', 0)) for s in profiled if s.get('status') != 'failed')
+    )
     return schemas
 
 
 @tool
+@instrumented
+def summarize_source_schemas(
+    source_data_folder_path: str,
+    token_budget: int = 4000,
+    max_example_chars: int = 32,
+    sample_rows: int = 100,
+    cache_path: Optional[str] = None
+) -> str:
+    """
+    Profiles all source files in a folder and returns a compact schema digest.
+
+    Files with the same format, column names and types (e.g. daily partitions of
+    one feed) are listed once with a file count and a path pattern. Each column is
+    shown as name:type with null/unique counts and a few shortened example values.
+    Detail is reduced as needed to stay within the token budget.
+
+    Args:
+        source_data_folder_path: Path to the folder containing source files
+        token_budget: Approximate maximum number of tokens of the digest (default: 4000)
+        max_example_chars: Characters kept of each example value (default: 32)
+        sample_rows: Number of rows to sample for inferring data types (default: 100)
+        cache_path: SQLite file used to reuse schemas of unchanged files across runs (default: no cache)
+
+    Returns:
+        The schema digest as text
+    """
+    print("**** Calling summarize_source_schemas tool **** ")
+    schemas = extract_csv_schemas(source_data_folder_path, sample_rows=sample_rows, cache_path=cache_path)
+    result = digest_schemas(schemas, token_budget=token_budget, max_example_chars=max_example_chars)
+    report = result['report']
+    print(f"Schema digest: {report['files']} files in {report['groups']} groups, "
+          f"~{report['digest_tokens']} tokens (saved ~{report['tokens_saved']} of {report['original_tokens']})")
+    record(digest_tokens=report['digest_tokens'], tokens_saved=report['tokens_saved'])
+    return result['digest']
+
+
+CATALOG_QUERIES = ('summary', 'files_with_column', 'drift', 'shared_schemas')
+
+
+@tool
+@instrumented
+def query_schema_catalog(
+    source_data_folder_path: str,
+    query: str = 'summary',
+    column: Optional[str] = None,
+    refresh: bool = False,
+    max_results: int = 50
+) -> Dict:
+    """
+    Answers questions about a source folder from the schema catalog instead of re-profiling it.
+
+    Every schema extraction that finds the folder changed is recorded as a run
+    in the catalog, so earlier results can be looked up and compared.
+
+    Args:
+        source_data_folder_path: Path to the source data folder
+        query: One of:
+            'summary' - runs recorded for the folder and the file structures of the latest run
+            'files_with_column' - files containing `column` ('*' as wildcard), with type and stats
+            'drift' - files and columns added, removed or retyped since the previous run
+            'shared_schemas' - files grouped by identical structure
+        column: Column name for 'files_with_column'
+        refresh: Extract the schemas again first, recording a new run if anything changed;
+            only files changed since the last run are profiled again
+            (default: False, also done automatically when the folder has no run yet)
+        max_results: Maximum number of entries per list in the answer (default: 50)
+
+    Returns:
+        Dictionary with the answer, or an error entry
+    """
+    print(f"**** Calling query_schema_catalog tool ({query}) ****")
+    catalog = get_schema_catalog()
+    if catalog is None:
+        return {'error': "The schema catalog is not configured (configure_schema_catalog)", 'status': 'failed'}
+    if query not in CATALOG_QUERIES:
+        return {'error': f"Unknown query '{query}', expected one of {CATALOG_QUERIES}", 'status': 'failed'}
+    if query == 'files_with_column' and not column:
+        return {'error': "The files_with_column query needs a column", 'status': 'failed'}
+
+    if refresh or catalog.latest_run(source_data_folder_path) is None:
+        # The catalog file doubles as the fingerprint cache, so unchanged files are not read again
+        extract_csv_schemas(source_data_folder_path, cache_path=catalog.db_path)
+
+    runs = catalog.runs(source_data_folder_path)
+    answer: Dict[str, Any] = {'query': query, 'run_id': runs[0]['run_id'], 'run_created_at': runs[0]['created_at']}
+    if query == 'summary':
+        structures = catalog.shared_schemas(source_data_folder_path)
+        answer.update(runs=runs[:max_results], files=runs[0]['files'], structures=len(structures),
+                      structure_patterns=[group['pattern'] for group in structures[:max_results]])
+    elif query == 'files_with_column':
+        # Partitions of one feed share the structure, so they are reported as one pattern
+        groups: Dict[tuple, List[Dict]] = {}
+        for match in catalog.files_with_column(source_data_folder_path, column):
+            groups.setdefault((match['structure_hash'], match['column'], match['dtype']), []).append(match)
+        answer['matches'] = [
+            {'pattern': path_pattern([match['file_path'] for match in matches]), 'files': len(matches),
+             'column': column_name, 'dtype': dtype,
+             'null_count': sum(match['null_count'] or 0 for match in matches)}
+            for (_, column_name, dtype), matches in list(groups.items())[:max_results]
+        ]
+    elif query == 'drift':
+        drift = catalog.schema_drift(source_data_folder_path)
+        known = [entry['file_path'] for entry in drift['added_files'] if entry['known_structure']]
+        answer.update(
+            since_run_id=drift['since_run_id'],
+            added_files_known_structure={'files': len(known), 'pattern': path_pattern(known) if known else None},
+            added_files_new_structure=[entry['file_path'] for entry in drift['added_files']
+                                       if not entry['known_structure']][:max_results],
+            new_structures=drift['new_structures'],
+            removed_files=drift['removed_files'][:max_results],
+            changed_files=dict(list(drift['changed_files'].items())[:max_results]),
+        )
+    else:
+        answer['groups'] = catalog.shared_schemas(source_data_folder_path)[:max_results]
+    record(catalog_runs=len(runs))
+    return answer
+
+
+@tool
+@instrumented
 def save_generated_code(content: str, code_location:str) -> str:
     """Save the generated code in a local file for debugging purposes later on.
     """
     from pathlib import Path
-    import re
     print("saving generated code")
-    pattern = r"```python\n(.*?)\n```"
 
     # Extracting the Python code
-    match = re.search(pattern, content, re.DOTALL)
+    match = CODE_FENCE_PATTERN.search(content)
     if match:
         python_code = match.group(1)
         print("Found your python code")
     else:
         print(f"could not extract code, code provided was \n{content}")
         python_code = content
-        count = len(python_code)
+    count = len(python_code)
 
-    Path(code_location).write_text(python_code)
+    # The streaming workflow may already have written this code while it was generated
+    path = Path(code_location)
+    if path.is_file() and path.read_text() == python_code:
+        print(f"generated code already saved, char count = {count}")
+        return "generated code has been saved, ready to execute this code if required"
+    path.write_text(python_code)
     print(f"after saving generated code, char count = {count}")
     return "generated code has been saved, ready to execute this code if required"
 
@@ -296,51 +554,125 @@ def save_generated_code(content: str, code_location:str) -> str:
 
 
 @tool
-def check_and_execute_python_file(file_path):
+@instrumented
+def check_and_execute_python_file(
+    file_path: str,
+    requirements: Optional[List[str]] = None,
+    use_warm_worker: bool = False,
+    timeout: Optional[float] = 1800,
+    memory_limit_mb: Optional[int] = None,
+    max_output_bytes: int = 1000000,
+    env: Optional[Dict[str, str]] = None,
+    profile: Optional[str] = None,
+    profile_top: int = 10
+) -> Dict:
     """
     Check if a Python file exists in specified folder and execute it.
     
+    The script runs in a cached virtual environment that is built once per
+    requirement set and reused on later runs (see venv_pool.VenvPool). With
+    use_warm_worker the script runs in a fork of a worker that already has
+    pandas and numpy imported, which removes interpreter and import start-up time.
+    
     Args:
-        folder_path (str): Path to the folder
+        file_path (str): Path to the Python file
+        requirements (list): pip requirements the script needs (default: pandas, numpy)
+        use_warm_worker (bool): Run in a fork of a preloaded warm worker (default: False)
+        timeout (float): Seconds before the script is killed (default: 1800)
+        memory_limit_mb (int): Address-space limit for the script in MB (default: no limit)
+        max_output_bytes (int): Trailing bytes of stdout and of stderr returned (default: 1000000)
+        env (dict): Extra environment variables for the script (default: none)
+        profile (str): Run under a profiler to find slow steps: 'sampling' ranks script lines with
+            the pandas (or other library) call made from them and the memory seen there, at low
+            overhead; 'cprofile' ranks script functions and library calls deterministically
+            (default: no profiling)
+        profile_top (int): Entries per profile ranking (default: 10)
     Returns:
-        tuple: (success, errors, output) - Boolean success status, list of errors, command output
+        dict: success, exit_code, signal, timed_out, duration_seconds, peak_rss_mb,
+            stdout, stderr, truncation flags, a list of errors and, when profiling,
+            the ranked 'profile' summary ('hotspots' and 'operations')
     """
-    errors = []
-    output = ""
     file_path = os.path.join(file_path)
 
     print(file_path)
     # Check if folder and file exist
     if not os.path.isfile(file_path):
-        errors.append(f"File not found '{file_path}'")
-        return False, errors, output
-    
-    folder_path = os.path.dirname(file_path)
-    venv_path = os.path.join(folder_path, "venv")
-
-    result = subprocess.run(
-        [sys.executable, "-m", "venv", venv_path],
-        capture_output=True,
-        text=True,
-        check=True
-    )
+        return ExecutionResult(success=False, exit_code=None,
+                               errors=[f"File not found '{file_path}'"]).to_dict()
 
-    # Execute the Python file
+    # Execute the Python file with etl_runtime importable
+    pythonpath = os.pathsep.join(filter(None, [ETL_RUNTIME_DIR, os.environ.get('PYTHONPATH')]))
+    env = {'PYTHONPATH': pythonpath, **output_format_env(), **(env or {})}
+    limits = dict(timeout=timeout, memory_limit_mb=memory_limit_mb, max_output_bytes=max_output_bytes, env=env)
+    if profile:
+        if profile not in PROFILE_MODES:
+            return ExecutionResult(success=False, exit_code=None, errors=[
+                f"Unknown profile mode '{profile}', expected one of {PROFILE_MODES}"]).to_dict()
+        limits['profile'] = {'mode': profile, 'top': profile_top}
     try:
-        # Use sys.executable to ensure we use the same Python interpreter
-        result = subprocess.run(
-            ["bash", "-c", f"source {venv_path}/bin/activate && pip install pandas numpy && python {file_path}"], 
-            capture_output=True, 
-            text=True,
-            check=True
-        )
-        output = result.stdout
-        return True, errors, output
-    except subprocess.CalledProcessError as e:
-        errors.append(f"Execution failed (code {e.returncode}): {e.stderr}")
-        return False, errors, e.stdout
+        # The environment cannot be evicted while the script runs in it
+        with get_venv_pool().use(requirements) as python_path:
+            if use_warm_worker:
+                result = get_warm_worker_pool(python_path).run(file_path, **limits)
+            else:
+                result = run_script(python_path, file_path, **limits)
     except Exception as e:
-        errors.append(f"Failed to execute: {str(e)}")
-        return False, errors, output
+        result = ExecutionResult(success=False, exit_code=None, errors=[f"Failed to execute: {str(e)}"])
+    record(subprocess_seconds=result.duration_seconds, subprocess_peak_rss_mb=result.peak_rss_mb)
+    return result.to_dict()
     
 
+
+@tool
+@instrumented
+def inspect_data_product(data_product_folder: str, data_model_output_folder: Optional[str] = None) -> Dict:
+    """
+    Validates the written data product against the data model without reading the data.
+
+    Parquet tables are described from their footers (schema, row counts, null counts),
+    CSV tables from their header and a streaming row count. With the data model folder,
+    missing tables, missing or unexpected columns and Parquet types that differ from the
+    Data Type column are reported as problems.
+
+    Args:
+        data_product_folder: Folder the generated code wrote the tables to
+        data_model_output_folder: Folder with the data model CSVs (default: no comparison)
+
+    Returns:
+        Dictionary with per-table 'tables' descriptions, 'missing_tables', 'problems' and 'status' ('ok' or 'failed')
+    """
+    print("**** Calling inspect_data_product tool ****")
+    result = _inspect_data_product(data_product_folder, data_model_output_folder)
+    record(files_processed=sum(table['files'] for table in result['tables'].values()))
+    return result
+
+
+@tool
+@instrumented
+def validate_data_product(data_product_folder: str, data_model_output_folder: str,
+                          max_workers: Optional[int] = None) -> Dict:
+    """
+    Validates the data product against the data model, including its keys and SCD history.
+
+    Runs the inspect_data_product checks, then streams the key columns of all tables in
+    parallel and checks primary key uniqueness, foreign keys without a matching key in the
+    referenced table (e.g. fact rows pointing to missing dimension keys) and Type 2 dimension
+    consistency (one current version per business key, expiration dates matching the
+    current flag, effective date not after expiration date).
+
+    Args:
+        data_product_folder: Folder the generated code wrote the tables to
+        data_model_output_folder: Folder with the data model CSVs
+        max_workers: Tables scanned at the same time (default: one per table, up to the CPU count)
+
+    Returns:
+        Dictionary with per-table 'tables' descriptions and key 'checks', 'missing_tables',
+        'problems', 'skipped' constraints, 'seconds' and 'status' ('ok' or 'failed')
+    """
+    print("**** Calling validate_data_product tool ****")
+    # Deferred: data_validation loads numpy and pyarrow
+    from data_validation import validate_data_product as _validate_data_product
+    result = _validate_data_product(data_product_folder, data_model_output_folder, max_workers)
+    record(files_processed=sum(table['files'] for table in result['tables'].values()),
+           rows_validated=sum(table.get('checks', {}).get('rows', 0) for table in result['tables'].values()))
+    return result
@@ -0,0 +1,249 @@
+import fcntl
+import hashlib
+import json
+import os
+import shutil
+import subprocess
+import sys
+import time
+from contextlib import contextmanager
+from typing import Dict, Iterator, List, Optional
+
+
+DEFAULT_REQUIREMENTS = ["pandas", "numpy"]
+DEFAULT_VENV_ROOT = os.path.join(os.path.expanduser("~"), ".cache", "data-product-agents", "venvs")
+
+READY_MARKER = ".ready.json"
+
+
+class VenvPool:
+    """
+    Cache of virtual environments keyed by a hash of their requirement set.
+
+    An environment is created and populated once, then reused by every later
+    request for the same requirements. Installs can be served from a local
+    wheelhouse and/or with --no-index for hosts without network access. When
+    more than max_envs environments exist, the least recently used are removed,
+    except those a script is running in (see use).
+    """
+
+    def __init__(
+        self,
+        root_dir: str = DEFAULT_VENV_ROOT,
+        max_envs: int = 4,
+        wheelhouse: Optional[str] = None,
+        no_index: bool = False,
+        system_site_packages: bool = False,
+        install_timeout: Optional[float] = 1800
+    ):
+        self.root_dir = root_dir
+        self.max_envs = max_envs
+        self.wheelhouse = wheelhouse
+        self.no_index = no_index
+        self.system_site_packages = system_site_packages
+        self.install_timeout = install_timeout
+        os.makedirs(root_dir, exist_ok=True)
+
+    def env_key(self, requirements: List[str]) -> str:
+        """Hashes everything that determines an environment's contents."""
+        payload = json.dumps({
+            'requirements': sorted({r.strip() for r in requirements if r.strip()}),
+            'python': sys.version,
+            'executable': os.path.realpath(sys.executable),
+            'system_site_packages': self.system_site_packages,
+        }, sort_keys=True)
+        return hashlib.sha256(payload.encode('utf-8')).hexdigest()[:16]
+
+    def get_python(self, requirements: Optional[List[str]] = None) -> str:
+        """
+        Returns the interpreter of a ready environment, creating it on first use.
+
+        Args:
+            requirements: pip requirement specifiers (default: pandas and numpy)
+
+        Returns:
+            Path to the environment's python executable
+        """
+        if requirements is None:
+            requirements = DEFAULT_REQUIREMENTS
+        key = self.env_key(requirements)
+        env_dir = os.path.join(self.root_dir, key)
+
+        with self._lock(key):
+            if not os.path.exists(os.path.join(env_dir, READY_MARKER)):
+                self._create(env_dir, requirements)
+            # The marker's mtime doubles as the last-used timestamp for LRU eviction
+            os.utime(os.path.join(env_dir, READY_MARKER))
+
+        self.evict(keep=key)
+        return self._python(env_dir)
+
+    @contextmanager
+    def use(self, requirements: Optional[List[str]] = None) -> Iterator[str]:
+        """
+        Yields the interpreter of a ready environment that is not evicted until the block ends.
+
+        A shared lock on the environment is held for the duration of the block,
+        so runs in the same environment do not block each other while evict()
+        skips it, also in other processes.
+
+        Args:
+            requirements: pip requirement specifiers (default: pandas and numpy)
+        """
+        if requirements is None:
+            requirements = DEFAULT_REQUIREMENTS
+        with open(self._use_lock_path(self.env_key(requirements)), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_SH)
+            try:
+                yield self.get_python(requirements)
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    def evict(self, keep: Optional[str] = None) -> List[str]:
+        """
+        Removes the least recently used environments beyond max_envs.
+
+        Environments in use are skipped and removed by a later eviction once idle.
+
+        Args:
+            keep: Key of an environment that must not be removed
+
+        Returns:
+            Keys of the removed environments
+        """
+        envs = []
+        for key in os.listdir(self.root_dir):
+            marker = os.path.join(self.root_dir, key, READY_MARKER)
+            if os.path.exists(marker):
+                envs.append((os.path.getmtime(marker), key))
+
+        removed = []
+        for _, key in sorted(envs, reverse=True)[self.max_envs:]:
+            if key == keep:
+                continue
+            with open(self._use_lock_path(key), 'w') as use_file:
+                try:
+                    fcntl.flock(use_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+                except BlockingIOError:
+                    continue
+                try:
+                    with self._lock(key):
+                        shutil.rmtree(os.path.join(self.root_dir, key), ignore_errors=True)
+                finally:
+                    fcntl.flock(use_file, fcntl.LOCK_UN)
+            removed.append(key)
+        return removed
+
+    def describe(self) -> List[Dict]:
+        """Lists cached environments with their requirements and last use time."""
+        envs = []
+        for key in sorted(os.listdir(self.root_dir)):
+            marker = os.path.join(self.root_dir, key, READY_MARKER)
+            if os.path.exists(marker):
+                with open(marker) as f:
+                    info = json.load(f)
+                info.update(key=key, last_used=os.path.getmtime(marker))
+                envs.append(info)
+        return envs
+
+    def _create(self, env_dir: str, requirements: List[str]) -> None:
+        # Build next to the final location and rename, so a half-built
+        # environment is never picked up after a crash or failed install
+        build_dir = f"{env_dir}.building"
+        shutil.rmtree(build_dir, ignore_errors=True)
+        shutil.rmtree(env_dir, ignore_errors=True)
+
+        venv_cmd = [sys.executable, "-m", "venv", build_dir]
+        if self.system_site_packages:
+            venv_cmd.insert(3, "--system-site-packages")
+        started = time.time()
+        try:
+            subprocess.run(venv_cmd, capture_output=True, text=True, check=True)
+
+            pip_cmd = [self._python(build_dir), "-m", "pip", "install", "--disable-pip-version-check"]
+            if self.no_index:
+                pip_cmd.append("--no-index")
+            if self.wheelhouse:
+                pip_cmd += ["--find-links", self.wheelhouse]
+            subprocess.run(
+                pip_cmd + list(requirements),
+                capture_output=True,
+                text=True,
+                check=True,
+                timeout=self.install_timeout
+            )
+        except subprocess.CalledProcessError as e:
+            shutil.rmtree(build_dir, ignore_errors=True)
+            raise RuntimeError(f"Failed to build environment for {requirements}: {e.stderr}") from e
+        except Exception:
+            shutil.rmtree(build_dir, ignore_errors=True)
+            raise
+
+        # venv scripts embed their location, so the interpreter is addressed by
+        # path (bin/python) rather than by activating the environment
+        with open(os.path.join(build_dir, READY_MARKER), 'w') as f:
+            json.dump({
+                'requirements': list(requirements),
+                'python': sys.version,
+                'build_seconds': round(time.time() - started, 2),
+            }, f)
+        os.rename(build_dir, env_dir)
+
+    @staticmethod
+    def _python(env_dir: str) -> str:
+        return os.path.join(env_dir, "bin", "python")
+
+    def _use_lock_path(self, key: str) -> str:
+        # Held shared by runs in the environment and exclusively while it is removed
+        return os.path.join(self.root_dir, f".{key}.use.lock")
+
+    @contextmanager
+    def _lock(self, key: str) -> Iterator[None]:
+        # Serializes builds of the same environment across threads and processes
+        with open(os.path.join(self.root_dir, f".{key}.lock"), 'w') as lock_file:
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+
+_default_pool: Optional[VenvPool] = None
+
+
+def configure_venv_pool(**kwargs) -> VenvPool:
+    """
+    Replaces the pool used by check_and_execute_python_file.
+
+    Args:
+        **kwargs: VenvPool arguments, e.g. root_dir, max_envs, wheelhouse, no_index
+
+    Returns:
+        The new default pool
+    """
+    global _default_pool
+    _default_pool = VenvPool(**kwargs)
+    return _default_pool
+
+
+def get_venv_pool() -> VenvPool:
+    """
+    Returns the default pool, creating it from environment variables on first use.
+
+    DATA_PRODUCT_VENV_DIR sets the cache folder, DATA_PRODUCT_WHEELHOUSE a local
+    wheel folder, DATA_PRODUCT_PIP_NO_INDEX=1 disables the package index and
+    DATA_PRODUCT_VENV_SYSTEM_SITE_PACKAGES=1 lets environments see the host's packages.
+    """
+    global _default_pool
+    if _default_pool is None:
+        _default_pool = VenvPool(
+            root_dir=os.environ.get("DATA_PRODUCT_VENV_DIR", DEFAULT_VENV_ROOT),
+            wheelhouse=os.environ.get("DATA_PRODUCT_WHEELHOUSE") or None,
+            no_index=_env_flag("DATA_PRODUCT_PIP_NO_INDEX"),
+            system_site_packages=_env_flag("DATA_PRODUCT_VENV_SYSTEM_SITE_PACKAGES")
+        )
+    return _default_pool
+
+
+def _env_flag(name: str) -> bool:
+    return os.environ.get(name, "").lower() in ("1", "true", "yes")
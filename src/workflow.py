@@ -1,46 +1,257 @@
+import asyncio
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional
+
 from strands import Agent
-from strands_tools import workflow
-from llms import * 
+from llms import *
 from strands import Agent, tool
 from prompts import *
-from toolkit import * 
-
-# Create an agent with workflow capability
-#wf_agent = Agent(tools=[workflow])
-
-data_modeler_agent = Agent(
-    model=sonnet37_model,
-    system_prompt=DATA_MODELER_PROMPT,
-    #callback_handler=None, 
-    tools=[extract_csv_schemas, pipe_delimited_string_to_csv],
-    name="data_modeler"
-)
-
-data_engineer_agent = Agent(
-    model=opus4_model,
-    system_prompt=DATA_ENGINEER_PROMPT,
-    tools=[save_generated_code],
-    name="data_engineer"
-)
-
-code_runner_agent = Agent(
-    model=nova_pro_model,
-    system_prompt=CODE_RUNNER_PROMPT,
-    tools=[check_and_execute_python_file],
-    name="code_runner"
-)
-
-def run_data_workflow(user_input):
-    # Step 1: Create data models
-    modeling_response = data_modeler_agent(
-        f"Generate data model based on the business requirement: '{user_input}' ",
+from toolkit import *
+from rate_limits import ModelConcurrencyLimits, configure_rate_limits, rate_limited, rate_limit_stats
+from llm_cache import CacheMissError, cached, configure_llm_cache, llm_cache_stats
+from instrumentation import configure_instrumentation, get_exporter, trace_span
+from incremental import run_incremental_workflow
+from output_formats import configure_output_format
+from schema_catalog import configure_schema_catalog
+from batch import BatchCase, run_batch, run_batch_async
+from streaming import run_data_workflow_streaming
+
+def resolve_model(model, role: str):
+    """A model object as is, a registry name (see llms.MODEL_CONFIGS) or None for the role's default."""
+    if model is None or isinstance(model, str):
+        return get_model(model or DEFAULT_MODELS[role])
+    return model
+
+
+def create_data_modeler_agent(model=None, **agent_kwargs) -> Agent:
+    return Agent(
+        model=cached(rate_limited(resolve_model(model, 'data_modeler'))),
+        system_prompt=DATA_MODELER_PROMPT,
+        tools=[summarize_source_schemas, query_schema_catalog, extract_csv_schemas, pipe_delimited_string_to_csv],
+        name="data_modeler",
+        **agent_kwargs
+    )
+
+
+def create_data_engineer_agent(model=None, **agent_kwargs) -> Agent:
+    return Agent(
+        model=cached(rate_limited(resolve_model(model, 'data_engineer'))),
+        system_prompt=DATA_ENGINEER_PROMPT,
+        tools=[save_generated_code],
+        name="data_engineer",
+        **agent_kwargs
+    )
+
+
+def create_code_runner_agent(model=None, **agent_kwargs) -> Agent:
+    return Agent(
+        model=cached(rate_limited(resolve_model(model, 'code_runner'))),
+        system_prompt=CODE_RUNNER_PROMPT,
+        tools=[check_and_execute_python_file, validate_data_product],
+        name="code_runner",
+        **agent_kwargs
     )
+
+
+@dataclass
+class WorkflowAgents:
+    """One set of agents for a workflow run. Agents keep conversation state, so
+    concurrent runs each need their own set."""
+    data_modeler: Agent
+    data_engineer: Agent
+    code_runner: Agent
+
+
+def create_workflow_agents(models: Optional[Dict] = None, **agent_kwargs) -> WorkflowAgents:
+    """
+    Builds a fresh set of workflow agents.
+
+    Args:
+        models: Optional overrides keyed by 'data_modeler', 'data_engineer' or 'code_runner',
+            either model objects (e.g. fake models for offline runs) or registry names such as
+            "sonnet4"; only the models used are created
+        **agent_kwargs: Extra Agent arguments, e.g. callback_handler=None
+    """
+    models = models or {}
+    return WorkflowAgents(
+        data_modeler=create_data_modeler_agent(models.get('data_modeler'), **agent_kwargs),
+        data_engineer=create_data_engineer_agent(models.get('data_engineer'), **agent_kwargs),
+        code_runner=create_code_runner_agent(models.get('code_runner'), **agent_kwargs),
+    )
+
+
+# Module level agents (data_modeler_agent, data_engineer_agent, code_runner_agent),
+# created on first access so that importing this module builds no model clients
+_AGENT_FACTORIES = {
+    'data_modeler_agent': create_data_modeler_agent,
+    'data_engineer_agent': create_data_engineer_agent,
+    'code_runner_agent': create_code_runner_agent,
+}
+
+
+def default_agent(name: str) -> Agent:
+    if name not in globals():
+        globals()[name] = _AGENT_FACTORIES[name]()
+    return globals()[name]
+
+
+def __getattr__(name: str):
+    if name in _AGENT_FACTORIES:
+        return default_agent(name)
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def run_data_workflow(user_input, agents: Optional[WorkflowAgents] = None):
+    # Module level agents unless a separate set (e.g. with fake models) is given
+    modeler = agents.data_modeler if agents else default_agent('data_modeler_agent')
+    engineer = agents.data_engineer if agents else default_agent('data_engineer_agent')
+
+    # Step 1: Create data models
+    with trace_span(modeler.name, 'agent'):
+        modeling_response = modeler(
+            f"Generate data model based on the business requirement: '{user_input}' ",
+        )
     data_models = str(modeling_response)
 
     # Step 2: Write data engineering code based on the data models
-    engineer_response = data_engineer_agent(
+    with trace_span(engineer.name, 'agent'):
+        engineer_response = engineer(
+            f"Generate code based on the business requirements:'{user_input}' and  and data model:\n\n{data_models}",
+        )
+    code = str(engineer_response)
+
+    return code
+
+
+def agent_model_id(agent: Agent) -> Optional[str]:
+    """Model id an agent talks to, through the cache and rate limit wrappers."""
+    config = agent.model.get_config()
+    return config.get('model_id') if isinstance(config, dict) else getattr(config, 'model_id', None)
+
+
+def agent_tokens(agents: WorkflowAgents) -> Dict[str, int]:
+    """Total tokens each agent of a set has used so far."""
+    return {
+        agent.name: agent.event_loop_metrics.accumulated_usage.get('totalTokens', 0)
+        for agent in (agents.data_modeler, agents.data_engineer, agents.code_runner)
+    }
+
+
+async def run_data_workflow_async(
+    user_input: str,
+    agents: Optional[WorkflowAgents] = None,
+    execute_code: bool = True,
+    source_profile: Optional[str] = None,
+    concurrency_limits: Optional[ModelConcurrencyLimits] = None
+) -> Dict:
+    """
+    Runs modeler, engineer and (optionally) code runner without blocking the event loop.
+
+    Model calls are paced by the per-model quotas set with configure_rate_limits
+    (the "rate_limits" entry of config.json) and back off only when Bedrock
+    actually throttles, instead of sleeping a fixed time between steps.
+
+    Args:
+        user_input: Business case and folder locations, as for run_data_workflow
+        agents: Agents to use (default: a fresh set from create_workflow_agents)
+        execute_code: Whether to run the code runner step (default: True)
+        source_profile: Schema digest of the source folder, if it was already profiled
+            (e.g. once for a whole batch); the modeler then does not profile it again
+        concurrency_limits: Per-model caps on concurrent agent invocations (default: none)
+
+    Returns:
+        Dictionary with 'data_models', 'code', 'execution', per-step 'timings' in seconds
+        and the 'tokens' each agent used in this run
+    """
+    if agents is None:
+        agents = create_workflow_agents()
+    limits = concurrency_limits or ModelConcurrencyLimits()
+    timings = {}
+    tokens_before = agent_tokens(agents)
+
+    async def invoke(agent: Agent, prompt: str, step: str) -> str:
+        async with limits.slot(agent_model_id(agent)):
+            started = time.perf_counter()
+            with trace_span(agent.name, 'agent'):
+                response = await agent.invoke_async(prompt)
+            timings[step] = time.perf_counter() - started
+        return str(response)
+
+    # Step 1: Create data models
+    modeling_request = f"Generate data model based on the business requirement: '{user_input}' "
+    if source_profile:
+        modeling_request += (
+            "\n\nThe source data folder has already been profiled. Use this schema digest instead of "
+            f"calling summarize_source_schemas:\n\n{source_profile}"
+        )
+    data_models = await invoke(agents.data_modeler, modeling_request, 'data_modeler')
+
+    # Step 2: Write data engineering code based on the data models
+    code = await invoke(
+        agents.data_engineer,
         f"Generate code based on the business requirements:'{user_input}' and  and data model:\n\n{data_models}",
+        'data_engineer'
     )
-    code = str(engineer_response)
-    
-    return code
\ No newline at end of file
+
+    # Step 3: Execute the generated code
+    execution = None
+    if execute_code:
+        execution = await invoke(
+            agents.code_runner,
+            f"Find the saved code location based on provided'{user_input}', execute the code",
+            'code_runner'
+        )
+
+    tokens = {name: used - tokens_before[name] for name, used in agent_tokens(agents).items()}
+    return {'data_models': data_models, 'code': code, 'execution': execution, 'timings': timings, 'tokens': tokens}
+
+
+async def run_data_workflows_async(
+    user_inputs: List[str],
+    max_concurrency: int = 4,
+    models: Optional[Dict] = None,
+    execute_code: bool = True,
+    source_profile: Optional[str] = None,
+    concurrency_limits: Optional[ModelConcurrencyLimits] = None,
+    **agent_kwargs
+) -> List[Dict]:
+    """
+    Runs several business cases concurrently, each with its own set of agents.
+
+    Stages of different cases overlap; the shared per-model rate limiters keep
+    the combined request rate within the configured quotas. Agents keep
+    conversation state, so every case gets a fresh set; the model clients
+    behind them are shared.
+
+    Args:
+        user_inputs: One workflow request per business case
+        max_concurrency: Maximum number of cases in flight (default: 4)
+        models: Optional model overrides passed to create_workflow_agents
+        execute_code: Whether to run the code runner step (default: True)
+        source_profile: Schema digest of a source folder shared by all cases, if already profiled
+        concurrency_limits: Per-model caps on concurrent agent invocations across all cases (default: none)
+        **agent_kwargs: Extra Agent arguments (default: callback_handler=None to avoid interleaved output)
+
+    Returns:
+        One result per input, in input order, with the seconds it waited for a slot
+        ('queued_seconds') and ran ('seconds'); failed cases carry an 'error' entry
+    """
+    agent_kwargs.setdefault('callback_handler', None)
+    semaphore = asyncio.Semaphore(max_concurrency)
+
+    async def run_case(user_input: str) -> Dict:
+        queued = time.perf_counter()
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                agents = create_workflow_agents(models, **agent_kwargs)
+                result = await run_data_workflow_async(user_input, agents, execute_code, source_profile,
+                                                       concurrency_limits)
+            except Exception as e:
+                result = {'error': str(e)}
+            result['queued_seconds'] = round(started - queued, 4)
+            result['seconds'] = round(time.perf_counter() - started, 4)
+            return result
+
+    return await asyncio.gather(*(run_case(user_input) for user_input in user_inputs))
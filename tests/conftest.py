@@ -0,0 +1,17 @@
+import os
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+# Modules are flat files in src/, imported the way the notebook does; synthetic data comes from benchmarks/
+sys.path[:0] = [os.path.join(ROOT, 'src'), os.path.join(ROOT, 'benchmarks')]
+# Creating (never calling) BedrockModel clients needs a region
+os.environ.setdefault('AWS_DEFAULT_REGION', 'us-east-1')
+
+
+@pytest.fixture(scope='session')
+def venv_pool(tmp_path_factory):
+    """Execution environments that see the host's packages, shared by the tests that run code."""
+    from venv_pool import configure_venv_pool
+    return configure_venv_pool(root_dir=str(tmp_path_factory.mktemp('venvs')), system_site_packages=True)
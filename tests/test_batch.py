@@ -0,0 +1,40 @@
+import contextlib
+import io
+import re
+
+from batch import run_batch
+from fake_models import ScriptedModel
+from synthetic import generate_source_data
+
+
+def first_request_only(step):
+    """Answers for the case of the request, failing if the agent still holds an earlier conversation."""
+    def respond(messages, system_prompt):
+        assert len(messages) == 1, "agent reused with an earlier conversation"
+        case = re.search(r"Design a data product for (.+)", messages[0]['content'][0]['text']).group(1)
+        if case == "broken case 2":
+            raise RuntimeError("model unavailable")
+        return f"{step} for {case}"
+    return respond
+
+
+def test_every_case_gets_fresh_agents(tmp_path):
+    source = str(tmp_path / 'source')
+    generate_source_data(source, files=2, rows=50, columns=6, customers=10)
+    models = {'data_modeler': ScriptedModel(responder=first_request_only("model")),
+              'data_engineer': ScriptedModel(responder=first_request_only("code"))}
+    cases = ["sales case 0", "sales case 1", "broken case 2", "sales case 3"]
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = run_batch(cases, source, str(tmp_path / 'output'), max_concurrency=2, models=models,
+                           execute_code=False)
+
+    assert [case['status'] for case in result['cases']] == ['success', 'success', 'failed', 'success']
+    assert "model unavailable" in result['cases'][2]['error']
+    for name, case in zip(cases, result['cases']):
+        if case['status'] == 'success':
+            assert case['data_models'].strip() == f"model for {name}"
+            assert case['code'].strip() == f"code for {name}"
+            assert case['tokens']['data_modeler'] > 0 and case['tokens']['code_runner'] == 0
+            assert set(case['timings']) == {'data_modeler', 'data_engineer'}
+    assert result['failed'] == 1
@@ -0,0 +1,67 @@
+import numpy as np
+import pandas as pd
+
+from column_stats import ColumnAccumulator, FileProfileAccumulator, profile_dataframe
+
+
+def test_unique_counts_of_extension_dtypes():
+    df = pd.DataFrame({
+        'ints': pd.array([1, 2, None, 2], dtype='Int64'),
+        'flags': pd.array([True, None, False, True], dtype='boolean'),
+        'floats': pd.array([1.5, None, 1.5, 2.5], dtype='Float64'),
+        'numpy_floats': [1.5, np.nan, 1.5, 2.5],
+    })
+    profile = profile_dataframe(df, stats=['unique_counts'])
+    assert profile['unique_counts'] == {'ints': 2, 'flags': 2, 'floats': 2, 'numpy_floats': 2}
+
+
+def test_accumulator_keeps_range_across_promoted_chunks():
+    accumulator = ColumnAccumulator()
+    accumulator.update(pd.Series([5, 3, 9]))
+    accumulator.update(pd.Series([2.5, 7.0]))
+    assert accumulator.dtype == 'float64'
+    assert (accumulator.min_value, accumulator.max_value) == (2.5, 9.0)
+
+    # A chunk of text turns the column into text, as reading the whole file would
+    accumulator.update(pd.Series(['abc', '10']))
+    assert accumulator.dtype == 'object'
+    assert (accumulator.min_value, accumulator.max_value) == ('10', 'abc')
+
+
+def test_accumulator_counts_int_and_float_values_once():
+    accumulator = ColumnAccumulator()
+    accumulator.update(pd.Series(np.arange(100)))
+    accumulator.update(pd.Series(np.arange(100, dtype=np.float64)))
+    accumulator.update(pd.Series([1.0, np.nan, 2.0]))
+    # Approximate, but far from the 200 of counting 1 and 1.0 apart
+    assert abs(accumulator.distinct.count() - 100) <= 3
+    assert accumulator.null_count == 1
+
+
+def test_accumulator_mixed_objects_are_compared_as_text():
+    accumulator = ColumnAccumulator()
+    accumulator.update(pd.Series([3, 'b', 1], dtype=object))
+    accumulator.update(pd.Series(['1', 'a'], dtype=object))
+    assert (accumulator.min_value, accumulator.max_value) == ('1', 'b')
+    assert accumulator.distinct.count() == 4
+
+
+def test_merged_profiles_match_a_single_pass():
+    chunks = [pd.DataFrame({'id': [1, 2, 3], 'score': [0.5, 1.0, 2.0]}),
+              pd.DataFrame({'id': [3.0, 4.5], 'score': [1, 8]})]
+    single = FileProfileAccumulator()
+    for chunk in chunks:
+        single.update(chunk)
+    merged = FileProfileAccumulator()
+    for chunk in chunks:
+        part = FileProfileAccumulator()
+        part.update(chunk)
+        merged.merge(part)
+
+    for profile in (single, merged):
+        schema = profile.to_file_schema('scores.csv')
+        assert schema['dtypes'] == {'id': 'float64', 'score': 'float64'}
+        assert schema['min_values'] == {'id': 1.0, 'score': 0.5}
+        assert schema['max_values'] == {'id': 4.5, 'score': 8.0}
+        assert schema['unique_counts'] == {'id': 4, 'score': 4}
+
@@ -0,0 +1,53 @@
+import contextlib
+import io
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from data_validation import validate_data_product
+from synthetic import data_model_text
+from toolkit import pipe_delimited_string_to_csv
+
+pytest.importorskip('pyarrow')
+
+
+@pytest.fixture
+def folders(tmp_path):
+    model, product = str(tmp_path / 'model'), str(tmp_path / 'product')
+    with contextlib.redirect_stdout(io.StringIO()):
+        pipe_delimited_string_to_csv(schema_content=data_model_text(), data_model_output_folder=model)
+    os.makedirs(product)
+    pd.DataFrame({
+        'customer_key': [1, 2, 3], 'customer_id': [10, 20, 30], 'name': ['a', 'b', 'c'],
+        'segment': ['retail'] * 3, 'effective_date': ['2024-01-01'] * 3,
+        'expiration_date': ['9999-12-31'] * 3, 'is_current': [True] * 3,
+    }).to_parquet(os.path.join(product, 'dim_customer.parquet'), index=False)
+    return model, product
+
+
+def write_facts(product, customer_keys, sales_keys=None):
+    rows = len(customer_keys)
+    # pandas writes an integer key column with nulls as floats, e.g. "3.0"
+    pd.DataFrame({
+        'sales_key': sales_keys or list(range(rows)), 'order_id': range(rows), 'customer_key': customer_keys,
+        'order_date': ['2024-01-01'] * rows, 'quantity': [1] * rows, 'amount': [1.0] * rows,
+    }).to_csv(os.path.join(product, 'fact_sales.csv'), index=False)
+
+
+def test_float_written_keys_match_integer_keys(folders):
+    model, product = folders
+    write_facts(product, [1.0, 3.0, np.nan, 3.0])
+    result = validate_data_product(product, model)
+    foreign_key = result['tables']['fact_sales']['checks']['foreign_keys']['customer_key']
+    assert foreign_key['distinct_values'] == 2 and foreign_key['missing_keys'] == 0
+    assert foreign_key['null_rows'] == 1
+
+
+def test_missing_and_duplicate_keys_are_counted(folders):
+    model, product = folders
+    write_facts(product, [1.0, 4.0, 5.5, 2.0], sales_keys=[7, 7, 8, 8])
+    checks = validate_data_product(product, model)['tables']['fact_sales']['checks']
+    assert checks['foreign_keys']['customer_key']['missing_keys'] == 2
+    assert checks['primary_key']['duplicate_keys'] == 2 and checks['primary_key']['duplicate_rows'] == 2
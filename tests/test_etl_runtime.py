@@ -0,0 +1,56 @@
+import json
+
+import numpy as np
+import pandas as pd
+
+from etl_runtime import SOURCE_FILES_ENV, HashJoinLookup, SurrogateKeyAssigner, _key_strings, source_files
+
+
+def test_key_strings_match_integral_floats_and_keep_nulls():
+    ints = pd.DataFrame({'id': [1, 2, 3]})
+    floats = pd.DataFrame({'id': [1.0, np.nan, 3.5]})
+    assert _key_strings(ints, ['id']).tolist() == ['1', '2', '3']
+    keys = _key_strings(floats, ['id'])
+    assert keys[0] == '1' and pd.isna(keys[1]) and keys[2] == '3.5'
+
+    composite = pd.DataFrame({'store': [1.0, 2.0, None], 'sku': ['a', None, 'c']})
+    keys = _key_strings(composite, ['store', 'sku'])
+    assert keys[0] == '1\x1fa' and keys[1:].isna().all()
+    assert _key_strings(pd.DataFrame({'id': ['7.0', '7.5']}), ['id']).tolist() == ['7', '7.5']
+
+
+def test_surrogate_keys_are_stable_across_chunk_dtypes(tmp_path):
+    with SurrogateKeyAssigner(str(tmp_path), 'dim_product', ['product_id'], key_type='sequence') as keys:
+        first = keys.assign(pd.DataFrame({'product_id': [10, 20]}), 'product_key')
+        # A later chunk with a missing key is read as float64
+        second = keys.assign(pd.DataFrame({'product_id': [20.0, np.nan, 30.0]}), 'product_key')
+    assert first['product_key'].tolist() == [1, 2]
+    assert second['product_key'].tolist()[0] == 2 and pd.isna(second['product_key'][1])
+    assert second['product_key'][2] == 3
+
+    with SurrogateKeyAssigner(str(tmp_path), 'dim_product', ['product_id'], key_type='sequence') as keys:
+        assert keys.lookup(['10', '20', '30', 'nan']) == {'10': '1', '20': '2', '30': '3'}
+
+
+def test_hash_join_matches_float_fact_keys(tmp_path):
+    dimension = pd.DataFrame({'customer_id': [1, 2, 3], 'customer_key': ['k1', 'k2', 'k3']})
+    facts = pd.DataFrame({'customer_id': [3.0, np.nan, 1.0, 4.0], 'amount': [5, 6, 7, 8]})
+    for max_memory_rows in (100, 1):
+        with HashJoinLookup(['customer_id'], 'customer_key', max_memory_rows=max_memory_rows, partitions=4,
+                            spill_dir=str(tmp_path / f'spill-{max_memory_rows}')) as lookup:
+            lookup.add(dimension)
+            joined = lookup.lookup(facts, ['customer_id'], 'customer_key')
+            assert lookup.spilled == (max_memory_rows == 1)
+        assert joined['customer_key'].tolist()[0] == 'k3' and joined['customer_key'].tolist()[2] == 'k1'
+        assert joined['customer_key'][[1, 3]].isna().all()
+
+
+def test_incremental_source_files_stay_in_the_source_folder(tmp_path, monkeypatch):
+    for name in ('data/sales/a.csv', 'data/sales/b.csv', 'data-old/sales/a.csv'):
+        (tmp_path / name).parent.mkdir(parents=True, exist_ok=True)
+        (tmp_path / name).write_text('id\n1\n')
+    new_files = [str(tmp_path / 'data/sales/b.csv'), str(tmp_path / 'data-old/sales/a.csv')]
+    monkeypatch.setenv(SOURCE_FILES_ENV, json.dumps(new_files))
+    assert source_files(str(tmp_path / 'data')) == new_files[:1]
+    assert source_files(str(tmp_path / 'data'), 'sales/*.csv') == new_files[:1]
+    assert source_files(str(tmp_path / 'data-old')) == new_files[1:]
@@ -0,0 +1,44 @@
+import sys
+
+from exec_worker import WarmWorkerPool, run_script
+
+
+def write_script(tmp_path, source):
+    path = tmp_path / 'script.py'
+    path.write_text(source)
+    return str(path)
+
+
+def test_peak_rss_excludes_the_parents_memory(tmp_path):
+    ballast = b'x' * (400 * 1024 * 1024)
+    result = run_script(sys.executable, write_script(tmp_path, "raise ValueError('boom')\n"))
+    assert len(ballast)
+    assert not result.success and result.exit_code == 1
+    assert result.stderr.startswith('Traceback') and 'ValueError: boom' in result.stderr
+    assert 'exec_worker' not in result.stderr
+    assert 0 < result.peak_rss_mb < 200
+
+
+def test_peak_rss_counts_the_scripts_memory(tmp_path):
+    script = write_script(tmp_path, "import sys\ndata = b'x' * (300 * 1024 * 1024)\nsys.exit(3)\n")
+    cold = run_script(sys.executable, script)
+    assert cold.exit_code == 3 and cold.peak_rss_mb >= 300
+
+    pool = WarmWorkerPool(sys.executable, size=1, preload=())
+    try:
+        warm = pool.run(script)
+    finally:
+        pool.close()
+    assert warm.warm and warm.exit_code == 3 and warm.peak_rss_mb >= 300
+
+
+def test_killed_script_has_no_peak_rss(tmp_path):
+    result = run_script(sys.executable, write_script(tmp_path, "import time\ntime.sleep(10)\n"), timeout=0.2)
+    assert result.timed_out and result.peak_rss_mb is None
+
+
+def test_memory_limit_stops_the_script(tmp_path):
+    script = write_script(tmp_path, "data = b'x' * (1024 * 1024 * 1024)\n")
+    result = run_script(sys.executable, script, memory_limit_mb=300)
+    assert not result.success
+    assert any('memory limit of 300 MB' in error for error in result.errors)
@@ -0,0 +1,107 @@
+import contextlib
+import io
+import json
+import os
+
+import pandas as pd
+import pytest
+
+from fake_models import ScriptedModel
+from incremental import RunManifest, run_incremental_workflow
+from synthetic import data_model_text, etl_script, generate_source_data
+from workflow import create_workflow_agents
+
+
+@pytest.fixture
+def paths(tmp_path, venv_pool):
+    paths = {name: str(tmp_path / name) for name in ('source', 'model', 'product')}
+    paths['code'] = str(tmp_path / 'etl.py')
+    generate_source_data(paths['source'], files=2, rows=200, columns=6, customers=50)
+    return paths
+
+
+def scripted_agents(paths, run_code=True):
+    """Agents that write the synthetic data model and ETL script; the runner executes it only if run_code."""
+    code = etl_script(paths['source'], paths['product'], paths['model'])
+    runner_turns = ["I could not run the code."]
+    if run_code:
+        runner_turns = [{'tool_calls': [{'name': 'check_and_execute_python_file',
+                                         'input': {'file_path': paths['code']}}]}, "Done."]
+    return create_workflow_agents({
+        'data_modeler': ScriptedModel([
+            {'tool_calls': [{'name': 'pipe_delimited_string_to_csv',
+                             'input': {'schema_content': data_model_text(),
+                                       'data_model_output_folder': paths['model']}}]},
+            data_model_text(),
+        ]),
+        'data_engineer': ScriptedModel([
+            {'tool_calls': [{'name': 'save_generated_code',
+                             'input': {'content': f"```python\n{code}\n```", 'code_location': paths['code']}}]},
+            "Saved.",
+        ]),
+        'code_runner': ScriptedModel(runner_turns),
+    }, callback_handler=None)
+
+
+def run(paths, agents=None):
+    with contextlib.redirect_stdout(io.StringIO()):
+        return run_incremental_workflow("Sales data product", paths['source'], paths['model'], paths['code'],
+                                        paths['product'], agents=agents or scripted_agents(paths))
+
+
+def manifest(paths) -> RunManifest:
+    return RunManifest.load(paths['code'] + '.manifest.json')
+
+
+def fact_rows(paths) -> pd.DataFrame:
+    return pd.read_csv(os.path.join(paths['product'], 'fact_sales.csv'))
+
+
+def test_failed_agent_run_is_not_recorded(paths):
+    result = run(paths, scripted_agents(paths, run_code=False))
+    assert result['plan']['run_engineer'] and not result['succeeded']
+    assert result['validation']['status'] == 'failed'
+    assert manifest(paths).needs_full_rebuild
+    assert manifest(paths).source_files == {}
+
+    # The saved code is reused, but the whole source folder is processed again
+    result = run(paths)
+    assert result['succeeded']
+    assert not result['plan']['run_engineer'] and result['plan']['full_rebuild']
+    assert "previous full rebuild did not complete" in result['plan']['reasons']
+    assert not manifest(paths).needs_full_rebuild
+    assert len(manifest(paths).source_files) == 3
+    assert len(fact_rows(paths)) == 400
+
+
+def test_successful_agent_run_is_validated(paths):
+    result = run(paths)
+    assert result['succeeded'] and result['validation']['status'] == 'ok'
+    assert not manifest(paths).needs_full_rebuild
+
+    result = run(paths)
+    assert not result['plan']['run_code']
+    assert json.loads(json.dumps(result['plan']))['reasons'] == ["inputs unchanged"]
+
+
+def test_modified_source_file_forces_full_rebuild(paths):
+    assert run(paths)['succeeded']
+    part = os.path.join(paths['source'], 'sales', 'part-0000.csv')
+    sales = pd.read_csv(part)
+    extra = sales.head(10).assign(order_id=range(400, 410))
+    extra.to_csv(part, mode='a', header=False, index=False)
+
+    result = run(paths)
+    assert result['succeeded'] and result['plan']['full_rebuild']
+    assert "1 source files modified" in result['plan']['reasons']
+    facts = fact_rows(paths)
+    assert len(facts) == 410 and facts['order_id'].is_unique
+
+    # A file that is really new is still processed on its own
+    extra.assign(order_id=range(410, 420)).to_csv(
+        os.path.join(paths['source'], 'sales', 'part-0002.csv'), index=False)
+    result = run(paths)
+    assert result['succeeded'] and not result['plan']['full_rebuild']
+    assert result['plan']['reasons'] == ["1 new source files"]
+    facts = fact_rows(paths)
+    assert len(facts) == 420 and facts['order_id'].is_unique
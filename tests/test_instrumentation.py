@@ -0,0 +1,57 @@
+import threading
+
+import pytest
+
+from instrumentation import InMemoryExporter, SpanExporter, configure_instrumentation, trace_span
+
+
+@pytest.fixture
+def exporter():
+    yield configure_instrumentation('memory')
+    configure_instrumentation(None)
+
+
+def write(path, size):
+    with open(path, 'wb') as f:
+        f.write(b'x' * size)
+
+
+def test_exporters_must_implement_export():
+    class Incomplete(SpanExporter):
+        pass
+
+    with pytest.raises(TypeError):
+        Incomplete()
+    assert isinstance(InMemoryExporter(), SpanExporter)
+
+
+def test_bytes_recorded_for_nested_spans(exporter, tmp_path):
+    with trace_span('stage', 'stage'):
+        with trace_span('write_file'):
+            write(tmp_path / 'data.bin', 100_000)
+    spans = {span.name: span for span in exporter.spans}
+    assert spans['write_file'].parent == 'stage'
+    assert spans['write_file'].bytes_written >= 100_000
+    assert spans['stage'].bytes_written >= spans['write_file'].bytes_written
+
+
+def test_bytes_not_recorded_for_overlapping_spans(exporter, tmp_path):
+    both_open = threading.Barrier(2)
+
+    def case(name):
+        with trace_span(name):
+            both_open.wait()
+            write(tmp_path / name, 100_000)
+            both_open.wait()
+
+    threads = [threading.Thread(target=case, args=(name,)) for name in ('first', 'second')]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    assert len(exporter.spans) == 2
+    assert all(span.bytes_written is None and span.bytes_read is None for span in exporter.spans)
+
+    with trace_span('alone'):
+        write(tmp_path / 'alone', 1000)
+    assert exporter.spans[-1].bytes_written >= 1000
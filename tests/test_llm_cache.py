@@ -0,0 +1,74 @@
+import asyncio
+import contextlib
+import io
+
+import pytest
+
+from fake_models import ScriptedModel
+from llm_cache import CacheMissError, LLMResponseCache, configure_llm_cache, llm_cache_stats
+from synthetic import data_model_text, etl_script, generate_source_data
+from workflow import create_workflow_agents, run_data_workflow_async
+
+
+@pytest.fixture
+def paths(tmp_path, venv_pool):
+    paths = {name: str(tmp_path / name) for name in ('source', 'model', 'product')}
+    paths['code'] = str(tmp_path / 'etl.py')
+    paths['cache'] = str(tmp_path / 'llm_cache.db')
+    generate_source_data(paths['source'], files=1, rows=100, columns=6, customers=20)
+    yield paths
+    configure_llm_cache(mode='off')
+
+
+def recording_models(paths):
+    code = etl_script(paths['source'], paths['product'], paths['model'])
+    return {
+        'data_modeler': ScriptedModel([
+            {'tool_calls': [{'name': 'pipe_delimited_string_to_csv',
+                             'input': {'schema_content': data_model_text(),
+                                       'data_model_output_folder': paths['model']}}]},
+            data_model_text(),
+        ]),
+        'data_engineer': ScriptedModel([
+            {'tool_calls': [{'name': 'save_generated_code',
+                             'input': {'content': f"```python\n{code}\n```", 'code_location': paths['code']}}]},
+            "Saved.",
+        ]),
+        'code_runner': ScriptedModel([
+            {'tool_calls': [{'name': 'check_and_execute_python_file', 'input': {'file_path': paths['code']}}]},
+            "The code ran successfully.",
+        ]),
+    }
+
+
+def offline_models():
+    def unreachable(messages, system_prompt):
+        raise AssertionError("the model was called during replay")
+    return {role: ScriptedModel(responder=unreachable) for role in ('data_modeler', 'data_engineer', 'code_runner')}
+
+
+def run(models):
+    agents = create_workflow_agents(models, callback_handler=None)
+    with contextlib.redirect_stdout(io.StringIO()):
+        return asyncio.run(run_data_workflow_async("Sales data product", agents))
+
+
+def test_recorded_workflow_replays_offline(paths):
+    configure_llm_cache(paths['cache'], mode='record')
+    recorded = run(recording_models(paths))
+    assert llm_cache_stats()['entries'] == 6
+
+    # The tools run again, so execution times and memory in their results differ
+    configure_llm_cache(paths['cache'], mode='replay')
+    replayed = run(offline_models())
+    assert llm_cache_stats()['hits'] == 6 and llm_cache_stats()['misses'] == 0
+    assert replayed['execution'] == recorded['execution']
+
+
+def test_replay_misses_a_changed_request(paths):
+    configure_llm_cache(paths['cache'], mode='record')
+    run(recording_models(paths))
+    configure_llm_cache(paths['cache'], mode='replay')
+    agents = create_workflow_agents(offline_models(), callback_handler=None)
+    with pytest.raises(CacheMissError):
+        asyncio.run(agents.data_modeler.invoke_async("A different business case"))
@@ -0,0 +1,77 @@
+import decimal
+
+import pytest
+
+pa = pytest.importorskip('pyarrow')
+import pyarrow.parquet as pq
+
+from output_formats import arrow_type, cast_to_schema, inspect_data_product, inspect_table_files
+
+
+@pytest.mark.parametrize('data_type, expected', [
+    ('INT', pa.int64()), ('Integer NOT NULL', pa.int64()), ('BIGINT (FK)', pa.int64()), ('tinyint(1)', pa.int64()),
+    ('int64', pa.int64()), ('INTEGER UNSIGNED', pa.int64()), ('serial', pa.int64()),
+    ('interval', pa.string()), ('point', pa.string()), ('varchar(20)', pa.string()), ('longtext', pa.string()),
+    ('DECIMAL(10, 2)', pa.decimal128(10, 2)), ('numeric(5)', pa.decimal128(5, 0)), ('decimal', pa.float64()),
+    ('double precision', pa.float64()), ('money', pa.float64()),
+    ('BOOLEAN', pa.bool_()), ('bit', pa.bool_()),
+    ('DATE', pa.date32()), ('datetime', pa.timestamp('us')), ('TIMESTAMP WITH TIME ZONE', pa.timestamp('us')),
+])
+def test_arrow_type(data_type, expected):
+    assert arrow_type(data_type) == expected
+
+
+def test_cast_to_schema_rounds_decimals_and_names_bad_columns():
+    table = pa.table({'amount': [1.236, 2.5, None, -0.125], 'note': ['a', 'b', 'c', 'd']})
+    schema = pa.schema([('amount', pa.decimal128(10, 2)), ('id', pa.int64())])
+    cast = cast_to_schema(table, schema)
+    assert cast.schema.field('amount').type == pa.decimal128(10, 2)
+    assert cast.column('amount').to_pylist() == [decimal.Decimal('1.24'), decimal.Decimal('2.50'), None,
+                                                 decimal.Decimal('-0.12')]
+    assert cast.column('note').type == pa.string()
+
+    with pytest.raises(ValueError, match="Column 'note' cannot be converted to int64"):
+        cast_to_schema(table, pa.schema([('note', pa.int64())]))
+
+
+def test_footer_row_and_null_counts(tmp_path):
+    parts = tmp_path / 'fact_sales'
+    for region in ('east', 'west'):
+        (parts / f'region={region}').mkdir(parents=True)
+        table = pa.table({'sale_id': [1, 2, None, 4, 5], 'amount': [1.0, None, None, 2.0, 3.0]})
+        pq.write_table(table, parts / f'region={region}' / 'part-00000.parquet', row_group_size=2)
+    files = sorted(str(path) for path in parts.rglob('*.parquet'))
+    described = inspect_table_files(files, str(parts))
+    assert described['format'] == 'parquet' and described['files'] == 2 and described['rows'] == 10
+    assert described['null_counts'] == {'sale_id': 2, 'amount': 4}
+    assert described['columns'] == {'sale_id': 'int64', 'amount': 'double', 'region': 'partition'}
+
+    csv_path = tmp_path / 'dim_customer.csv'
+    csv_path.write_text('customer_id,name\n1,a\n2,b\n3,c\n')
+    assert inspect_table_files([str(csv_path)]) == {'format': 'csv', 'files': 1, 'rows': 3, 'null_counts': {},
+                                                    'columns': {'customer_id': 'csv', 'name': 'csv'}}
+
+
+def test_missing_and_retyped_columns_are_reported(tmp_path):
+    model = tmp_path / 'model'
+    model.mkdir()
+    (model / 'table_columns.csv').write_text(
+        "Table Name,Column Name,Data Type,PK/FK,Description\n"
+        "fact_sales,sale_id,INT,PK,Sale\n"
+        "fact_sales,amount,\"DECIMAL(10,2)\",,Amount\n"
+        "fact_sales,region,VARCHAR(20),,Region\n"
+        "dim_customer,customer_id,INT,PK,Customer\n")
+    product = tmp_path / 'product'
+    product.mkdir()
+    pq.write_table(pa.table({'sale_id': pa.array([1, 2], pa.int64()), 'amount': [1.5, 2.5], 'note': ['x', 'y']}),
+                   product / 'fact_sales.parquet')
+
+    result = inspect_data_product(str(product), str(model))
+    assert result['status'] == 'failed'
+    assert result['missing_tables'] == ['dim_customer']
+    assert result['problems'] == [
+        "dim_customer: table missing",
+        "fact_sales: missing columns ['region']",
+        "fact_sales: columns not in the data model ['note']",
+        "fact_sales.amount: written as double, data model type 'DECIMAL(10,2)' expects decimal128(10, 2)",
+    ]
@@ -0,0 +1,38 @@
+import pandas as pd
+import pytest
+
+from readers import iter_chunks, read_sample
+
+pytest.importorskip('pyarrow')
+
+
+def test_engines_read_missing_cells_alike(tmp_path):
+    path = tmp_path / 'customers.csv'
+    path.write_text("id,name,score,segment\n"
+                    "1,alpha,1.5,retail\n"
+                    "2,,NA,\n"
+                    "3,NA,,online\n"
+                    "4,null,2.5,N/A\n")
+    arrow = read_sample(str(path), 10, engine='pyarrow')
+    pandas = read_sample(str(path), 10, engine='c')
+    assert arrow['name'].isna().tolist() == [False, True, True, True]
+    assert arrow['segment'].isna().tolist() == [False, True, False, True]
+    pd.testing.assert_frame_equal(arrow, pandas, check_dtype=False)
+
+
+@pytest.mark.parametrize('suffix', ['.gz', '.zst', '.zstd'])
+def test_compressed_sources_are_read_by_every_engine(tmp_path, suffix):
+    frame = pd.DataFrame({'id': range(1, 6), 'name': list('abcde')})
+    csv_path = str(tmp_path / f'data.csv{suffix}')
+    jsonl_path = str(tmp_path / f'data.jsonl{suffix}')
+    codec = 'gzip' if suffix == '.gz' else 'zstd'
+    frame.to_csv(csv_path, index=False, compression=codec)
+    frame.to_json(jsonl_path, orient='records', lines=True, compression=codec)
+
+    for engine in ('auto', 'pyarrow', 'c'):
+        pd.testing.assert_frame_equal(read_sample(csv_path, 3, engine=engine), frame.head(3), check_dtype=False)
+    pd.testing.assert_frame_equal(read_sample(jsonl_path, 3), frame.head(3))
+    for path in (csv_path, jsonl_path):
+        chunks = list(iter_chunks(path, 2))
+        assert [len(chunk) for chunk in chunks] == [2, 2, 1]
+        pd.testing.assert_frame_equal(pd.concat(chunks, ignore_index=True), frame)
@@ -0,0 +1,37 @@
+from schema_catalog import SchemaCatalog
+
+
+def file_schema(columns, null_count=0):
+    return {'source_format': 'csv', 'columns': columns, 'num_columns': len(columns), 'sample_size': 10,
+            'dtypes': {column: 'int64' for column in columns},
+            'null_counts': {column: null_count for column in columns}}
+
+
+def test_unchanged_snapshot_is_not_recorded_again(tmp_path):
+    catalog = SchemaCatalog(str(tmp_path / 'catalog.db'), keep_runs=2)
+    folder = str(tmp_path / 'source')
+    schemas = {'sales.csv': file_schema(['order_id', 'amount'])}
+    first = catalog.record_run(folder, schemas)
+    assert catalog.record_run(folder, schemas) == first
+    assert len(catalog.runs(folder)) == 1
+
+    # Changed statistics are a new run; the oldest runs beyond keep_runs are pruned
+    second = catalog.record_run(folder, {'sales.csv': file_schema(['order_id', 'amount'], null_count=1)})
+    third = catalog.record_run(folder, {**schemas, 'customers.csv': file_schema(['customer_id'])})
+    assert [run['run_id'] for run in catalog.runs(folder)] == [third, second]
+    assert catalog.conn.execute("SELECT COUNT(*) FROM catalog_columns WHERE run_id = ?", (first,)).fetchone()[0] == 0
+    assert catalog.schema_drift(folder)['added_files'] == [{'file_path': 'customers.csv', 'known_structure': False}]
+
+
+def test_wildcard_treats_like_characters_literally(tmp_path):
+    catalog = SchemaCatalog(str(tmp_path / 'catalog.db'))
+    folder = str(tmp_path / 'source')
+    catalog.record_run(folder, {'sales.csv': file_schema(['order_id', 'orderXid', 'discount_%', 'discount_rate'])})
+
+    def matches(pattern):
+        return [match['column'] for match in catalog.files_with_column(folder, pattern)]
+
+    assert matches('order_*') == ['order_id']
+    assert matches('ORDER_*') == ['order_id']
+    assert matches('discount_%*') == ['discount_%']
+    assert sorted(matches('discount*')) == ['discount_%', 'discount_rate']
@@ -0,0 +1,129 @@
+import asyncio
+import contextlib
+import io
+import json
+import os
+
+import pytest
+
+from fake_models import ScriptedModel
+from streaming import CodeFenceStreamWriter, PartialJsonStrings, StreamedToolInputs, run_data_workflow_streaming
+from toolkit import save_generated_code
+from workflow import create_workflow_agents
+
+DATA_MODEL = "### Sales\n| id | amount |\n|---|---|\n| 1 | 2.5 |\n\n### Customer\n| id | name |\n|---|---|\n| 1 | a |\n"
+
+
+def stream_tool_call(inputs, name, arguments, tool_use_id='tooluse_1', chunk_size=7):
+    """Feeds a tool call's JSON input the way Strands accumulates it in current_tool_use."""
+    text = json.dumps(arguments)
+    for end in range(chunk_size, len(text) + chunk_size, chunk_size):
+        inputs.on_tool_use({'toolUseId': tool_use_id, 'name': name, 'input': text[:end]})
+    return inputs.calls[name, tool_use_id]
+
+
+def test_data_model_tables_are_committed_with_default_names(tmp_path):
+    inputs = StreamedToolInputs()
+    call = stream_tool_call(inputs, 'pipe_delimited_string_to_csv',
+                            {'schema_content': DATA_MODEL, 'data_model_output_folder': str(tmp_path)})
+    assert inputs.ready['pipe_delimited_string_to_csv'].is_set()
+    assert sorted(os.listdir(tmp_path)) == ['table_customer.csv', 'table_sales.csv']
+    assert sorted(call.committed.values()) == [str(tmp_path / 'table_customer.csv'), str(tmp_path / 'table_sales.csv')]
+    assert call.writer.text == DATA_MODEL
+
+
+@pytest.mark.parametrize('naming', [{'file_prefix': 'dm'}, {'detect_tables': False},
+                                    {'single_output_file': 'model.csv'}])
+def test_non_default_file_names_are_left_to_the_tool(tmp_path, naming):
+    inputs = StreamedToolInputs()
+    # The naming argument follows the content, as the tool signature orders them
+    call = stream_tool_call(inputs, 'pipe_delimited_string_to_csv',
+                            {'schema_content': DATA_MODEL, 'data_model_output_folder': str(tmp_path), **naming})
+    assert inputs.ready['pipe_delimited_string_to_csv'].is_set()
+    assert call.committed == {} and os.listdir(tmp_path) == []
+    assert not os.path.exists(call.writer.staging_folder)
+
+
+def test_data_model_tables_wait_for_the_whole_input(tmp_path):
+    inputs = StreamedToolInputs()
+    text = json.dumps({'schema_content': DATA_MODEL, 'data_model_output_folder': str(tmp_path), 'file_prefix': 'dm'})
+    inputs.on_tool_use({'toolUseId': 'tooluse_1', 'name': 'pipe_delimited_string_to_csv',
+                        'input': text[:text.index('"file_prefix"')]})
+    assert inputs.calls['pipe_delimited_string_to_csv', 'tooluse_1'].content_complete
+    assert not inputs.ready['pipe_delimited_string_to_csv'].is_set()
+    inputs.on_tool_use({'toolUseId': 'tooluse_1', 'name': 'pipe_delimited_string_to_csv', 'input': text})
+    assert inputs.ready['pipe_delimited_string_to_csv'].is_set() and os.listdir(tmp_path) == []
+
+
+@pytest.mark.parametrize('json_text', [
+    '{"a": "plain", "b": "quote \\" backslash \\\\ slash \\/ controls \\b\\f\\n\\r\\t"}',
+    '{"emoji": "\\ud83d\\ude00 and \\u00e9", "lone": "\\ud83d then text", "raw": "déjà vu 😀"}',
+    '{"n": -1.5e3, "flag": true, "none": null, "nested": {"k": "v, }", "l": [1, "]", {"x": "\\""}]}, "after": "ok"}',
+    '{ "spaced" : "value" , "list" : [ ] , "esc\\"key" : "\\u0041" }',
+])
+def test_partial_json_strings_fed_one_character_at_a_time(json_text):
+    expected = json.loads(json_text)
+    texts, completed, values = {}, {}, {}
+    parser = PartialJsonStrings(lambda key, text: texts.__setitem__(key, texts.get(key, '') + text),
+                                completed.__setitem__, values.__setitem__)
+    for end in range(1, len(json_text) + 1):
+        parser.feed(json_text[:end])
+    assert parser.ended
+    assert completed == {key: value for key, value in expected.items() if isinstance(value, str)}
+    assert values == {key: value for key, value in expected.items() if not isinstance(value, str)}
+    assert {key: texts.get(key, '') for key in completed} == completed
+
+
+@pytest.mark.parametrize('content', [
+    "Here is the code:\n```python\nimport pandas as pd\n\nprint('done')\n```\nRun it with python.",
+    "```python\nfirst = 1\n```\nand another\n```python\nsecond = 2\n```",
+    "import os\nprint(os.getcwd())",
+    "```python\nunclosed = True\n",
+    "```python\n```",
+    "```python3\nx = 1\n```",
+    "Inline ```python\nx = 1\n``` fence",
+    "```python\nx = '```'\n```",
+])
+def test_code_fence_writer_matches_save_generated_code(tmp_path, content):
+    save_generated_code(content=content, code_location=str(tmp_path / 'saved.py'))
+    writer = CodeFenceStreamWriter()
+    for char in content:
+        writer.feed(char)
+    writer.close()
+    writer.commit(str(tmp_path / 'streamed.py'))
+    assert (tmp_path / 'streamed.py').read_text() == (tmp_path / 'saved.py').read_text()
+
+
+def test_stages_start_before_the_previous_agent_finishes(tmp_path):
+    model_folder, code_path = str(tmp_path / 'model'), str(tmp_path / 'etl.py')
+    code = "print('loaded')"
+    prompts = []
+
+    def engineer(messages, system_prompt):
+        prompts.append(messages[0]['content'][0]['text'])
+        if len(messages) == 1:
+            return {'tool_calls': [{'name': 'save_generated_code',
+                                    'input': {'content': f"```python\n{code}\n```", 'code_location': code_path}}]}
+        return "Saved."
+
+    models = {
+        # Each call takes a while, so the final answers overlap the next stage
+        'data_modeler': ScriptedModel([
+            {'tool_calls': [{'name': 'pipe_delimited_string_to_csv',
+                             'input': {'schema_content': DATA_MODEL, 'data_model_output_folder': model_folder}}]},
+            DATA_MODEL,
+        ], latency=0.3),
+        'data_engineer': ScriptedModel(responder=engineer, latency=0.3),
+        'code_runner': ScriptedModel(["The code ran successfully."]),
+    }
+    agents = create_workflow_agents(models, callback_handler=None)
+    with contextlib.redirect_stdout(io.StringIO()):
+        result = asyncio.run(run_data_workflow_streaming("Sales data product", agents))
+
+    assert result['early'] == {'data_engineer': True, 'code_runner': True}
+    assert result['started_at']['data_engineer'] < result['timings']['data_modeler']
+    assert result['started_at']['code_runner'] < result['started_at']['data_engineer'] + result['timings']['data_engineer']
+    assert DATA_MODEL in prompts[0]
+    assert sorted(os.listdir(model_folder)) == ['table_customer.csv', 'table_sales.csv']
+    assert result['files']['save_generated_code'] == code_path and open(code_path).read() == code
+    assert result['execution'].strip() == "The code ran successfully."
@@ -0,0 +1,59 @@
+import json
+import os
+import time
+
+from venv_pool import READY_MARKER, VenvPool
+
+
+def ready_env(pool, requirements, last_used):
+    """Registers a ready environment without building it, last used at the given time."""
+    key = pool.env_key(requirements)
+    os.makedirs(os.path.join(pool.root_dir, key))
+    marker = os.path.join(pool.root_dir, key, READY_MARKER)
+    with open(marker, 'w') as f:
+        json.dump({'requirements': requirements}, f)
+    os.utime(marker, (last_used, last_used))
+    return key
+
+
+def test_env_key_depends_only_on_what_determines_the_contents(tmp_path):
+    pool = VenvPool(root_dir=str(tmp_path))
+    key = pool.env_key(['pandas', 'numpy'])
+    assert pool.env_key([' numpy', 'pandas ', 'numpy', '']) == key
+    assert pool.env_key(['pandas', 'numpy==1.26.4']) != key
+    assert VenvPool(root_dir=str(tmp_path), system_site_packages=True).env_key(['pandas', 'numpy']) != key
+
+
+def test_environment_is_built_once_and_reused(venv_pool):
+    python = venv_pool.get_python()
+    env_dir = os.path.dirname(os.path.dirname(python))
+    built = os.stat(env_dir).st_ino
+    with venv_pool.use(['numpy', 'pandas']) as reused:
+        assert reused == python
+    assert os.stat(env_dir).st_ino == built
+    assert [env['key'] for env in venv_pool.describe()].count(venv_pool.env_key(['pandas', 'numpy'])) == 1
+
+
+def test_least_recently_used_environments_are_evicted(tmp_path):
+    pool = VenvPool(root_dir=str(tmp_path), max_envs=2)
+    now = time.time()
+    keys = [ready_env(pool, [f'package-{i}'], now - 100 + i) for i in range(3)]
+    assert pool.evict() == keys[:1]
+    # Using an environment makes it the most recently used
+    with pool.use(['package-1']):
+        pass
+    ready_env(pool, ['package-3'], now)
+    assert pool.evict() == [keys[2]]
+    assert sorted(env['key'] for env in pool.describe()) == sorted([keys[1], pool.env_key(['package-3'])])
+
+
+def test_environment_in_use_is_not_evicted(tmp_path):
+    pool = VenvPool(root_dir=str(tmp_path), max_envs=1)
+    now = time.time()
+    in_use = ready_env(pool, ['package-a'], now - 100)
+    with pool.use(['package-a']) as python:
+        ready_env(pool, ['package-b'], now + 100)
+        assert pool.evict() == []
+        assert python == os.path.join(str(tmp_path), in_use, 'bin', 'python')
+        assert os.path.isdir(os.path.join(str(tmp_path), in_use))
+    assert pool.evict() == [in_use]
@@ -0,0 +1,63 @@
+import asyncio
+import re
+
+import pytest
+from pydantic import BaseModel
+from strands.types.exceptions import ModelThrottledException
+
+from fake_models import ScriptedModel
+from workflow import configure_rate_limits, create_workflow_agents, rate_limit_stats, run_data_workflows_async
+
+
+class TableSummary(BaseModel):
+    table: str
+    columns: int
+
+
+@pytest.fixture
+def rate_limits():
+    configure_rate_limits({'throttled-model': {'requests_per_minute': 6000}})
+    yield
+    configure_rate_limits(None)
+
+
+def case_responder(step):
+    """Answers with the step and the case named in the first user message."""
+    def respond(messages, system_prompt):
+        case = re.search(r"case \d+", messages[0]['content'][0]['text']).group(0)
+        return f"{step} for {case}"
+    return respond
+
+
+def test_throttled_cases_back_off_and_keep_their_order(rate_limits, monkeypatch):
+    # Retry throttled calls after milliseconds instead of strands' default of seconds
+    monkeypatch.setattr('strands.agent.agent.INITIAL_DELAY', 0.01)
+    modeler = ScriptedModel(responder=case_responder("model"), model_id='throttled-model', throttle_first=3)
+    engineer = ScriptedModel(responder=case_responder("code"), latency=0.01)
+    cases = [f"case {i}" for i in range(6)]
+
+    results = asyncio.run(run_data_workflows_async(
+        cases, max_concurrency=4, models={'data_modeler': modeler, 'data_engineer': engineer}, execute_code=False))
+
+    assert [result['data_models'].strip() for result in results] == [f"model for {case}" for case in cases]
+    assert [result['code'].strip() for result in results] == [f"code for {case}" for case in cases]
+    assert modeler.throttled == 3 and modeler.calls == len(cases) + 3
+    stats = rate_limit_stats()['throttled-model']
+    assert stats['throttle_count'] == 3 and stats['rate_fraction'] < 1
+
+
+def test_structured_output_from_scripted_turn():
+    model = ScriptedModel([{'output': {'table': 'fact_sales', 'columns': 6}},
+                           '{"table": "dim_customer", "columns": 7}'], throttle_first=1)
+    # Through the caching and rate limiting wrappers the workflow agents use
+    agent_model = create_workflow_agents({'data_modeler': model}, callback_handler=None).data_modeler.model
+
+    async def structured(prompt):
+        messages = [{'role': 'user', 'content': [{'text': prompt}]}]
+        events = [event async for event in agent_model.structured_output(TableSummary, messages)]
+        return events[-1]['output']
+
+    with pytest.raises(ModelThrottledException):
+        asyncio.run(structured("Summarize the fact table"))
+    assert asyncio.run(structured("Summarize the fact table")) == TableSummary(table='fact_sales', columns=6)
+    assert asyncio.run(structured("Summarize the customer dimension")) == TableSummary(table='dim_customer', columns=7)